@@ -3,13 +3,57 @@ Admin configuration for Hero Lab API
 """
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, SignalData
+from django.utils.html import format_html, format_html_join
+from .models import User, SignalData, ProcessingJob, UploadSession
 
 admin.site.register(User, BaseUserAdmin)
 
 @admin.register(SignalData)
 class SignalDataAdmin(admin.ModelAdmin):
-    list_display = ('id', 'user', 'file_name', 'file_size', 'uploaded_at', 'processed_at')
+    list_display = (
+        'id', 'user', 'file_name', 'file_size', 'uploaded_at', 'processed_at', 'processing_version',
+        'processing_time'
+    )
     list_filter = ('uploaded_at', 'processed_at')
-    search_fields = ('file_name', 'user__email')
+    search_fields = ('file_name', 'user__email', 'content_hash')
+    readonly_fields = ('processing_time', 'timings_table')
+
+    @admin.display(description='Processing time (s)')
+    def processing_time(self, obj):
+        stage = (obj.timings or {}).get('processing')
+        return f"{stage['wall']:.3f}" if stage else '-'
+
+    @admin.display(description='Timings')
+    def timings_table(self, obj):
+        """Stages with wall-clock/CPU seconds and sample counts"""
+        if not obj.timings:
+            return '-'
+        rows = format_html_join(
+            '',
+            '<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>',
+            (
+                (
+                    name, f"{stage['wall']:.4f}", f"{stage['cpu']:.4f}",
+                    stage['samples'] if stage['samples'] is not None else ''
+                )
+                for name, stage in obj.timings.items()
+            )
+        )
+        return format_html(
+            '<table><tr><th>Stage</th><th>Wall (s)</th><th>CPU (s)</th><th>Samples</th></tr>{}</table>',
+            rows
+        )
+
 
+@admin.register(ProcessingJob)
+class ProcessingJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'signal_data', 'status', 'stage', 'progress', 'created_at', 'finished_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('signal_data__file_name', 'user__email', 'batch_id')
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'file_name', 'file_size', 'received', 'created_at', 'updated_at', 'completed_at')
+    list_filter = ('completed_at', 'created_at')
+    search_fields = ('file_name', 'user__email')
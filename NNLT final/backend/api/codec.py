@@ -0,0 +1,243 @@
+"""
+Binary codec for processed signal data
+
+Layout (all integers little-endian):
+
+    b'HLSD' | uint32 header length | JSON header | padding to 8 bytes | payload
+
+The JSON header holds the format version, sample dtype, number of samples,
+block size, compression and, for every channel, the list of
+``[offset, nbytes]`` blocks inside the payload. Non-array values of the
+processed data dict (e.g. ``rejected_rows``) are kept in ``extra``.
+
+Without compression every channel is a single raw block, decoded zero-copy
+with ``np.frombuffer``. With compression every channel is split into blocks
+of ``block_size`` samples, byte-shuffled and zlib-compressed separately, so
+a sample range or a single channel can be decoded without touching the rest.
+"""
+import json
+import struct
+import zlib
+
+import numpy as np
+
+MAGIC = b'HLSD'
+VERSION = 1
+
+# Samples per compressed block
+DEFAULT_BLOCK_SIZE = 1 << 16
+
+SUPPORTED_DTYPES = ('<f8', '<f4')
+SUPPORTED_COMPRESSION = (None, 'zlib')
+
+_PREFIX = struct.Struct('<4sI')
+
+
+def _shuffle(raw, itemsize):
+    """Group the n-th byte of every value together (compresses much better)"""
+    return np.frombuffer(raw, dtype=np.uint8).reshape(-1, itemsize).T.tobytes()
+
+
+def _unshuffle(raw, itemsize):
+    return np.frombuffer(raw, dtype=np.uint8).reshape(itemsize, -1).T.tobytes()
+
+
+def encode_signal(data, dtype='<f8', compression='zlib', block_size=DEFAULT_BLOCK_SIZE, level=1):
+    """
+    Encode processed signal data into the binary format
+
+    Args:
+        data: dict of equal-length arrays/lists (time, channel1, ...);
+              scalar values are stored in the header
+        dtype: sample dtype ('<f8' or '<f4')
+        compression: None or 'zlib'
+        block_size: samples per compressed block
+        level: zlib compression level
+
+    Returns:
+        bytes
+    """
+    if dtype not in SUPPORTED_DTYPES:
+        raise ValueError(f"Unsupported dtype: {dtype}")
+    if compression not in SUPPORTED_COMPRESSION:
+        raise ValueError(f"Unsupported compression: {compression}")
+
+    arrays = {}
+    extra = {}
+    for key, value in data.items():
+        if isinstance(value, (list, tuple, np.ndarray)):
+            arrays[key] = np.ascontiguousarray(value, dtype=dtype)
+        else:
+            extra[key] = value
+
+    lengths = {len(array) for array in arrays.values()}
+    if len(lengths) > 1:
+        raise ValueError("All channels must have the same length")
+    length = lengths.pop() if lengths else 0
+
+    itemsize = np.dtype(dtype).itemsize
+    if compression is None:
+        block_size = max(length, 1)
+
+    channels = {}
+    segments = []
+    offset = 0
+    for key, array in arrays.items():
+        blocks = []
+        for begin in range(0, length, block_size):
+            raw = array[begin:begin + block_size].tobytes()
+            if compression == 'zlib':
+                raw = zlib.compress(_shuffle(raw, itemsize), level)
+            blocks.append([offset, len(raw)])
+            segments.append(raw)
+            offset += len(raw)
+        channels[key] = blocks
+
+    header = pack_header({
+        "version": VERSION,
+        "dtype": dtype,
+        "length": length,
+        "block_size": block_size,
+        "compression": compression,
+        "channels": channels,
+        "extra": extra,
+    })
+    return b''.join([header] + segments)
+
+
+def pack_header(header, cls=None):
+    """
+    Magic, header length and JSON header, padded so that the payload
+    starts at a multiple of 8 bytes (typed arrays can view it in place)
+
+    Args:
+        header: header dict (see module docstring)
+        cls: JSON encoder class for non-standard values in ``extra``
+
+    Returns:
+        bytes
+    """
+    text = json.dumps(header, cls=cls).encode('utf-8')
+    padding = b' ' * (-(_PREFIX.size + len(text)) % 8)
+    return _PREFIX.pack(MAGIC, len(text) + len(padding)) + text + padding
+
+
+def read_header(blob):
+    """
+    Parse the header of an encoded blob
+
+    Returns:
+        tuple (header dict, payload offset)
+    """
+    blob = memoryview(blob)
+    if len(blob) < _PREFIX.size:
+        raise ValueError("Invalid signal data: truncated header")
+    magic, header_length = _PREFIX.unpack_from(blob)
+    if magic != MAGIC:
+        raise ValueError("Invalid signal data: bad magic")
+    payload_offset = _PREFIX.size + header_length
+    header = json.loads(bytes(blob[_PREFIX.size:payload_offset]))
+    if header.get("version") != VERSION:
+        raise ValueError(f"Unsupported signal data version: {header.get('version')}")
+    return header, payload_offset
+
+
+def decode_channel(blob, name, start=0, stop=None, header=None):
+    """
+    Decode one channel (optionally a sample range) from an encoded blob
+
+    Uncompressed data is returned as a read-only zero-copy view of ``blob``.
+
+    Args:
+        blob: encoded bytes
+        name: channel name ('time', 'channel1', ...)
+        start, stop: sample range (like slicing)
+        header: result of read_header, to avoid parsing it again
+
+    Returns:
+        numpy array
+    """
+    if header is None:
+        header = read_header(blob)
+    header, payload_offset = header
+    dtype = np.dtype(header["dtype"])
+    blocks = header["channels"][name]
+    start, stop, _ = slice(start, stop).indices(header["length"])
+    if stop <= start:
+        return np.empty(0, dtype=dtype)
+
+    blob = memoryview(blob)
+    block_size = header["block_size"]
+    first, last = start // block_size, (stop - 1) // block_size
+
+    if header["compression"] is None:
+        offset, _ = blocks[0]
+        begin = payload_offset + offset + start * dtype.itemsize
+        return np.frombuffer(blob[begin:begin + (stop - start) * dtype.itemsize], dtype=dtype)
+
+    parts = []
+    for offset, nbytes in blocks[first:last + 1]:
+        begin = payload_offset + offset
+        raw = _unshuffle(zlib.decompress(blob[begin:begin + nbytes]), dtype.itemsize)
+        parts.append(np.frombuffer(raw, dtype=dtype))
+    values = parts[0] if len(parts) == 1 else np.concatenate(parts)
+    skip = start - first * block_size
+    return values[skip:skip + stop - start]
+
+
+def search_sorted(blob, name, value, side='left', header=None):
+    """
+    Index where ``value`` would be inserted into a sorted channel (e.g. time)
+
+    Like ``np.searchsorted`` on the decoded channel, but with compressed
+    data only the first sample of O(log n) blocks and a single full block
+    are decompressed.
+
+    Args:
+        blob: encoded bytes
+        name: channel name (values must be non-decreasing)
+        value: value to locate
+        side: 'left' or 'right'
+        header: result of read_header, to avoid parsing it again
+
+    Returns:
+        int sample index in [0, length]
+    """
+    if header is None:
+        header = read_header(blob)
+    length = header[0]["length"]
+    block_size = header[0]["block_size"]
+    if length == 0:
+        return 0
+
+    # Last block whose first sample precedes value
+    low, high = 0, (length - 1) // block_size
+    while low < high:
+        middle = (low + high + 1) // 2
+        first = decode_channel(blob, name, middle * block_size, middle * block_size + 1, header)[0]
+        if first < value or (side == 'right' and first == value):
+            low = middle
+        else:
+            high = middle - 1
+
+    begin = low * block_size
+    values = decode_channel(blob, name, begin, begin + block_size, header)
+    return begin + int(np.searchsorted(values, value, side=side))
+
+
+def decode_signal(blob, channels=None):
+    """
+    Decode an encoded blob back into the processed data dict
+
+    Args:
+        blob: encoded bytes
+        channels: channel names to decode (None = all)
+
+    Returns:
+        dict of numpy arrays plus the extra scalar values
+    """
+    header = read_header(blob)
+    names = header[0]["channels"].keys() if channels is None else channels
+    data = {name: decode_channel(blob, name, header=header) for name in names}
+    data.update(header[0]["extra"])
+    return data
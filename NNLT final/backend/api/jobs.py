@@ -0,0 +1,369 @@
+"""
+Background job queue for Hero Lab API
+
+Jobs are ProcessingJob rows executed by an in-process thread pool, so no
+external broker is needed. State and progress are written to the database
+and polled by clients; cancellation is cooperative (checked between stages).
+
+Every process running jobs refreshes ``heartbeat_at`` of the jobs it holds
+from a monitor thread. A queued or running job whose heartbeat is older
+than PROCESSING_JOB_TIMEOUT belongs to no live process (the server was
+stopped or crashed): queued jobs are requeued, running ones failed.
+"""
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import SignalData, ProcessingJob
+from .processing import (
+    RESULT_FIELDS,
+    ProcessingCancelled,
+    run_processing,
+    prepare_results
+)
+
+INTERRUPTED_ERROR = 'Processing interrupted: the worker process stopped'
+
+_executor = None
+_executor_lock = threading.Lock()
+_monitor = None
+
+# Ids of the jobs submitted to this process's pool and not finished yet
+_live_jobs = set()
+_live_lock = threading.Lock()
+
+
+def get_executor():
+    """Shared worker pool (created on first use, with the job monitor)"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PROCESSING_WORKERS,
+                thread_name_prefix='processing'
+            )
+    start_monitor()
+    return _executor
+
+
+def _hold(job_ids):
+    with _live_lock:
+        _live_jobs.update(job_ids)
+
+
+def _release(job_ids):
+    with _live_lock:
+        _live_jobs.difference_update(job_ids)
+
+
+def _submit(func, job_id):
+    """Submit func(job_id) to the pool, holding the job until it returns"""
+    _hold([job_id])
+
+    def run():
+        try:
+            return func(job_id)
+        finally:
+            _release([job_id])
+    return get_executor().submit(run)
+
+
+def is_live(job_id):
+    """True if the job is queued or running in this process"""
+    with _live_lock:
+        return job_id in _live_jobs
+
+
+def stale_before():
+    """Heartbeats older than this belong to no live process"""
+    return timezone.now() - timedelta(seconds=settings.PROCESSING_JOB_TIMEOUT)
+
+
+def enqueue_job(job):
+    """Submit a queued job to the worker pool once the transaction commits"""
+    transaction.on_commit(lambda: _submit(run_job, job.id))
+
+
+def enqueue_batch(job_ids):
+    """Start the coordinator of a batch of queued jobs once the transaction commits"""
+    def start():
+        threading.Thread(
+            target=run_batch, args=(list(job_ids),), name='processing-batch', daemon=True
+        ).start()
+    transaction.on_commit(start)
+
+
+def _update_job(job_id, **fields):
+    ProcessingJob.objects.filter(id=job_id).update(**fields)
+
+
+def heartbeat():
+    """Refresh heartbeat_at of the jobs held by this process"""
+    with _live_lock:
+        job_ids = list(_live_jobs)
+    if job_ids:
+        ProcessingJob.objects.filter(
+            id__in=job_ids, status__in=ProcessingJob.ACTIVE_STATUSES
+        ).update(heartbeat_at=timezone.now())
+
+
+def expire_jobs(jobs=None):
+    """
+    Fail the queued or running jobs that no live process holds
+
+    Args:
+        jobs: ProcessingJob queryset to look in (None = all jobs)
+
+    Returns:
+        number of jobs failed
+    """
+    jobs = ProcessingJob.objects.all() if jobs is None else jobs
+    return jobs.filter(
+        status__in=ProcessingJob.ACTIVE_STATUSES, heartbeat_at__lt=stale_before()
+    ).update(
+        status=ProcessingJob.STATUS_FAILED,
+        error=INTERRUPTED_ERROR,
+        finished_at=timezone.now()
+    )
+
+
+def recover_jobs():
+    """
+    Take over the jobs left behind by a stopped process
+
+    Orphaned queued jobs never started and are requeued in this process
+    (claimed by refreshing their heartbeat, so only one process gets each);
+    orphaned running jobs may have stopped half-way and are failed.
+
+    Returns:
+        tuple (requeued, failed) counts
+    """
+    stale = stale_before()
+    failed = expire_jobs(ProcessingJob.objects.filter(status=ProcessingJob.STATUS_RUNNING))
+    requeued = 0
+    orphans = ProcessingJob.objects.filter(
+        status=ProcessingJob.STATUS_QUEUED, heartbeat_at__lt=stale
+    ).values_list('id', flat=True)
+    for job_id in list(orphans):
+        claimed = ProcessingJob.objects.filter(
+            id=job_id, status=ProcessingJob.STATUS_QUEUED, heartbeat_at__lt=stale
+        ).update(heartbeat_at=timezone.now())
+        if claimed:
+            _submit(run_job, job_id)
+            requeued += 1
+    return requeued, failed
+
+
+def _monitor_loop():
+    while True:
+        close_old_connections()
+        try:
+            heartbeat()
+            recover_jobs()
+        except Exception:
+            traceback.print_exc()
+        finally:
+            close_old_connections()
+        time.sleep(settings.PROCESSING_HEARTBEAT_INTERVAL)
+
+
+def start_monitor():
+    """Start the heartbeat / recovery thread of this process (once)"""
+    global _monitor
+    with _executor_lock:
+        if _monitor is None:
+            _monitor = threading.Thread(target=_monitor_loop, name='processing-monitor', daemon=True)
+            _monitor.start()
+
+
+def _progress_reporter(job_id):
+    """Progress callback that stores progress and honours cancel requests"""
+    def report(stage, fraction):
+        cancel_requested = ProcessingJob.objects.filter(
+            id=job_id, cancel_requested=True
+        ).exists()
+        if cancel_requested:
+            raise ProcessingCancelled()
+        _update_job(job_id, stage=stage, progress=fraction, heartbeat_at=timezone.now())
+    return report
+
+
+def cancel_job(job):
+    """
+    Request cancellation of a job
+
+    Queued jobs and jobs no live process holds (stale heartbeat) are
+    cancelled immediately; running jobs stop at the next progress report.
+    """
+    now = timezone.now()
+    cancellable = Q(status=ProcessingJob.STATUS_QUEUED)
+    if not is_live(job.id):
+        cancellable |= Q(status=ProcessingJob.STATUS_RUNNING, heartbeat_at__lt=stale_before())
+    ProcessingJob.objects.filter(cancellable, id=job.id).update(
+        status=ProcessingJob.STATUS_CANCELLED, cancel_requested=True, finished_at=now
+    )
+    ProcessingJob.objects.filter(
+        id=job.id, status=ProcessingJob.STATUS_RUNNING
+    ).update(cancel_requested=True)
+    job.refresh_from_db()
+    return job
+
+
+def _start_job(job_id):
+    """
+    Move a job from queued to running
+
+    Returns:
+        the job (with its signal data), or None if it was cancelled or deleted
+    """
+    # queued -> running, unless it was cancelled in the meantime
+    started = ProcessingJob.objects.filter(
+        id=job_id, status=ProcessingJob.STATUS_QUEUED, cancel_requested=False
+    ).update(status=ProcessingJob.STATUS_RUNNING, started_at=timezone.now(), heartbeat_at=timezone.now())
+    if not started:
+        ProcessingJob.objects.filter(
+            id=job_id, status=ProcessingJob.STATUS_QUEUED
+        ).update(status=ProcessingJob.STATUS_CANCELLED, finished_at=timezone.now())
+        return None
+
+    try:
+        return ProcessingJob.objects.select_related('signal_data').get(id=job_id)
+    except ProcessingJob.DoesNotExist:
+        # Deleted together with its signal data
+        return None
+
+
+def _run_stage(job_id, func, *args, **kwargs):
+    """
+    Call func, recording cancellation or failure on the job
+
+    Returns:
+        tuple (ok, result)
+    """
+    try:
+        return True, func(*args, **kwargs)
+    except ProcessingCancelled:
+        _update_job(job_id, status=ProcessingJob.STATUS_CANCELLED, finished_at=timezone.now())
+    except Exception as e:
+        traceback.print_exc()
+        _update_job(
+            job_id,
+            status=ProcessingJob.STATUS_FAILED,
+            error=f'Processing failed: {str(e)}',
+            finished_at=timezone.now()
+        )
+    return False, None
+
+
+def run_job(job_id):
+    """Execute one job (runs in a worker thread)"""
+    close_old_connections()
+    try:
+        job = _start_job(job_id)
+        if job is None:
+            return
+
+        ok, _ = _run_stage(
+            job_id, run_processing, job.signal_data,
+            progress=_progress_reporter(job_id), options=job.metric_options
+        )
+        if ok:
+            _update_job(
+                job_id,
+                status=ProcessingJob.STATUS_SUCCEEDED,
+                stage='done',
+                progress=1.0,
+                finished_at=timezone.now()
+            )
+    finally:
+        close_old_connections()
+
+
+def _compute_batch_item(job_id):
+    """
+    Compute the results of one batch job without saving them (worker thread)
+
+    Returns:
+        the SignalData with results applied, or None if the job did not finish
+    """
+    close_old_connections()
+    try:
+        job = _start_job(job_id)
+        if job is None:
+            return None
+
+        ok, _ = _run_stage(
+            job_id, prepare_results, job.signal_data,
+            progress=_progress_reporter(job_id), options=job.metric_options
+        )
+        return job.signal_data if ok else None
+    finally:
+        close_old_connections()
+
+
+def _write_batch(done):
+    """Save finished batch items in one transaction"""
+    if not done:
+        return
+    from preprocessing.timing import timed
+
+    job_ids = list(done)
+    records = list(done.values())
+    save = {}
+    try:
+        with timed(save, 'save', len(records)), transaction.atomic():
+            SignalData.objects.bulk_update(records, RESULT_FIELDS)
+            ProcessingJob.objects.filter(id__in=job_ids).update(
+                status=ProcessingJob.STATUS_SUCCEEDED,
+                stage='done',
+                progress=1.0,
+                finished_at=timezone.now()
+            )
+    except Exception as e:
+        traceback.print_exc()
+        ProcessingJob.objects.filter(id__in=job_ids).update(
+            status=ProcessingJob.STATUS_FAILED,
+            error=f'Saving results failed: {str(e)}',
+            finished_at=timezone.now()
+        )
+    else:
+        # Timing of the whole transaction (samples = records written)
+        for signal_data in records:
+            signal_data.timings['save'] = save['save']
+        SignalData.objects.bulk_update(records, ['timings'])
+    done.clear()
+
+
+def run_batch(job_ids):
+    """
+    Execute a batch of jobs (runs in its own coordinator thread)
+
+    Items are computed on the shared worker pool, so concurrency stays bounded
+    by PROCESSING_WORKERS across all batches and single jobs. Results are
+    written in transactions of PROCESSING_BATCH_WRITE_SIZE records. The jobs
+    are held (heartbeat) until their results are written.
+    """
+    close_old_connections()
+    _hold(job_ids)
+    try:
+        executor = get_executor()
+        futures = {executor.submit(_compute_batch_item, job_id): job_id for job_id in job_ids}
+
+        done = {}
+        for future in as_completed(futures):
+            signal_data = future.result()
+            if signal_data is None:
+                continue
+            done[futures[future]] = signal_data
+            if len(done) >= settings.PROCESSING_BATCH_WRITE_SIZE:
+                _write_batch(done)
+        _write_batch(done)
+    finally:
+        _release(job_ids)
+        close_old_connections()
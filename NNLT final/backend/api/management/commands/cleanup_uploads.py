@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from api.uploads import expire_sessions, sweep_partial_files
+
+
+class Command(BaseCommand):
+    help = 'Delete expired upload sessions and chunks left without a session (run periodically)'
+
+    def handle(self, *args, **options):
+        sessions = expire_sessions()
+        files = sweep_partial_files()
+        self.stdout.write(f'Deleted {sessions} expired upload sessions and {files} orphaned chunk files')
@@ -0,0 +1,120 @@
+# Generated manually
+
+import json
+import struct
+import zlib
+
+import numpy as np
+from django.db import migrations, models
+
+# Frozen copy of version 1 of api.codec (float64, zlib, byte-shuffled
+# blocks), so that later changes to the codec or to the PROCESSED_DATA_*
+# settings do not change what this migration writes or reads.
+MAGIC = b'HLSD'
+VERSION = 1
+DTYPE = '<f8'
+BLOCK_SIZE = 1 << 16
+PREFIX = struct.Struct('<4sI')
+
+
+def encode_signal(data):
+    """Encode a processed_data dict in the version 1 layout"""
+    itemsize = np.dtype(DTYPE).itemsize
+    arrays = {key: np.ascontiguousarray(value, dtype=DTYPE)
+              for key, value in data.items() if isinstance(value, (list, tuple))}
+    extra = {key: value for key, value in data.items() if key not in arrays}
+    lengths = {len(array) for array in arrays.values()}
+    if len(lengths) > 1:
+        raise ValueError('All channels must have the same length')
+    length = lengths.pop() if lengths else 0
+
+    channels = {}
+    segments = []
+    offset = 0
+    for key, array in arrays.items():
+        blocks = []
+        for begin in range(0, length, BLOCK_SIZE):
+            raw = array[begin:begin + BLOCK_SIZE].tobytes()
+            shuffled = np.frombuffer(raw, dtype=np.uint8).reshape(-1, itemsize).T.tobytes()
+            raw = zlib.compress(shuffled, 1)
+            blocks.append([offset, len(raw)])
+            segments.append(raw)
+            offset += len(raw)
+        channels[key] = blocks
+
+    text = json.dumps({
+        'version': VERSION,
+        'dtype': DTYPE,
+        'length': length,
+        'block_size': BLOCK_SIZE,
+        'compression': 'zlib',
+        'channels': channels,
+        'extra': extra,
+    }).encode('utf-8')
+    padding = b' ' * (-(PREFIX.size + len(text)) % 8)
+    return b''.join([PREFIX.pack(MAGIC, len(text) + len(padding)), text, padding] + segments)
+
+
+def decode_signal(blob):
+    """Decode a version 1 blob (any dtype, with or without compression) into lists"""
+    blob = bytes(blob)
+    magic, header_length = PREFIX.unpack_from(blob)
+    if magic != MAGIC:
+        raise ValueError('Invalid signal data: bad magic')
+    payload_offset = PREFIX.size + header_length
+    header = json.loads(blob[PREFIX.size:payload_offset])
+    if header.get('version') != VERSION:
+        raise ValueError(f"Unsupported signal data version: {header.get('version')}")
+
+    dtype = np.dtype(header['dtype'])
+    data = {}
+    for key, blocks in header['channels'].items():
+        parts = []
+        for offset, nbytes in blocks:
+            raw = blob[payload_offset + offset:payload_offset + offset + nbytes]
+            if header['compression'] == 'zlib':
+                raw = zlib.decompress(raw)
+                raw = np.frombuffer(raw, dtype=np.uint8).reshape(dtype.itemsize, -1).T.tobytes()
+            parts.append(np.frombuffer(raw, dtype=dtype))
+        values = np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+        data[key] = values[:header['length']].tolist()
+    data.update(header['extra'])
+    return data
+
+
+def encode_processed_data(apps, schema_editor):
+    """Convert JSON processed_data into the binary processed_blob"""
+    SignalData = apps.get_model('api', 'SignalData')
+    rows = SignalData.objects.filter(processed_data__isnull=False).only('id', 'processed_data')
+    for row in rows.iterator(chunk_size=10):
+        row.processed_blob = encode_signal(row.processed_data)
+        row.save(update_fields=['processed_blob'])
+
+
+def decode_processed_data(apps, schema_editor):
+    """Convert processed_blob back into JSON processed_data"""
+    SignalData = apps.get_model('api', 'SignalData')
+    rows = SignalData.objects.filter(processed_blob__isnull=False).only('id', 'processed_blob')
+    for row in rows.iterator(chunk_size=10):
+        row.processed_data = decode_signal(row.processed_blob)
+        row.save(update_fields=['processed_data'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_auto_20251215_1538'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='signaldata',
+            name='processed_blob',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.RunPython(encode_processed_data, decode_processed_data),
+        migrations.RemoveField(
+            model_name='signaldata',
+            name='processed_data',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_processingjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processingjob',
+            name='batch_id',
+            field=models.UUIDField(blank=True, db_index=True, help_text='Batch the job was queued in', null=True),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:49
+
+from django.db import migrations, models
+
+from api.uploadhandlers import hash_file
+
+
+def hash_existing_files(apps, schema_editor):
+    """Fill content_hash of records uploaded before deduplication"""
+    SignalData = apps.get_model('api', 'SignalData')
+    rows = SignalData.objects.filter(content_hash='').only('id', 'original_file')
+    for row in rows.iterator(chunk_size=100):
+        try:
+            with row.original_file.open('rb') as f:
+                row.content_hash = hash_file(f)
+        except (OSError, ValueError):
+            # File missing from storage: never matches a new upload
+            continue
+        row.save(update_fields=['content_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_processingjob_batch_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='signaldata',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, help_text='SHA-256 of the file', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='signaldata',
+            name='processing_version',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(hash_existing_files, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_signaldata_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processingjob',
+            name='h',
+            field=models.FloatField(blank=True, help_text='h (meters) for per-beat MBP', null=True),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:58
+
+import json
+
+from django.db import migrations, models
+
+
+def seed_metrics_cache(apps, schema_editor):
+    """Existing metrics were computed with the default parameters"""
+    SignalData = apps.get_model('api', 'SignalData')
+    key = json.dumps({'h': None, 'spectral_method': 'fft'}, sort_keys=True)
+    rows = SignalData.objects.filter(metrics__isnull=False).only('id', 'metrics')
+    for row in rows.iterator(chunk_size=100):
+        row.metrics_cache = {key: row.metrics}
+        row.save(update_fields=['metrics_cache'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_processingjob_h'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processingjob',
+            name='channels',
+            field=models.JSONField(blank=True, help_text='Channels to compute metrics for (null = all)', null=True),
+        ),
+        migrations.AddField(
+            model_name='processingjob',
+            name='metric_names',
+            field=models.JSONField(blank=True, help_text='Metrics to compute (null = all)', null=True),
+        ),
+        migrations.AddField(
+            model_name='processingjob',
+            name='spectral_method',
+            field=models.CharField(default='fft', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='signaldata',
+            name='metrics_cache',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.RunPython(seed_metrics_cache, migrations.RunPython.noop),
+    ]
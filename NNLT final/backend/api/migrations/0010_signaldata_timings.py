@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_metric_selection'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='signaldata',
+            name='timings',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
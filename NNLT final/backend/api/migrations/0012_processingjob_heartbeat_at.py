@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:42
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processingjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Last time a worker process reported holding the job'),
+        ),
+    ]
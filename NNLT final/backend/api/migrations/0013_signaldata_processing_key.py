@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_processingjob_heartbeat_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='signaldata',
+            name='processing_key',
+            field=models.CharField(blank=True, db_index=True, help_text='Pipeline version and settings of the results (api.processing.processing_key)', max_length=64),
+        ),
+    ]
@@ -1,10 +1,14 @@
 """
 Models for Hero Lab API
 """
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
 import uuid
 
+from .codec import encode_signal, decode_signal
+
 
 class User(AbstractUser):
     """Custom User model"""
@@ -22,17 +26,130 @@ class SignalData(models.Model):
     original_file = models.FileField(upload_to='uploads/')
     file_name = models.CharField(max_length=255)
     file_size = models.BigIntegerField()
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True, help_text="SHA-256 of the file")
     uploaded_at = models.DateTimeField(auto_now_add=True)
     processed_at = models.DateTimeField(null=True, blank=True)
     
-    # Processed data (JSON)
-    processed_data = models.JSONField(null=True, blank=True)
+    # Processed data (binary, see api.codec); use the processed_data property
+    processed_blob = models.BinaryField(null=True, blank=True)
     
-    # Metrics (JSON)
+    # Metrics (JSON) computed when the record was processed
     metrics = models.JSONField(null=True, blank=True)
     
+    # Memoized metrics per parameter set (see api.processing.get_metrics)
+    metrics_cache = models.JSONField(default=dict, blank=True)
+    
+    # Pipeline version the results were computed with (api.processing.PROCESSING_VERSION)
+    processing_version = models.PositiveIntegerField(null=True, blank=True)
+    processing_key = models.CharField(
+        max_length=64, blank=True, db_index=True,
+        help_text="Pipeline version and settings of the results (api.processing.processing_key)"
+    )
+    
+    # Wall-clock/CPU seconds and sample counts per processing stage of the
+    # last run (see api.processing.run_processing)
+    timings = models.JSONField(default=dict, blank=True)
+    
     class Meta:
         ordering = ['-uploaded_at']
+    
+    @property
+    def has_processed_data(self):
+        return self.processed_blob is not None
+    
+    @property
+    def processed_data(self):
+        """Processed channels, decoded from processed_blob on first access"""
+        if self.processed_blob is None:
+            return None
+        if getattr(self, '_processed_data', None) is None:
+            self._processed_data = decode_signal(self.processed_blob)
+        return self._processed_data
+    
+    @processed_data.setter
+    def processed_data(self, value):
+        self._processed_data = None
+        if value is None:
+            self.processed_blob = None
+        else:
+            self.processed_blob = encode_signal(
+                value,
+                dtype=settings.PROCESSED_DATA_DTYPE,
+                compression=settings.PROCESSED_DATA_COMPRESSION
+            )
+
+
+class UploadSession(models.Model):
+    """Chunked, resumable upload of a signal file (see api.uploads)"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    file_name = models.CharField(max_length=255)
+    file_size = models.BigIntegerField(help_text="Declared size of the complete file")
+    received = models.BigIntegerField(default=0, help_text="Bytes stored so far (offset of the next chunk)")
+    parts = models.JSONField(default=list, blank=True, help_text="Storage names of the stored chunks, in order")
+    signal_data = models.ForeignKey(
+        SignalData, null=True, blank=True, on_delete=models.SET_NULL, related_name='upload_sessions'
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+
+
+class ProcessingJob(models.Model):
+    """Background processing job of a SignalData record"""
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+        (STATUS_CANCELLED, 'Cancelled'),
+    ]
+    ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='processing_jobs')
+    signal_data = models.ForeignKey(SignalData, on_delete=models.CASCADE, related_name='jobs')
+    batch_id = models.UUIDField(null=True, blank=True, db_index=True, help_text="Batch the job was queued in")
+    h = models.FloatField(null=True, blank=True, help_text="h (meters) for per-beat MBP")
+    metric_names = models.JSONField(null=True, blank=True, help_text="Metrics to compute (null = all)")
+    channels = models.JSONField(null=True, blank=True, help_text="Channels to compute metrics for (null = all)")
+    spectral_method = models.CharField(max_length=10, default='fft')
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED, db_index=True)
+    stage = models.CharField(max_length=50, blank=True)
+    progress = models.FloatField(default=0.0, help_text="Progress (0-1)")
+    error = models.TextField(blank=True)
+    cancel_requested = models.BooleanField(default=False)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="Last time a worker process reported holding the job"
+    )
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    @property
+    def metric_options(self):
+        """Keyword arguments for calculate_all_metrics / get_metrics"""
+        return {
+            'metrics': self.metric_names,
+            'channels': self.channels,
+            'spectral_method': self.spectral_method,
+            'h': self.h,
+        }
 
 
 class CalculationData(models.Model):
@@ -0,0 +1,413 @@
+"""
+Signal processing pipeline for Hero Lab API
+
+Runs preprocessing, the display pyramid and metrics for a SignalData record.
+Used by the background job workers (see api.jobs).
+"""
+import hashlib
+import json
+import sys
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+# Add Python modules to path
+PYTHON_MODULES_PATH = Path(__file__).resolve().parent.parent.parent.parent / 'python'
+if str(PYTHON_MODULES_PATH) not in sys.path:
+    sys.path.insert(0, str(PYTHON_MODULES_PATH))
+
+SIGNAL_CHANNELS = ('channel1', 'channel2', 'channel3')
+
+# Bump when the preprocessing or metrics code changes, so results of
+# identical files computed by an older pipeline are no longer reused
+# (2: beat detection searchback, pulse transit foot detection and rejection)
+PROCESSING_VERSION = 2
+
+_metrics_executor = None
+_metrics_executor_lock = threading.Lock()
+
+# Serializes metrics_cache merges of this process (SQLite has no row locks)
+_metrics_cache_lock = threading.Lock()
+
+
+class ProcessingCancelled(Exception):
+    """Raised from a progress callback to stop processing"""
+
+
+# Lazy import - will be imported when needed
+def get_preprocessing_modules():
+    """Lazy import of preprocessing modules"""
+    from preprocessing.processor import process_signal_file
+    from calculator.metrics import calculate_all_metrics
+    return process_signal_file, calculate_all_metrics
+
+
+def get_metrics_executor():
+    """
+    Shared process pool for per-channel metrics (None = serial)
+    
+    Uses the spawn start method: forking a multi-threaded server process
+    is unsafe.
+    """
+    global _metrics_executor
+    if settings.METRICS_WORKERS <= 1:
+        return None
+    with _metrics_executor_lock:
+        if _metrics_executor is None:
+            _metrics_executor = ProcessPoolExecutor(
+                max_workers=settings.METRICS_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _metrics_executor
+
+
+def get_cache_dir(signal_data):
+    """Columnar cache directory of a signal data record"""
+    return str(Path(settings.SIGNAL_CACHE_ROOT) / str(signal_data.id))
+
+
+def get_pyramid_dir(signal_data):
+    """Downsampling pyramid directory of a signal data record"""
+    return str(Path(settings.SIGNAL_PYRAMID_ROOT) / str(signal_data.id))
+
+
+def build_signal_pyramid(signal_data, processed_data):
+    """Build and save the min/max pyramid of all channels"""
+    from preprocessing.downsample import build_minmax_pyramid, save_pyramid
+
+    levels = build_minmax_pyramid(
+        processed_data['time'],
+        {channel: processed_data[channel] for channel in SIGNAL_CHANNELS}
+    )
+    save_pyramid(levels, get_pyramid_dir(signal_data), len(processed_data['time']))
+
+
+def _add_timings(timings, prefix, stages):
+    """Add the sub-stage timings of a stage as '<prefix>.<sub-stage>'"""
+    if timings is not None:
+        timings.update({f'{prefix}.{name}': value for name, value in stages.items()})
+
+
+def compute_results(signal_data, progress=None, options=None, timings=None):
+    """
+    Run the pipeline for a record without saving it
+
+    Args:
+        signal_data: SignalData instance
+        progress: optional callable (stage, fraction); may raise
+                  ProcessingCancelled to stop between stages
+        options: metric options (metrics, channels, spectral_method, h),
+                 see calculator.metrics.calculate_all_metrics
+        timings: optional dict receiving the timings of preprocessing,
+                 pyramid and metrics and of their sub-stages
+
+    Returns:
+        tuple (processed_data, metrics)
+    """
+    from preprocessing.timing import timed
+
+    def report(stage, fraction):
+        if progress is not None:
+            progress(stage, fraction)
+
+    process_signal_file, calculate_all_metrics = get_preprocessing_modules()
+
+    # Preprocess (parsed columns are cached, later runs skip text parsing)
+    report('preprocessing', 0.0)
+    stages = {}
+    with timed(timings, 'preprocessing') as record:
+        processed_data = process_signal_file(
+            signal_data.original_file.path,
+            cache_dir=get_cache_dir(signal_data),
+            baseline=settings.SIGNAL_BASELINE,
+            filters=settings.SIGNAL_FILTERS,
+            timings=stages
+        )
+        record['samples'] = n_samples = len(processed_data['time'])
+    _add_timings(timings, 'preprocessing', stages)
+
+    # Downsampling pyramid for display
+    report('pyramid', 0.4)
+    with timed(timings, 'pyramid', n_samples):
+        build_signal_pyramid(signal_data, processed_data)
+
+    # Calculate metrics
+    report('metrics', 0.5)
+    stages = {}
+    with timed(timings, 'metrics', n_samples):
+        metrics = calculate_all_metrics(
+            processed_data, executor=get_metrics_executor(), timings=stages, **(options or {})
+        )
+    _add_timings(timings, 'metrics', stages)
+
+    return processed_data, metrics
+
+
+# Fields written when results are saved
+RESULT_FIELDS = [
+    'processed_blob', 'metrics', 'metrics_cache', 'processed_at', 'processing_version', 'processing_key',
+    'timings'
+]
+
+
+def processing_key():
+    """
+    Deduplication key of the current pipeline
+
+    SHA-256 of PROCESSING_VERSION and the settings that change stored
+    results, so changing SIGNAL_BASELINE, SIGNAL_FILTERS or
+    PROCESSED_DATA_DTYPE stops the reuse of results computed before.
+    """
+    config = {
+        'version': PROCESSING_VERSION,
+        'baseline': settings.SIGNAL_BASELINE,
+        'filters': settings.SIGNAL_FILTERS,
+        'dtype': settings.PROCESSED_DATA_DTYPE,
+    }
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()
+
+
+def metrics_key(spectral_method='fft', h=None):
+    """Memoization key of the metric parameters that change metric values"""
+    return json.dumps({'h': h, 'spectral_method': spectral_method}, sort_keys=True)
+
+
+def apply_results(signal_data, processed_data, metrics, options=None, timings=None):
+    """Set processing results on a record (caller saves it)"""
+    from preprocessing.timing import timed
+
+    options = options or {}
+    # Encodes the binary blob (see api.codec)
+    with timed(timings, 'encode', len(processed_data['time'])):
+        signal_data.processed_data = processed_data
+    signal_data.metrics = metrics
+    signal_data.metrics_cache = {
+        metrics_key(options.get('spectral_method', 'fft'), options.get('h')): metrics
+    }
+    signal_data.processed_at = timezone.now()
+    signal_data.processing_version = PROCESSING_VERSION
+    signal_data.processing_key = processing_key()
+
+
+def _merge_metrics(entry, computed):
+    """Memoized metrics of one parameter set with newly computed ones added"""
+    from calculator.metrics import CHANNELS
+
+    entry = dict(entry)
+    for name, value in computed.items():
+        if name in CHANNELS:
+            entry[name] = {**entry.get(name, {}), **value}
+        else:
+            entry[name] = value
+    return entry
+
+
+def save_metrics(signal_data, key, computed):
+    """
+    Merge computed metrics into the stored metrics_cache
+
+    The cache is read again and written in one transaction with the row
+    locked, so metrics memoized concurrently by other requests or workers
+    are kept. Nothing is written if the record was reprocessed meanwhile
+    (its cache was replaced by results of the new processing).
+
+    Returns:
+        the merged cache, or None if the record changed
+    """
+    model = type(signal_data)
+    with _metrics_cache_lock, transaction.atomic():
+        current = model.objects.select_for_update().filter(
+            pk=signal_data.pk, processed_at=signal_data.processed_at
+        ).values_list('metrics_cache', flat=True).first()
+        if current is None:
+            return None
+        cache = dict(current)
+        cache[key] = _merge_metrics(cache.get(key, {}), computed)
+        model.objects.filter(pk=signal_data.pk).update(metrics_cache=cache)
+    return cache
+
+
+def get_metrics(signal_data, metrics=None, channels=None, spectral_method='fft', h=None, save=True):
+    """
+    Requested metrics of a processed record, memoized per parameter set
+
+    Metrics missing from signal_data.metrics_cache are computed on first
+    access from the stored processed data (decoding only the channels they
+    need) and added to the cache; unrequested metrics are never computed.
+
+    Args:
+        signal_data: processed SignalData instance
+        metrics, channels, spectral_method, h: see calculate_all_metrics
+        save: merge the new metrics into the stored cache (save_metrics)
+
+    Returns:
+        dict of the requested metrics
+    """
+    from calculator.metrics import CHANNELS, CHANNEL_METRICS, RECORD_METRICS, calculate_all_metrics
+    from .codec import decode_signal
+
+    names = CHANNEL_METRICS + RECORD_METRICS if metrics is None else [
+        name for name in CHANNEL_METRICS + RECORD_METRICS if name in metrics
+    ]
+    channel_names = CHANNELS if channels is None else [name for name in CHANNELS if name in channels]
+    channel_metrics = [name for name in names if name in CHANNEL_METRICS]
+    record_metrics = [name for name in names if name in RECORD_METRICS]
+
+    key = metrics_key(spectral_method, h)
+    cache = dict(signal_data.metrics_cache or {})
+    entry = cache.get(key, {})
+
+    # What is not memoized yet
+    missing_channels = [
+        name for name in channel_names
+        if any(metric not in entry.get(name, {}) for metric in channel_metrics)
+    ]
+    missing_metrics = [name for name in record_metrics if name not in entry]
+    if missing_channels:
+        missing_metrics += [
+            metric for metric in channel_metrics
+            if any(metric not in entry.get(name, {}) for name in missing_channels)
+        ]
+
+    if missing_metrics:
+        # Decode only the channels the missing metrics read
+        needed = set(missing_channels)
+        if 'overall' in missing_metrics:
+            needed.update(CHANNELS)
+        if 'pulse_transit' in missing_metrics:
+            needed.update(('channel2', 'channel3'))
+        data = decode_signal(signal_data.processed_blob, channels=['time'] + sorted(needed))
+
+        computed = calculate_all_metrics(
+            data,
+            executor=get_metrics_executor(),
+            spectral_method=spectral_method,
+            h=h,
+            metrics=missing_metrics,
+            channels=missing_channels
+        )
+        entry = _merge_metrics(entry, computed)
+        cache[key] = entry
+        if save:
+            cache = save_metrics(signal_data, key, computed) or cache
+        signal_data.metrics_cache = cache
+
+    result = {}
+    if channel_metrics:
+        for name in channel_names:
+            result[name] = {metric: entry[name][metric] for metric in channel_metrics}
+    for name in record_metrics:
+        result[name] = entry[name]
+    return result
+
+
+def find_duplicate(signal_data, processed=False):
+    """
+    Oldest other record with the same file content
+
+    Args:
+        signal_data: SignalData instance
+        processed: only records processed by the current pipeline
+                   (same processing_key)
+
+    Returns:
+        SignalData or None
+    """
+    from .models import SignalData
+
+    if not signal_data.content_hash:
+        return None
+    duplicates = SignalData.objects.filter(
+        content_hash=signal_data.content_hash
+    ).exclude(id=signal_data.id)
+    if processed:
+        duplicates = duplicates.filter(
+            processing_key=processing_key(), processed_blob__isnull=False
+        )
+    return duplicates.order_by('uploaded_at').first()
+
+
+def reuse_results(signal_data, options=None):
+    """
+    Copy the results of an identical file processed by the current pipeline
+    (caller saves it)
+
+    Args:
+        signal_data: SignalData instance
+        options: metric options; metrics missing from the duplicate's cache
+                 are computed from its processed data (None = keep the
+                 duplicate's metrics as they are)
+
+    Returns:
+        True if results were reused
+    """
+    duplicate = find_duplicate(signal_data, processed=True)
+    if duplicate is None:
+        return False
+    signal_data.processed_blob = duplicate.processed_blob
+    signal_data._processed_data = None
+    signal_data.metrics = duplicate.metrics
+    signal_data.metrics_cache = duplicate.metrics_cache
+    signal_data.processed_at = timezone.now()
+    signal_data.processing_version = duplicate.processing_version
+    signal_data.processing_key = duplicate.processing_key
+    if options is not None:
+        signal_data.metrics = get_metrics(signal_data, save=False, **options)
+    return True
+
+
+def prepare_results(signal_data, progress=None, options=None):
+    """
+    Compute the results of a record, or reuse those of a duplicate, and set
+    them on it together with signal_data.timings (caller saves it)
+
+    Only a record without results reuses a duplicate's: reprocessing a
+    processed record always recomputes them.
+
+    timings maps each stage to {'wall', 'cpu', 'samples'} (seconds, CPU of
+    the worker thread): 'deduplication', 'preprocessing' (and
+    'preprocessing.read', ...), 'pyramid', 'metrics' (and
+    'metrics.channel1.peaks', ...), 'encode' and 'processing' (all of it).
+    """
+    from preprocessing.timing import timed
+
+    options = options or {}
+    timings = {}
+    with timed(timings, 'processing'):
+        reused = False
+        if signal_data.processed_blob is None:
+            with timed(timings, 'deduplication'):
+                reused = reuse_results(signal_data, options)
+        if not reused:
+            processed_data, metrics = compute_results(signal_data, progress, options, timings)
+
+            if progress is not None:
+                progress('saving', 0.9)
+            apply_results(signal_data, processed_data, metrics, options, timings)
+    signal_data.timings = timings
+
+
+def save_timing(signal_data, save):
+    """
+    Add the timing of the save to the stored timings
+
+    The save cannot time itself, so its timing is written with a second,
+    single-column update.
+    """
+    signal_data.timings['save'] = save
+    type(signal_data).objects.filter(pk=signal_data.pk).update(timings=signal_data.timings)
+
+
+def run_processing(signal_data, progress=None, options=None):
+    """Run the pipeline for a record (or reuse a duplicate's results) and save"""
+    from preprocessing.timing import timed
+
+    prepare_results(signal_data, progress, options)
+    save = {}
+    with timed(save, 'save'):
+        signal_data.save(update_fields=RESULT_FIELDS)
+    save_timing(signal_data, save['save'])
@@ -0,0 +1,27 @@
+"""
+Renderers for Hero Lab API
+
+Signal endpoints answer ``Accept: application/vnd.herolab.signal`` with the
+uncompressed codec layout (see api.codec): a JSON header padded to 8 bytes
+followed by little-endian arrays, which clients map to typed arrays without
+copying. Only the views build that payload; anything else rendered through
+this renderer (errors) is sent as JSON.
+"""
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+SIGNAL_MEDIA_TYPE = 'application/vnd.herolab.signal'
+
+
+class SignalRenderer(BaseRenderer):
+    media_type = SIGNAL_MEDIA_TYPE
+    format = 'signal'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, bytes):
+            return data
+        response = (renderer_context or {}).get('response')
+        if response is not None:
+            response['Content-Type'] = 'application/json'
+        return JSONRenderer().render(data, renderer_context=renderer_context)
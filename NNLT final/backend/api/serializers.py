@@ -2,8 +2,9 @@
 Serializers for Hero Lab API
 """
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from .models import SignalData, CalculationData
+from .models import SignalData, CalculationData, ProcessingJob, UploadSession
 
 User = get_user_model()
 
@@ -50,12 +51,85 @@ class SignalDataSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'user', 'uploaded_at', 'processed_at')
 
 
+class SignalDataSummarySerializer(serializers.ModelSerializer):
+    """Metadata of a record for list views (no signal payload or metrics)"""
+    user = UserSerializer(read_only=True)
+    is_processed = serializers.SerializerMethodField()
+
+    # Columns loaded for a summary (use with select_related('user'))
+    ONLY_FIELDS = (
+        'id', 'file_name', 'file_size', 'uploaded_at', 'processed_at', 'processing_version',
+        'user__id', 'user__email', 'user__username', 'user__date_joined'
+    )
+
+    class Meta:
+        model = SignalData
+        fields = (
+            'id', 'user', 'file_name', 'file_size',
+            'uploaded_at', 'processed_at', 'processing_version', 'is_processed'
+        )
+        read_only_fields = fields
+
+    def get_is_processed(self, obj):
+        # processed_at is set whenever results are stored or reused
+        return obj.processed_at is not None
+
+
 class SignalDataUploadSerializer(serializers.Serializer):
     file = serializers.FileField()
 
 
+class UploadSessionCreateSerializer(serializers.Serializer):
+    file_name = serializers.CharField(max_length=255)
+    file_size = serializers.IntegerField(min_value=1)
+
+    def validate_file_name(self, value):
+        if not value.endswith('.txt'):
+            raise serializers.ValidationError('Only .txt files are allowed')
+        return value
+
+
+class UploadFinalizeSerializer(serializers.Serializer):
+    sha256 = serializers.RegexField(
+        r'^[0-9a-fA-F]{64}$', required=False,
+        help_text="SHA-256 hex digest of the whole file (optional when chunks carry X-Chunk-SHA256)"
+    )
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    max_chunk_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = (
+            'id', 'file_name', 'file_size', 'received', 'max_chunk_size',
+            'signal_data', 'created_at', 'updated_at', 'completed_at'
+        )
+        read_only_fields = fields
+
+    def get_max_chunk_size(self, obj):
+        return settings.UPLOAD_CHUNK_MAX_SIZE
+
+
+class ProcessingJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProcessingJob
+        fields = (
+            'id', 'signal_data', 'batch_id', 'h', 'metric_names', 'channels', 'spectral_method',
+            'status', 'stage', 'progress', 'error',
+            'cancel_requested', 'created_at', 'started_at', 'finished_at'
+        )
+        read_only_fields = fields
+
+
 class CalculationDataSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
+
+    # Columns loaded for a list (use with select_related('user'))
+    ONLY_FIELDS = (
+        'id', 'hr', 'ptt', 'mbp', 'created_at', 'file_name',
+        'user__id', 'user__email', 'user__username', 'user__date_joined'
+    )
     
     class Meta:
         model = CalculationData
@@ -0,0 +1,258 @@
+"""
+End-to-end API flows: upload, process, batch processing, result, list,
+deduplication, delete and manual calculations
+"""
+import json
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+import numpy as np
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api import jobs
+from api.codec import decode_signal
+from api.models import User, SignalData, ProcessingJob, CalculationData
+from api.renderers import SIGNAL_MEDIA_TYPE
+
+
+def recording(n=5000):
+    """Device-format TXT: 6 metadata columns, then PCG, PPG and ECG ADC values"""
+    t = np.arange(n) / 1000.0
+    ecg = 80000 * np.exp(-0.5 * ((t % 0.8) / 0.01) ** 2)
+    ppg = -6000 + 2000 * np.sin(2 * np.pi * 1.25 * t)
+    pcg = -200000 + 1000 * np.sin(2 * np.pi * 50 * t)
+    lines = [
+        f'24\t17\t5\t1\t{952 + i % 1000}\t{i % 1000}.0\t{a:.1f}\t{b:.1f}\t{c:.1f}\n'
+        for i, (a, b, c) in enumerate(zip(pcg, ppg, ecg))
+    ]
+    return ''.join(lines).encode()
+
+
+def body(response):
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+class InlineExecutor:
+    """Runs jobs in the calling thread instead of the worker pool"""
+
+    def submit(self, func, *args):
+        func(*args)
+
+
+class SignalFlowTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media, SIGNAL_CACHE_ROOT=f'{self.media}/cache',
+            SIGNAL_PYRAMID_ROOT=f'{self.media}/pyramids', METRICS_WORKERS=1
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        executor = mock.patch.object(jobs, 'get_executor', return_value=InlineExecutor())
+        executor.start()
+        self.addCleanup(executor.stop)
+
+        self.user = User.objects.create_user(username='u', email='u@example.com', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.content = recording()
+
+    def upload(self, name='a.txt', content=None):
+        response = self.client.post(
+            reverse('upload_file'),
+            {'file': SimpleUploadedFile(name, self.content if content is None else content)},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, 201)
+        # Metadata only, even when a duplicate reuses processed results
+        self.assertNotIn('processed_data', response.data)
+        self.assertNotIn('metrics', response.data)
+        return response.data['id']
+
+    def process(self, data_id):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('process_data', args=[data_id]), {}, format='json')
+        self.assertEqual(response.status_code, 202)
+        job = self.client.get(reverse('get_job', args=[response.data['id']])).data
+        self.assertEqual(job['status'], ProcessingJob.STATUS_SUCCEEDED, job['error'])
+        return job
+
+    def test_upload_process_and_read_results(self):
+        data_id = self.upload()
+        response = self.client.get(reverse('get_result', args=[data_id]))
+        self.assertEqual(response.status_code, 400)
+
+        job = self.process(data_id)
+        self.assertEqual((job['stage'], job['progress']), ('done', 1.0))
+
+        response = self.client.get(reverse('get_result', args=[data_id]))
+        self.assertEqual(response.status_code, 200)
+        result = json.loads(body(response))
+        self.assertEqual(result['range'], {'start': 0, 'stop': 5000, 'length': 5000})
+        self.assertEqual(len(result['processed_data']['channel3']), 5000)
+        self.assertEqual(result['processed_data']['rejected_rows'], 0)
+        np.testing.assert_allclose(result['processed_data']['time'][:3], [0.0, 0.001, 0.002])
+        self.assertEqual(
+            sorted(result['metrics']), ['channel1', 'channel2', 'channel3', 'overall', 'pulse_transit']
+        )
+        self.assertIn('preprocessing.read', result['timings'])
+
+        # Metrics only (the dashboard's request) and binary
+        result = json.loads(body(self.client.get(reverse('get_result', args=[data_id]), {'start': 0, 'stop': 0})))
+        self.assertEqual(len(result['processed_data']['time']), 0)
+        self.assertIn('metrics', result)
+        response = self.client.get(reverse('get_result', args=[data_id]), {'t0': 1, 't1': 2}, HTTP_ACCEPT=SIGNAL_MEDIA_TYPE)
+        decoded = decode_signal(body(response))
+        self.assertAlmostEqual(decoded['time'][0], 1.0)
+        self.assertAlmostEqual(decoded['time'][-1], 2.0)
+
+        response = self.client.get(reverse('get_window', args=[data_id]), {'channel': 'channel3', 'width': 100})
+        self.assertEqual(response.status_code, 200)
+        self.assertAlmostEqual(max(response.data['values']), 80000 * 2.5 / 2**23)
+
+        listed = self.client.get(reverse('list_data')).data
+        self.assertEqual(listed['count'], 1)
+        self.assertTrue(listed['results'][0]['is_processed'])
+        self.assertNotIn('processed_data', listed['results'][0])
+
+    def test_failed_processing(self):
+        data_id = self.upload(content=b'garbage\n')
+        with mock.patch('traceback.print_exc'), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('process_data', args=[data_id]), {}, format='json')
+        job = self.client.get(reverse('get_job', args=[response.data['id']])).data
+        self.assertEqual(job['status'], ProcessingJob.STATUS_FAILED)
+        self.assertEqual(self.client.get(reverse('get_result', args=[data_id])).status_code, 400)
+
+    def test_selected_metrics(self):
+        data_id = self.upload()
+        self.process(data_id)
+        url = reverse('get_result', args=[data_id])
+        # Reading a range or channels of the data never computes metrics
+        with mock.patch('api.views.get_metrics') as get_metrics:
+            result = json.loads(body(self.client.get(url, {'channels': 'channel2', 't0': 1, 't1': 2})))
+        get_metrics.assert_not_called()
+        self.assertEqual(sorted(result['processed_data']), ['channel2', 'rejected_rows', 'time'])
+        self.assertEqual(sorted(result['metrics']), ['channel1', 'channel2', 'channel3', 'overall', 'pulse_transit'])
+
+        result = json.loads(body(self.client.get(
+            url, {'metrics': 'snr,statistics', 'metric_channels': 'channel2', 'stop': 1}
+        )))
+        self.assertEqual(list(result['metrics']), ['channel2'])
+        self.assertEqual(sorted(result['metrics']['channel2']), ['snr', 'statistics'])
+        self.assertEqual(sorted(result['processed_data']), ['channel1', 'channel2', 'channel3', 'rejected_rows', 'time'])
+        # Memoized on the record
+        self.assertTrue(SignalData.objects.get(id=data_id).metrics_cache)
+        self.assertEqual(self.client.get(url, {'metric_channels': 'nope'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'metrics': 'nope'}).status_code, 400)
+
+    def test_duplicate_upload_reuses_results(self):
+        first = self.upload('a.txt')
+        self.process(first)
+        second = self.upload('b.txt')
+
+        original, duplicate = SignalData.objects.get(id=first), SignalData.objects.get(id=second)
+        self.assertEqual(duplicate.content_hash, original.content_hash)
+        self.assertEqual(duplicate.original_file.name, original.original_file.name)
+        self.assertIsNotNone(duplicate.processed_at)
+        self.assertEqual(duplicate.processed_data['channel3'].tolist(), original.processed_data['channel3'].tolist())
+
+        # Deleting one record keeps the shared file of the other
+        self.assertEqual(self.client.delete(reverse('delete_data', args=[first])).status_code, 200)
+        duplicate.refresh_from_db()
+        self.assertTrue(duplicate.original_file.storage.exists(duplicate.original_file.name))
+        self.assertEqual(self.client.get(reverse('get_result', args=[second]), {'stop': 1}).status_code, 200)
+
+    def test_other_users_data_is_hidden(self):
+        data_id = self.upload()
+        other = User.objects.create_user(username='o', email='o@example.com', password='pw')
+        client = APIClient()
+        client.force_authenticate(other)
+        self.assertEqual(client.get(reverse('get_result', args=[data_id])).status_code, 404)
+        self.assertEqual(client.post(reverse('process_data', args=[data_id])).status_code, 404)
+        self.assertEqual(client.delete(reverse('delete_data', args=[data_id])).status_code, 404)
+        self.assertEqual(client.get(reverse('list_data')).data['count'], 0)
+
+
+class BatchFlowTests(TransactionTestCase):
+    """Batch items run on the worker pool, so the records must be committed"""
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media, SIGNAL_CACHE_ROOT=f'{self.media}/cache',
+            SIGNAL_PYRAMID_ROOT=f'{self.media}/pyramids', METRICS_WORKERS=1
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(username='u', email='u@example.com', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, name, content):
+        response = self.client.post(
+            reverse('upload_file'), {'file': SimpleUploadedFile(name, content)}, format='multipart'
+        )
+        return response.data['id']
+
+    def test_batch_processing(self):
+        content = recording()
+        ids = [self.upload(f'{i}.txt', content + b'\n' * i) for i in range(2)]
+        bad = self.upload('bad.txt', b'garbage\n')
+        response = self.client.post(reverse('process_batch'), {'ids': ids + [bad, 'nope']}, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual([item['error'] is None for item in response.data['items']], [True, True, True, False])
+
+        url = reverse('get_batch', args=[response.data['batch_id']])
+        deadline = time.monotonic() + 30
+        while not (batch := self.client.get(url).data)['finished'] and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertTrue(batch['finished'])
+        self.assertEqual(batch['counts'], {ProcessingJob.STATUS_SUCCEEDED: 2, ProcessingJob.STATUS_FAILED: 1})
+        self.assertEqual(SignalData.objects.filter(id__in=ids, processed_blob__isnull=False).count(), 2)
+
+        self.assertEqual(self.client.post(reverse('process_batch'), {'ids': []}, format='json').status_code, 400)
+
+
+class CalculationFlowTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='u', email='u@example.com', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_create_and_list(self):
+        response = self.client.post(
+            reverse('create_calculation'), {'ri': 0, 'ri_next': 0.8, 'foot_j': 0.3, 'r_j': 0.1, 'h': 0.5},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertAlmostEqual(response.data['hr'], 75.0)
+        self.assertAlmostEqual(response.data['ptt'], 0.2)
+        self.assertEqual(self.client.get(reverse('list_calculations')).data['count'], 1)
+
+    def test_batch_reports_invalid_rows(self):
+        items = [
+            {'ri': 0, 'ri_next': 1, 'foot_j': 0.2, 'r_j': 0, 'h': 0.5},
+            {'ri': 1, 'ri_next': 0, 'foot_j': 0.2, 'r_j': 0, 'h': 0.5},
+            {'ri': 'x'},
+        ]
+        response = self.client.post(reverse('create_calculations_batch'), {'items': items}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 1)
+        errors = [result['error'] for result in response.data['results']]
+        self.assertIsNone(errors[0])
+        self.assertEqual(errors[1], 'R_i+1 must be greater than R_i')
+        self.assertIn('ri', errors[2])
+        self.assertEqual(CalculationData.objects.filter(user=self.user).count(), 1)
+
+        response = self.client.post(reverse('create_calculations_batch'), {'items': items[1:]}, format='json')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,134 @@
+"""
+Tests of the binary signal codec and the processed_data field
+"""
+from importlib import import_module
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+
+from api.codec import (
+    DEFAULT_BLOCK_SIZE, decode_channel, decode_signal, encode_signal, read_header, search_sorted
+)
+from api.models import User, SignalData
+
+
+def make_data(n=10000):
+    rng = np.random.default_rng(0)
+    return {
+        'time': np.cumsum(rng.uniform(0.0005, 0.0015, n)),
+        'channel1': rng.standard_normal(n) * 1e-3,
+        'channel2': np.linspace(-1, 1, n),
+        'channel3': np.zeros(n),
+        'rejected_rows': 3,
+    }
+
+
+class CodecTests(SimpleTestCase):
+    def test_round_trip(self):
+        data = make_data()
+        for compression in (None, 'zlib'):
+            for block_size in (1000, 4096, DEFAULT_BLOCK_SIZE):
+                with self.subTest(compression=compression, block_size=block_size):
+                    decoded = decode_signal(encode_signal(data, compression=compression, block_size=block_size))
+                    self.assertEqual(decoded['rejected_rows'], 3)
+                    for name in ('time', 'channel1', 'channel2', 'channel3'):
+                        np.testing.assert_array_equal(decoded[name], data[name])
+
+    def test_round_trip_float32(self):
+        data = make_data()
+        decoded = decode_signal(encode_signal(data, dtype='<f4'))
+        for name in ('time', 'channel1', 'channel2', 'channel3'):
+            self.assertEqual(decoded[name].dtype, np.float32)
+            np.testing.assert_array_equal(decoded[name], data[name].astype(np.float32))
+
+    def test_lists_and_empty_data(self):
+        decoded = decode_signal(encode_signal({'time': [0.0, 0.5], 'channel1': [1, 2]}))
+        np.testing.assert_array_equal(decoded['channel1'], [1.0, 2.0])
+        decoded = decode_signal(encode_signal({'time': [], 'channel1': []}))
+        self.assertEqual(len(decoded['time']), 0)
+
+    def test_decode_ranges_across_blocks(self):
+        data = make_data()
+        for compression in (None, 'zlib'):
+            blob = encode_signal(data, compression=compression, block_size=1000)
+            header = read_header(blob)
+            for start, stop in ((0, 1), (999, 1001), (1500, 4500), (9990, None), (-10, None), (5, 5), (20, 10)):
+                with self.subTest(compression=compression, start=start, stop=stop):
+                    np.testing.assert_array_equal(
+                        decode_channel(blob, 'channel1', start, stop, header), data['channel1'][start:stop]
+                    )
+
+    def test_search_sorted_matches_numpy(self):
+        data = make_data()
+        time = data['time']
+        blob = encode_signal(data, block_size=700)
+        header = read_header(blob)
+        for value in (-1.0, time[0], time[699], time[700], time[5000] + 1e-9, time[-1], time[-1] + 1):
+            for side in ('left', 'right'):
+                with self.subTest(value=value, side=side):
+                    self.assertEqual(
+                        search_sorted(blob, 'time', value, side, header), np.searchsorted(time, value, side)
+                    )
+
+    def test_selected_channels(self):
+        decoded = decode_signal(encode_signal(make_data()), channels=['time'])
+        self.assertEqual(sorted(decoded), ['rejected_rows', 'time'])
+
+    def test_payload_is_aligned(self):
+        blob = encode_signal(make_data(), compression=None)
+        self.assertEqual(read_header(blob)[1] % 8, 0)
+
+    def test_invalid_input(self):
+        with self.assertRaises(ValueError):
+            encode_signal({'time': [0.0, 1.0], 'channel1': [1.0]})
+        with self.assertRaises(ValueError):
+            encode_signal({'time': [0.0]}, dtype='<i4')
+        with self.assertRaises(ValueError):
+            encode_signal({'time': [0.0]}, compression='lz4')
+        with self.assertRaises(ValueError):
+            read_header(b'XXXX' + bytes(12))
+        with self.assertRaises(ValueError):
+            read_header(b'HL')
+
+
+class FrozenMigrationCodecTests(SimpleTestCase):
+    """The copy of the codec frozen in migration 0004 stays readable by api.codec"""
+    migration = import_module('api.migrations.0004_signaldata_processed_blob')
+
+    def test_blob_decodes_with_api_codec(self):
+        data = {key: np.asarray(value).tolist() if key != 'rejected_rows' else value
+                for key, value in make_data(DEFAULT_BLOCK_SIZE + 10).items()}
+        blob = self.migration.encode_signal(data)
+        header, _ = read_header(blob)
+        self.assertEqual((header['dtype'], header['compression']), ('<f8', 'zlib'))
+        decoded = decode_signal(blob)
+        for key in ('time', 'channel1', 'channel2', 'channel3'):
+            np.testing.assert_array_equal(decoded[key], data[key])
+        self.assertEqual(decoded['rejected_rows'], 3)
+
+    def test_decodes_api_codec_blobs(self):
+        data = make_data(5000)
+        for dtype, compression in (('<f8', 'zlib'), ('<f4', 'zlib'), ('<f8', None)):
+            with self.subTest(dtype=dtype, compression=compression):
+                blob = encode_signal(data, dtype=dtype, compression=compression, block_size=1000)
+                decoded = self.migration.decode_signal(blob)
+                np.testing.assert_array_equal(decoded['channel1'], data['channel1'].astype(dtype))
+                self.assertIsInstance(decoded['time'], list)
+                self.assertEqual(decoded['rejected_rows'], 3)
+
+
+class ProcessedDataTests(TestCase):
+    def test_saved_and_reloaded(self):
+        user = User.objects.create_user(username='u', email='u@example.com', password='pw')
+        signal_data = SignalData(user=user, original_file='uploads/a.txt', file_name='a.txt', file_size=1)
+        self.assertIsNone(signal_data.processed_data)
+        signal_data.processed_data = make_data(100)
+        signal_data.save()
+
+        loaded = SignalData.objects.get(id=signal_data.id)
+        self.assertTrue(loaded.has_processed_data)
+        self.assertEqual(loaded.processed_data['rejected_rows'], 3)
+        np.testing.assert_array_equal(loaded.processed_data['channel1'], make_data(100)['channel1'])
+
+        loaded.processed_data = None
+        self.assertIsNone(loaded.processed_blob)
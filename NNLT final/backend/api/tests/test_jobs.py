@@ -0,0 +1,160 @@
+"""
+Tests of the processing job queue and its recovery (heartbeat, orphaned
+jobs, cancellation)
+"""
+import importlib
+import sys
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api import jobs
+from api.models import User, SignalData, ProcessingJob
+
+
+class JobTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='u', email='u@example.com', password='pw')
+        self.signal_data = SignalData.objects.create(
+            user=self.user, original_file='uploads/a.txt', file_name='a.txt', file_size=1
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def make_job(self, status=ProcessingJob.STATUS_QUEUED):
+        return ProcessingJob.objects.create(user=self.user, signal_data=self.signal_data, status=status)
+
+    def test_process_reuses_active_job(self):
+        url = reverse('process_data', args=[self.signal_data.id])
+        with mock.patch.object(jobs, 'get_executor') as get_executor:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(url, {}, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], ProcessingJob.STATUS_QUEUED)
+        get_executor.return_value.submit.assert_called_once()
+
+        again = self.client.post(url, {}, format='json')
+        self.assertEqual(again.data['id'], response.data['id'])
+
+    def test_job_is_private(self):
+        job = self.make_job()
+        self.assertEqual(self.client.get(reverse('get_job', args=[job.id])).status_code, 200)
+        other = User.objects.create_user(username='o', email='o@example.com', password='pw')
+        client = APIClient()
+        client.force_authenticate(other)
+        self.assertEqual(client.get(reverse('get_job', args=[job.id])).status_code, 404)
+        self.assertEqual(client.post(reverse('cancel_processing_job', args=[job.id])).status_code, 404)
+
+    def test_cancel(self):
+        queued = self.make_job()
+        response = self.client.post(reverse('cancel_processing_job', args=[queued.id]))
+        self.assertEqual(response.data['status'], ProcessingJob.STATUS_CANCELLED)
+        response = self.client.post(reverse('cancel_processing_job', args=[queued.id]))
+        self.assertEqual(response.status_code, 400)
+
+        # A cancelled job never starts
+        with mock.patch('api.jobs.run_processing') as run_processing:
+            jobs.run_job(queued.id)
+        run_processing.assert_not_called()
+
+    def test_failed_job_reports_error(self):
+        job = self.make_job()
+        with mock.patch('api.jobs.run_processing', side_effect=ValueError('bad file')):
+            with mock.patch('traceback.print_exc'):
+                jobs.run_job(job.id)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ProcessingJob.STATUS_FAILED)
+        self.assertEqual(job.error, 'Processing failed: bad file')
+
+
+class JobRecoveryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='u', email='u@example.com', password='pw')
+        self.signal_data = SignalData.objects.create(
+            user=self.user, original_file='uploads/a.txt', file_name='a.txt', file_size=1
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def make_job(self, status, age=0):
+        return ProcessingJob.objects.create(
+            user=self.user, signal_data=self.signal_data, status=status,
+            heartbeat_at=timezone.now() - timedelta(seconds=age)
+        )
+
+    def test_recover_fails_orphaned_running_and_requeues_queued(self):
+        running = self.make_job(ProcessingJob.STATUS_RUNNING, age=3600)
+        queued = self.make_job(ProcessingJob.STATUS_QUEUED, age=3600)
+        live = self.make_job(ProcessingJob.STATUS_RUNNING)
+
+        with mock.patch.object(jobs, '_submit') as submit:
+            self.assertEqual(jobs.recover_jobs(), (1, 1))
+        submit.assert_called_once_with(jobs.run_job, queued.id)
+
+        running.refresh_from_db()
+        queued.refresh_from_db()
+        live.refresh_from_db()
+        self.assertEqual(running.status, ProcessingJob.STATUS_FAILED)
+        self.assertEqual(running.error, jobs.INTERRUPTED_ERROR)
+        self.assertEqual(queued.status, ProcessingJob.STATUS_QUEUED)
+        self.assertGreater(queued.heartbeat_at, timezone.now() - timedelta(seconds=60))
+        self.assertEqual(live.status, ProcessingJob.STATUS_RUNNING)
+
+        # Claimed jobs are not requeued again
+        with mock.patch.object(jobs, '_submit') as submit:
+            self.assertEqual(jobs.recover_jobs(), (0, 0))
+        submit.assert_not_called()
+
+    def test_cancel_orphaned_running_job(self):
+        orphan = self.make_job(ProcessingJob.STATUS_RUNNING, age=3600)
+        self.assertEqual(jobs.cancel_job(orphan).status, ProcessingJob.STATUS_CANCELLED)
+
+        running = self.make_job(ProcessingJob.STATUS_RUNNING)
+        running = jobs.cancel_job(running)
+        self.assertEqual(running.status, ProcessingJob.STATUS_RUNNING)
+        self.assertTrue(running.cancel_requested)
+
+    def test_cancel_live_job_waits_for_worker(self):
+        job = self.make_job(ProcessingJob.STATUS_RUNNING, age=3600)
+        jobs._hold([job.id])
+        try:
+            job = jobs.cancel_job(job)
+        finally:
+            jobs._release([job.id])
+        self.assertEqual(job.status, ProcessingJob.STATUS_RUNNING)
+        self.assertTrue(job.cancel_requested)
+
+    def test_process_does_not_reuse_orphaned_job(self):
+        url = reverse('process_data', args=[self.signal_data.id])
+        live = self.make_job(ProcessingJob.STATUS_RUNNING)
+        response = self.client.post(url, {}, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['id'], str(live.id))
+
+        live.heartbeat_at = timezone.now() - timedelta(hours=1)
+        live.save()
+        response = self.client.post(url, {}, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertNotEqual(response.data['id'], str(live.id))
+        live.refresh_from_db()
+        self.assertEqual(live.status, ProcessingJob.STATUS_FAILED)
+
+    def test_batch_does_not_reuse_orphaned_job(self):
+        orphan = self.make_job(ProcessingJob.STATUS_QUEUED, age=3600)
+        response = self.client.post(
+            reverse('process_batch'), {'ids': [str(self.signal_data.id)]}, format='json'
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertNotEqual(response.data['items'][0]['job']['id'], str(orphan.id))
+
+    def test_monitor_starts_with_the_server(self):
+        # Started by the WSGI/ASGI entry points, not when the apps load
+        with mock.patch.object(jobs, 'start_monitor') as start_monitor:
+            for module in ('hero_lab.wsgi', 'hero_lab.asgi'):
+                sys.modules.pop(module, None)
+                importlib.import_module(module)
+        self.assertEqual(start_monitor.call_count, 2)
@@ -0,0 +1,91 @@
+"""
+Tests of result deduplication (processing_key)
+"""
+from unittest import mock
+
+import numpy as np
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from api import processing
+from api.models import User, SignalData
+
+
+class ProcessingKeyTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='u', email='u@example.com', password='pw')
+        self.processed = SignalData.objects.create(
+            user=self.user, original_file='uploads/a.txt', file_name='a.txt', file_size=1,
+            content_hash='ab' * 32, processed_blob=b'blob', metrics={'m': 1},
+            processing_version=processing.PROCESSING_VERSION, processing_key=processing.processing_key()
+        )
+
+    def make_duplicate(self):
+        return SignalData(
+            user=self.user, original_file='uploads/a.txt', file_name='b.txt', file_size=1,
+            content_hash='ab' * 32
+        )
+
+    def test_key_depends_on_settings(self):
+        key = processing.processing_key()
+        with override_settings(SIGNAL_FILTERS=not processing.settings.SIGNAL_FILTERS):
+            self.assertNotEqual(processing.processing_key(), key)
+        with override_settings(SIGNAL_BASELINE='median'):
+            self.assertNotEqual(processing.processing_key(), key)
+        self.assertEqual(processing.processing_key(), key)
+
+    def test_reuse_only_with_same_key(self):
+        signal_data = self.make_duplicate()
+        self.assertTrue(processing.reuse_results(signal_data))
+        self.assertEqual(signal_data.processing_key, self.processed.processing_key)
+
+        with override_settings(SIGNAL_BASELINE='median'):
+            self.assertFalse(processing.reuse_results(self.make_duplicate()))
+
+    def test_reprocess_is_not_deduplicated(self):
+        signal_data = self.make_duplicate()
+        signal_data.processed_blob = b'old'
+        with mock.patch.object(processing, 'compute_results', side_effect=RuntimeError('computed')) as compute:
+            with self.assertRaisesMessage(RuntimeError, 'computed'):
+                processing.prepare_results(signal_data)
+        compute.assert_called_once()
+        self.assertEqual(signal_data.processed_blob, b'old')
+
+
+class MetricsCacheTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='u', email='u@example.com', password='pw')
+        time = np.arange(5000) / 1000.0
+        signal_data = SignalData(
+            user=user, original_file='uploads/a.txt', file_name='a.txt', file_size=1,
+            processed_at=timezone.now(), metrics_cache={}
+        )
+        signal_data.processed_data = {
+            'time': time,
+            **{name: np.sin(2 * np.pi * time) for name in ('channel1', 'channel2', 'channel3')}
+        }
+        signal_data.save()
+        self.id = signal_data.id
+
+    def load(self):
+        return SignalData.objects.get(id=self.id)
+
+    def test_concurrent_entries_are_merged(self):
+        first, second = self.load(), self.load()
+        processing.get_metrics(first, metrics=['statistics'], channels=['channel1'])
+        processing.get_metrics(second, metrics=['snr'], channels=['channel2'])
+        processing.get_metrics(second, metrics=['statistics'], channels=['channel1'], h=1.7)
+
+        cache = self.load().metrics_cache
+        key = processing.metrics_key('fft', None)
+        self.assertEqual(set(cache), {key, processing.metrics_key('fft', 1.7)})
+        self.assertEqual(cache[key]['channel1'].keys(), {'statistics'})
+        self.assertEqual(cache[key]['channel2'].keys(), {'snr'})
+        self.assertEqual(second.metrics_cache, cache)
+
+    def test_reprocessed_record_is_not_overwritten(self):
+        stale = self.load()
+        SignalData.objects.filter(id=self.id).update(processed_at=timezone.now(), metrics_cache={'new': {}})
+        result = processing.get_metrics(stale, metrics=['statistics'], channels=['channel1'])
+        self.assertIn('statistics', result['channel1'])
+        self.assertEqual(self.load().metrics_cache, {'new': {}})
@@ -0,0 +1,200 @@
+"""
+Tests of the result and window endpoints (streaming, binary, ETags, gzip)
+"""
+import gzip
+import json
+import shutil
+import tempfile
+
+import numpy as np
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.codec import decode_signal, encode_signal
+from api.models import User, SignalData
+from api.renderers import SIGNAL_MEDIA_TYPE
+from api.streaming import iter_result_binary, iter_result_json
+
+
+def body(response):
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+class ResultEndpointTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media, SIGNAL_PYRAMID_ROOT=f'{self.media}/pyramids'
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(username='u', email='u@example.com', password='pw')
+        time = np.arange(5000) / 1000.0
+        self.signal_data = SignalData(
+            user=self.user, original_file='uploads/a.txt', file_name='a.txt', file_size=1,
+            metrics={'overall': {'snr': 1.0}}, processed_at=timezone.now()
+        )
+        self.signal_data.processed_data = {
+            'time': time,
+            'channel1': np.sin(2 * np.pi * time),
+            'channel2': np.cos(2 * np.pi * time),
+            'channel3': time.copy(),
+        }
+        self.signal_data.save()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.result_url = reverse('get_result', args=[self.signal_data.id])
+        self.window_url = reverse('get_window', args=[self.signal_data.id])
+
+    def test_result_range_and_channels(self):
+        response = self.client.get(self.result_url, {'start': 10, 'stop': 20, 'channels': 'channel2'})
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(body(response))
+        self.assertEqual(data['range'], {'start': 10, 'stop': 20, 'length': 5000})
+        self.assertEqual(sorted(data['processed_data']), ['channel2', 'time'])
+        np.testing.assert_allclose(data['processed_data']['time'], np.arange(10, 20) / 1000.0)
+
+    def test_result_time_range(self):
+        data = json.loads(body(self.client.get(self.result_url, {'t0': 1.0, 't1': 2.0})))
+        self.assertEqual(data['range'], {'start': 1000, 'stop': 2001, 'length': 5000})
+        self.assertEqual(data['metrics'], {'overall': {'snr': 1.0}})
+        self.assertEqual(len(data['processed_data']['channel3']), 1001)
+
+    def test_result_binary(self):
+        response = self.client.get(self.result_url, {'t0': 1.0, 't1': 2.0}, HTTP_ACCEPT=SIGNAL_MEDIA_TYPE)
+        self.assertEqual(response['Content-Type'], SIGNAL_MEDIA_TYPE)
+        self.assertNotIn('Content-Encoding', response)
+        data = decode_signal(body(response))
+        self.assertEqual(data['time'][0], 1.0)
+        self.assertEqual(data['time'][-1], 2.0)
+        self.assertEqual(data['file_name'], 'a.txt')
+
+    def test_result_etag_per_coding(self):
+        plain = self.client.get(self.result_url)
+        compressed = self.client.get(self.result_url, HTTP_ACCEPT_ENCODING='gzip')
+        etag, gzip_etag = plain['ETag'], compressed['ETag']
+
+        self.assertFalse(etag.startswith('W/'))
+        self.assertEqual(gzip_etag, etag[:-1] + '-gzip"')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(body(compressed)), body(plain))
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        self.assertEqual(self.client.get(self.result_url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        response = self.client.get(self.result_url, HTTP_IF_NONE_MATCH=gzip_etag, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], gzip_etag)
+        # The other coding's tag does not validate
+        response = self.client.get(self.result_url, HTTP_IF_NONE_MATCH=etag, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+
+    def test_result_gzip_q_values(self):
+        for accept_encoding, gzipped in [
+            ('gzip;q=0', False),
+            ('br, gzip; q=0.0', False),
+            ('*;q=0', False),
+            ('gzip;q=0, *', False),
+            ('identity', False),
+            ('gzip;q=x', False),
+            ('deflate, gzip;q=0.5', True),
+            ('GZIP', True),
+            ('*', True),
+            ('gzip;q=1, *;q=0', True),
+        ]:
+            with self.subTest(accept_encoding):
+                response = self.client.get(self.result_url, HTTP_ACCEPT_ENCODING=accept_encoding)
+                self.assertEqual(response.get('Content-Encoding') == 'gzip', gzipped)
+                self.assertEqual(response['ETag'].endswith('-gzip"'), gzipped)
+
+    def test_result_conditional_get(self):
+        etag = self.client.get(self.result_url)['ETag']
+        self.assertFalse(etag.startswith('W/'))
+        response = self.client.get(self.result_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        # Another range is another representation
+        response = self.client.get(self.result_url, {'stop': 10}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_result_etag_changes_after_reprocess(self):
+        etag = self.client.get(self.result_url)['ETag']
+        SignalData.objects.filter(id=self.signal_data.id).update(processed_at=timezone.now())
+        self.assertEqual(self.client.get(self.result_url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_result_invalid_options(self):
+        for params in ({'start': 'x'}, {'start': 0, 't1': 1.0}, {'channels': 'channel9'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.result_url, params).status_code, 400)
+
+    def test_window_is_downsampled(self):
+        # The pyramid is built on the first request
+        response = self.client.get(self.window_url, {'channel': 'channel1', 'width': 100})
+        self.assertEqual(response.status_code, 200)
+        # A short recording stops at the coarsest pyramid level
+        self.assertGreaterEqual(response.data['level'], 0)
+        self.assertLess(len(response.data['values']), 5000)
+        self.assertAlmostEqual(max(response.data['values']), 1.0, places=4)
+        self.assertAlmostEqual(min(response.data['values']), -1.0, places=4)
+
+    def test_window_short_range_returns_raw_samples(self):
+        response = self.client.get(self.window_url, {'channel': 'channel3', 't0': 1.0, 't1': 1.05, 'width': 1000})
+        self.assertEqual(response.data['level'], -1)
+        np.testing.assert_allclose(response.data['values'], np.arange(1000, 1051) / 1000.0)
+
+    def test_window_invalid_parameters(self):
+        self.assertEqual(self.client.get(self.window_url, {'channel': 'channel9'}).status_code, 400)
+        self.assertEqual(self.client.get(self.window_url, {'t0': 'x'}).status_code, 400)
+
+    def test_window_json_is_gzipped(self):
+        params = {'channel': 'channel1', 'width': 100}
+        plain = self.client.get(self.window_url, params)
+        compressed = self.client.get(self.window_url, params, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(compressed.content)), json.loads(plain.content))
+        self.assertEqual(compressed['ETag'], plain['ETag'][:-1] + '-gzip"')
+
+        response = self.client.get(
+            self.window_url, params, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=compressed['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_window_binary_is_not_gzipped(self):
+        response = self.client.get(
+            self.window_url, {'channel': 'channel2', 'width': 100},
+            HTTP_ACCEPT=SIGNAL_MEDIA_TYPE, HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Content-Encoding', response)
+        self.assertFalse(response['ETag'].endswith('-gzip"'))
+        data = decode_signal(response.content)
+        self.assertEqual(data['channel'], 'channel2')
+        self.assertLess(len(data['time']), 5000)
+
+
+class NonFiniteFieldsTests(TestCase):
+    """SNR of a noise-free channel is inf: results must stay valid JSON"""
+
+    def setUp(self):
+        time = np.arange(10) / 1000.0
+        self.blob = encode_signal({'time': time, 'channel1': time, 'scale': float('nan')})
+        self.fields = {'metrics': {'channel1': {'snr': float('inf'), 'values': [1.0, np.float32('nan')]}}}
+
+    def test_json(self):
+        def reject(constant):
+            raise ValueError(f'{constant} is not JSON')
+
+        data = json.loads(''.join(iter_result_json(self.fields, self.blob)), parse_constant=reject)
+        self.assertEqual(data['metrics'], {'channel1': {'snr': None, 'values': [1.0, None]}})
+        self.assertIsNone(data['processed_data']['scale'])
+        self.assertEqual(len(data['processed_data']['channel1']), 10)
+
+    def test_binary_header(self):
+        data = decode_signal(b''.join(iter_result_binary(self.fields, self.blob)))
+        self.assertIsNone(data['metrics']['channel1']['snr'])
+        self.assertIsNone(data['scale'])
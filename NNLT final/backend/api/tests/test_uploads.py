@@ -0,0 +1,160 @@
+"""
+Tests of the chunked upload API
+"""
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api import uploads
+from api.models import User, SignalData, UploadSession
+
+DATA = b''.join(b'%d\t%d\t%d\n' % (i, i * 2, i * 3) for i in range(2000))
+CHUNK = 4096
+
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class UploadTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        settings_override = override_settings(MEDIA_ROOT=self.media)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(username='u', email='u@example.com', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create(self, size=len(DATA)):
+        response = self.client.post(
+            reverse('create_upload_session'), {'file_name': 'rec.txt', 'file_size': size}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def put(self, session_id, offset, chunk, digest=True):
+        headers = {'HTTP_X_CHUNK_SHA256': sha256(chunk)} if digest is True else (
+            {'HTTP_X_CHUNK_SHA256': digest} if digest else {}
+        )
+        return self.client.put(
+            reverse('upload_chunk', args=[session_id]) + f'?offset={offset}',
+            data=chunk, content_type='application/octet-stream', **headers
+        )
+
+    def upload(self, session_id, data=DATA):
+        for offset in range(0, len(data), CHUNK):
+            response = self.put(session_id, offset, data[offset:offset + CHUNK])
+            self.assertEqual(response.status_code, 200)
+        return response
+
+    def finalize(self, session_id, **body):
+        return self.client.post(reverse('finalize_upload', args=[session_id]), body, format='json')
+
+    def partial_files(self):
+        files = []
+        for root, _, names in os.walk(os.path.join(self.media, uploads.PARTIAL_DIR)):
+            files += names
+        return files
+
+    def test_upload_and_finalize(self):
+        session_id = self.create()
+        self.assertEqual(self.upload(session_id).data['received'], len(DATA))
+        self.assertEqual(len(self.partial_files()), -(-len(DATA) // CHUNK))
+
+        response = self.finalize(session_id)
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('processed_data', response.data)
+        self.assertFalse(response.data['is_processed'])
+        signal_data = SignalData.objects.get(id=response.data['id'])
+        self.assertEqual(signal_data.content_hash, sha256(DATA))
+        with default_storage.open(signal_data.original_file.name, 'rb') as f:
+            self.assertEqual(f.read(), DATA)
+        self.assertEqual(self.partial_files(), [])
+        self.assertEqual(self.finalize(session_id).status_code, 409)
+
+    def test_session_directory_is_removed(self):
+        session_dir = os.path.join(self.media, uploads.PARTIAL_DIR)
+        finalized, deleted = self.create(), self.create()
+        for session_id in (finalized, deleted):
+            self.upload(session_id)
+            # Chunk of a PUT that crashed before recording it in the session
+            default_storage.save(f'{uploads.PARTIAL_DIR}/{session_id}/stray.part', io.BytesIO(b'x'))
+
+        self.assertEqual(self.finalize(finalized).status_code, 201)
+        self.assertEqual(os.listdir(session_dir), [deleted])
+        response = self.client.delete(reverse('delete_upload_session', args=[deleted]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(os.listdir(session_dir), [])
+
+    def test_chunk_checksum_mismatch(self):
+        session_id = self.create()
+        response = self.put(session_id, 0, DATA[:CHUNK], digest='0' * 64)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['received'], 0)
+        self.assertEqual(self.partial_files(), [])
+        self.assertEqual(self.put(session_id, 0, DATA[:CHUNK], digest='nope').status_code, 400)
+        # Accepted without a digest
+        self.assertEqual(self.put(session_id, 0, DATA[:CHUNK], digest=None).status_code, 200)
+
+    def test_wrong_offset_and_oversize(self):
+        session_id = self.create()
+        self.assertEqual(self.put(session_id, 5, DATA[:CHUNK]).status_code, 409)
+        self.upload(session_id)
+        self.assertEqual(self.put(session_id, len(DATA), b'x').status_code, 400)
+
+    def test_incomplete_chunk_is_discarded(self):
+        session = uploads.create_session(self.user, 'rec.txt', len(DATA))
+        with self.assertRaises(uploads.UploadError):
+            uploads.write_chunk(session, 0, io.BytesIO(DATA[:100]), CHUNK)
+        session.refresh_from_db()
+        self.assertEqual((session.received, session.parts), (0, []))
+        self.assertEqual(self.partial_files(), [])
+
+    def test_whole_file_checksum_mismatch_restarts(self):
+        session_id = self.create()
+        self.upload(session_id)
+        response = self.finalize(session_id, sha256='0' * 64)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['received'], 0)
+        self.assertEqual(self.partial_files(), [])
+        self.assertFalse(SignalData.objects.exists())
+
+        self.upload(session_id)
+        self.assertEqual(self.finalize(session_id, sha256=sha256(DATA).upper()).status_code, 201)
+
+    def test_duplicate_shares_original_file(self):
+        first = self.create()
+        self.upload(first)
+        a = SignalData.objects.get(id=self.finalize(first).data['id'])
+        second = self.create()
+        self.upload(second)
+        b = SignalData.objects.get(id=self.finalize(second).data['id'])
+        self.assertEqual(a.original_file.name, b.original_file.name)
+        self.assertEqual(len(os.listdir(os.path.join(self.media, 'uploads'))), 2)
+
+    def test_expired_sessions_are_deleted(self):
+        old = self.create()
+        self.put(old, 0, DATA[:CHUNK])
+        UploadSession.objects.filter(id=old).update(updated_at=timezone.now() - timedelta(days=2))
+        fresh = self.create()
+        self.put(fresh, 0, DATA[:CHUNK])
+
+        self.assertEqual(set(map(str, UploadSession.objects.values_list('id', flat=True))), {fresh})
+        self.assertEqual(len(self.partial_files()), 1)
+
+        # Chunks of a session that no longer exists
+        default_storage.save(f'{uploads.PARTIAL_DIR}/gone/0000.part', io.BytesIO(b'x'))
+        self.assertEqual(uploads.sweep_partial_files(), 1)
+        self.assertEqual(len(self.partial_files()), 1)
@@ -0,0 +1,36 @@
+"""
+Upload handlers for Hero Lab API
+"""
+import hashlib
+from django.core.files.uploadhandler import FileUploadHandler
+
+
+def hash_file(file):
+    """SHA-256 hex digest of an uploaded or stored file, read in chunks"""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+class HashingUploadHandler(FileUploadHandler):
+    """
+    Hash uploaded files while they are streamed in
+
+    Passes every chunk through to the next handler unchanged and stores the
+    SHA-256 hex digest in ``request.upload_hashes[field_name]``.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.digest = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.digest.update(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        if not hasattr(self.request, 'upload_hashes'):
+            self.request.upload_hashes = {}
+        self.request.upload_hashes[self.field_name] = self.digest.hexdigest()
+        return None
@@ -0,0 +1,269 @@
+"""
+Chunked, resumable uploads for Hero Lab API
+
+A client opens an UploadSession with the file name and size, PUTs the
+chunks in order at the offset given by ``session.received`` (asking the
+session for it again after a failure), then finalizes it. Each chunk is
+streamed into its own object of the media storage, checked against the
+SHA-256 the client sent for it; on finalize the chunks are joined into the
+original file of a normal SignalData record. Only the storage API is used,
+so any Django storage backend works.
+
+Sessions not updated for UPLOAD_SESSION_EXPIRY seconds are deleted with
+their chunks (expire_sessions, on every new session and by the
+``cleanup_uploads`` management command).
+"""
+import hashlib
+import os
+from datetime import timedelta
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from .models import SignalData, UploadSession
+from .processing import find_duplicate, reuse_results
+
+PARTIAL_DIR = 'uploads/partial'
+
+# Bytes read from the request or a chunk per read
+COPY_BLOCK_SIZE = 1 << 20
+
+
+class UploadError(Exception):
+    """Chunk or finalize request rejected; ``status`` is the HTTP status"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class _ChunkReader:
+    """At most ``length`` bytes of a request body, hashed while read"""
+
+    def __init__(self, stream, length):
+        self.stream = stream
+        self.remaining = length
+        self.received = 0
+        self.digest = hashlib.sha256()
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        try:
+            block = self.stream.read(min(size, COPY_BLOCK_SIZE))
+        except OSError:
+            # Client disconnected (UnreadablePostError)
+            block = b''
+        if not block:
+            self.remaining = 0
+            return b''
+        self.remaining -= len(block)
+        self.received += len(block)
+        self.digest.update(block)
+        return block
+
+
+class _PartsReader:
+    """The stored chunks of a session read one after another, hashed while read"""
+
+    def __init__(self, names):
+        self.names = list(names)
+        self.current = None
+        self.digest = hashlib.sha256()
+
+    def read(self, size=-1):
+        while True:
+            if self.current is None:
+                if not self.names:
+                    return b''
+                self.current = default_storage.open(self.names.pop(0), 'rb')
+            block = self.current.read(size if size is not None and size > 0 else COPY_BLOCK_SIZE)
+            if block:
+                self.digest.update(block)
+                return block
+            self.close()
+
+    def close(self):
+        if self.current is not None:
+            self.current.close()
+            self.current = None
+
+
+def create_session(user, file_name, file_size):
+    """Open a session (and delete the expired ones)"""
+    expire_sessions()
+    return UploadSession.objects.create(user=user, file_name=file_name, file_size=file_size)
+
+
+def write_chunk(session, offset, stream, length, sha256=None):
+    """
+    Store one chunk at ``offset``
+
+    The chunk must start at ``session.received``: a client that lost a
+    response re-sends from the offset the session reports. A chunk that is
+    incomplete, does not match ``sha256`` or loses a race with a concurrent
+    chunk at the same offset is deleted and not counted.
+
+    Args:
+        session: UploadSession
+        offset: byte offset of the chunk
+        stream: file-like request body
+        length: chunk size (Content-Length)
+        sha256: hex digest of the chunk sent by the client (None = not checked)
+
+    Returns:
+        Updated session; raises UploadError if the chunk is rejected
+    """
+    if session.completed_at is not None:
+        raise UploadError('Upload already finalized', 409)
+    if offset != session.received:
+        raise UploadError(f'Expected offset {session.received}', 409)
+    if offset + length > session.file_size:
+        raise UploadError('Chunk exceeds the declared file size')
+
+    reader = _ChunkReader(stream, length)
+    name = default_storage.save(f'{PARTIAL_DIR}/{session.id}/{offset:016d}.part', File(reader))
+    try:
+        if reader.received != length:
+            raise UploadError(f'Incomplete chunk: received {reader.received} of {length} bytes')
+        if sha256 is not None and reader.digest.hexdigest() != sha256.lower():
+            raise UploadError('Chunk checksum mismatch')
+
+        # Conditional update: a concurrent chunk at the same offset loses
+        parts = session.parts + [name]
+        updated = UploadSession.objects.filter(id=session.id, received=offset).update(
+            received=offset + length, parts=parts, updated_at=timezone.now()
+        )
+        if not updated:
+            raise UploadError('Concurrent chunk upload', 409)
+    except UploadError:
+        default_storage.delete(name)
+        raise
+    session.received = offset + length
+    session.parts = parts
+    return session
+
+
+def _delete_chunk_dir(directory):
+    """
+    Delete every file of a chunk directory, including the chunks of a
+    request that crashed before recording them in ``session.parts``
+
+    Returns:
+        number of files deleted
+    """
+    path = f'{PARTIAL_DIR}/{directory}'
+    if not default_storage.exists(path):
+        return 0
+    names = default_storage.listdir(path)[1]
+    for name in names:
+        default_storage.delete(f'{path}/{name}')
+    # Storages with real directories (FileSystemStorage) keep the empty one
+    try:
+        os.rmdir(default_storage.path(path))
+    except (NotImplementedError, OSError):
+        pass
+    return len(names)
+
+
+def finalize_session(session, sha256=None):
+    """
+    Join the chunks into the original file of a new SignalData record
+
+    The chunks are copied and hashed in one pass. Identical content already
+    stored is shared (and its results reused), as with a direct upload.
+
+    Args:
+        session: UploadSession
+        sha256: hex digest of the whole file (None = rely on the chunk
+                digests)
+
+    Returns:
+        SignalData; raises UploadError if the file is incomplete or the
+        checksum does not match
+    """
+    if session.completed_at is not None:
+        raise UploadError('Upload already finalized', 409)
+    if session.received != session.file_size:
+        raise UploadError(f'Incomplete upload: {session.received} of {session.file_size} bytes')
+
+    signal_data = SignalData(user=session.user, file_name=session.file_name, file_size=session.file_size)
+    field = SignalData._meta.get_field('original_file')
+    reader = _PartsReader(session.parts)
+    try:
+        name = default_storage.save(field.generate_filename(signal_data, session.file_name), File(reader))
+    finally:
+        reader.close()
+    content_hash = reader.digest.hexdigest()
+
+    if sha256 is not None and content_hash != sha256.lower():
+        # The corrupt bytes cannot be located: the client starts over
+        default_storage.delete(name)
+        _delete_chunk_dir(session.id)
+        session.received = 0
+        session.parts = []
+        session.save(update_fields=['received', 'parts', 'updated_at'])
+        raise UploadError('Checksum mismatch, upload restarted at offset 0')
+
+    signal_data.content_hash = content_hash
+    duplicate = find_duplicate(signal_data)
+    if duplicate is not None and duplicate.original_file.storage.exists(duplicate.original_file.name):
+        default_storage.delete(name)
+        signal_data.original_file.name = duplicate.original_file.name
+        reuse_results(signal_data)
+    else:
+        signal_data.original_file.name = name
+
+    with transaction.atomic():
+        signal_data.save()
+        session.signal_data = signal_data
+        session.completed_at = timezone.now()
+        session.save(update_fields=['signal_data', 'completed_at', 'updated_at'])
+    _delete_chunk_dir(session.id)
+    UploadSession.objects.filter(id=session.id).update(parts=[])
+    session.parts = []
+    return signal_data
+
+
+def delete_session(session):
+    """Delete a session and its chunk directory"""
+    _delete_chunk_dir(session.id)
+    session.delete()
+
+
+def expire_sessions():
+    """
+    Delete the sessions not updated for UPLOAD_SESSION_EXPIRY seconds
+
+    Returns:
+        number of sessions deleted
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.UPLOAD_SESSION_EXPIRY)
+    count = 0
+    for session in UploadSession.objects.filter(updated_at__lt=cutoff).iterator():
+        delete_session(session)
+        count += 1
+    return count
+
+
+def sweep_partial_files():
+    """
+    Delete the chunk directories of sessions that no longer exist
+
+    Covers chunks left behind by a crashed request or a deleted session.
+
+    Returns:
+        number of files deleted
+    """
+    if not default_storage.exists(PARTIAL_DIR):
+        return 0
+    directories = default_storage.listdir(PARTIAL_DIR)[0]
+    sessions = {str(session_id) for session_id in UploadSession.objects.values_list('id', flat=True)}
+    count = 0
+    for directory in directories:
+        if directory not in sessions:
+            count += _delete_chunk_dir(directory)
+    return count
@@ -1,27 +1,48 @@
 """
 URLs for Hero Lab API
+
+Each group is mounted under its own prefix (see hero_lab.urls), so paths
+such as list/ and delete/<uuid>/ resolve to the data or the calculation
+views depending on the prefix.
 """
 from django.urls import path
 from . import views
 
-urlpatterns = [
-    # Auth
+auth_urlpatterns = [
     path('register/', views.register, name='register'),
     path('login/', views.login, name='login'),
-    
-    # User
+]
+
+user_urlpatterns = [
     path('me/', views.get_current_user, name='get_current_user'),
-    
-    # Data
+]
+
+data_urlpatterns = [
     path('upload/', views.upload_file, name='upload_file'),
+    
+    # Chunked, resumable uploads
+    path('upload/sessions/', views.create_upload_session, name='create_upload_session'),
+    path('upload/sessions/<uuid:session_id>/', views.get_upload_session, name='get_upload_session'),
+    path('upload/sessions/<uuid:session_id>/chunk/', views.upload_chunk, name='upload_chunk'),
+    path('upload/sessions/<uuid:session_id>/finalize/', views.finalize_upload, name='finalize_upload'),
+    path('upload/sessions/<uuid:session_id>/delete/', views.delete_upload_session, name='delete_upload_session'),
+    
     path('list/', views.list_data, name='list_data'),
+    path('process/batch/', views.process_batch, name='process_batch'),
     path('process/<uuid:data_id>/', views.process_data, name='process_data'),
     path('result/<uuid:data_id>/', views.get_result, name='get_result'),
+    path('window/<uuid:data_id>/', views.get_window, name='get_window'),
     path('delete/<uuid:data_id>/', views.delete_data, name='delete_data'),
     
-    # Calculations
+    # Processing jobs
+    path('jobs/<uuid:job_id>/', views.get_job, name='get_job'),
+    path('jobs/<uuid:job_id>/cancel/', views.cancel_processing_job, name='cancel_processing_job'),
+    path('batches/<uuid:batch_id>/', views.get_batch, name='get_batch'),
+]
+
+calculation_urlpatterns = [
     path('create/', views.create_calculation, name='create_calculation'),
+    path('create/batch/', views.create_calculations_batch, name='create_calculations_batch'),
     path('list/', views.list_calculations, name='list_calculations'),
     path('delete/<uuid:calculation_id>/', views.delete_calculation, name='delete_calculation'),
 ]
-
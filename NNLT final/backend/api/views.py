@@ -2,42 +2,59 @@
 Views for Hero Lab API
 """
 import os
-import sys
+import re
 import json
-from pathlib import Path
+import uuid
+import hashlib
+from urllib.parse import urlencode
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework import viewsets, status, generics
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework_simplejwt.tokens import RefreshToken
-from .models import SignalData, CalculationData
+from .models import SignalData, CalculationData, ProcessingJob, UploadSession
+from .codec import encode_signal, read_header, decode_channel
+from .jobs import enqueue_job, enqueue_batch, cancel_job, expire_jobs
+from .renderers import SignalRenderer
+from .uploadhandlers import hash_file
+from .uploads import UploadError, create_session, write_chunk, finalize_session, delete_session
+from .streaming import (
+    accepts_gzip,
+    gzip_response,
+    gzip_streaming_response,
+    sample_range,
+    streaming_result_response
+)
+from .processing import (
+    SIGNAL_CHANNELS,
+    get_cache_dir,
+    get_pyramid_dir,
+    build_signal_pyramid,
+    find_duplicate,
+    reuse_results,
+    get_metrics
+)
 from .serializers import (
     UserRegistrationSerializer,
     UserSerializer,
-    SignalDataSerializer,
+    SignalDataSummarySerializer,
     SignalDataUploadSerializer,
+    UploadSessionCreateSerializer,
+    UploadSessionSerializer,
+    UploadFinalizeSerializer,
+    ProcessingJobSerializer,
     CalculationDataSerializer,
     CalculationDataInputSerializer
 )
 
 User = get_user_model()
 
-# Add Python modules to path
-PYTHON_MODULES_PATH = Path(__file__).resolve().parent.parent.parent.parent / 'python'
-if str(PYTHON_MODULES_PATH) not in sys.path:
-    sys.path.insert(0, str(PYTHON_MODULES_PATH))
-
-# Lazy import - will be imported when needed
-def get_preprocessing_modules():
-    """Lazy import of preprocessing modules"""
-    from preprocessing.processor import process_signal_file
-    from calculator.metrics import calculate_all_metrics
-    return process_signal_file, calculate_all_metrics
-
-
 @csrf_exempt
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -117,24 +134,222 @@ def upload_file(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # Save file
-    signal_data = SignalData.objects.create(
+    # Hashed while streamed in by HashingUploadHandler
+    content_hash = getattr(request, 'upload_hashes', {}).get('file') or hash_file(uploaded_file)
+    
+    signal_data = SignalData(
         user=request.user,
-        original_file=uploaded_file,
         file_name=uploaded_file.name,
-        file_size=uploaded_file.size
+        file_size=uploaded_file.size,
+        content_hash=content_hash
+    )
+    
+    # Identical content already stored: share the file and reuse its results
+    duplicate = find_duplicate(signal_data)
+    if duplicate is not None and duplicate.original_file.storage.exists(duplicate.original_file.name):
+        signal_data.original_file.name = duplicate.original_file.name
+        reuse_results(signal_data)
+    else:
+        signal_data.original_file = uploaded_file
+    signal_data.save()
+    
+    return Response(
+        SignalDataSummarySerializer(signal_data).data,
+        status=status.HTTP_201_CREATED
     )
+
+
+def _get_upload_session(request, session_id):
+    try:
+        return UploadSession.objects.get(id=session_id, user=request.user)
+    except UploadSession.DoesNotExist:
+        return None
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def create_upload_session(request):
+    """Start a chunked, resumable upload (see api.uploads)"""
+    serializer = UploadSessionCreateSerializer(data=request.data)
+    
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    session = create_session(request.user, **serializer.validated_data)
+    return Response(
+        UploadSessionSerializer(session).data,
+        status=status.HTTP_201_CREATED
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_upload_session(request, session_id):
+    """Upload session state; received is the offset to resume from"""
+    session = _get_upload_session(request, session_id)
+    if session is None:
+        return Response(
+            {'error': 'Upload session not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    return Response(UploadSessionSerializer(session).data)
+
+
+@api_view(['PUT'])
+@permission_classes([IsAuthenticated])
+def upload_chunk(request, session_id):
+    """
+    Append the raw request body at ?offset= to an upload session
+    
+    An X-Chunk-SHA256 header (hex digest of the chunk) is verified before
+    the chunk is accepted.
+    """
+    session = _get_upload_session(request, session_id)
+    if session is None:
+        return Response(
+            {'error': 'Upload session not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    try:
+        offset = int(request.query_params.get('offset', ''))
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        return Response(
+            {'error': 'offset must be an integer'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if length <= 0:
+        return Response(
+            {'error': 'Empty chunk'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if length > settings.UPLOAD_CHUNK_MAX_SIZE:
+        return Response(
+            {'error': f'Chunk larger than {settings.UPLOAD_CHUNK_MAX_SIZE} bytes'},
+            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+    sha256 = request.META.get('HTTP_X_CHUNK_SHA256')
+    if sha256 is not None and not re.fullmatch(r'[0-9a-fA-F]{64}', sha256):
+        return Response(
+            {'error': 'X-Chunk-SHA256 must be a SHA-256 hex digest'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        session = write_chunk(session, offset, request.stream, length, sha256)
+    except UploadError as e:
+        return Response(
+            {'error': str(e), 'received': session.received},
+            status=e.status
+        )
+    return Response(UploadSessionSerializer(session).data)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def finalize_upload(request, session_id):
+    """Join a complete upload (checking its SHA-256 if given) into a SignalData"""
+    session = _get_upload_session(request, session_id)
+    if session is None:
+        return Response(
+            {'error': 'Upload session not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    serializer = UploadFinalizeSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    try:
+        signal_data = finalize_session(session, serializer.validated_data.get('sha256'))
+    except UploadError as e:
+        return Response(
+            {'error': str(e), 'received': session.received},
+            status=e.status
+        )
     return Response(
-        SignalDataSerializer(signal_data).data,
+        SignalDataSummarySerializer(signal_data).data,
         status=status.HTTP_201_CREATED
     )
 
 
+@api_view(['DELETE'])
+@permission_classes([IsAuthenticated])
+def delete_upload_session(request, session_id):
+    """Abort an upload and delete its chunks"""
+    session = _get_upload_session(request, session_id)
+    if session is None:
+        return Response(
+            {'error': 'Upload session not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    delete_session(session)
+    return Response(
+        {'message': 'Upload session deleted successfully'},
+        status=status.HTTP_200_OK
+    )
+
+
+def _parse_names(value, allowed, kind):
+    """List or comma-separated names (None = all)"""
+    if value in (None, ''):
+        return None
+    names = value.split(',') if isinstance(value, str) else value
+    if not isinstance(names, list):
+        raise ValueError(f'{kind} must be a list')
+    unknown = sorted(set(names) - set(allowed))
+    if unknown:
+        raise ValueError(f'unknown {kind}: {", ".join(map(str, unknown))}')
+    return [name for name in allowed if name in names]
+
+
+def _parse_metric_options(params, channels_param='channels'):
+    """
+    Metric options from request data or query parameters
+    
+    Args:
+        channels_param: name of the parameter selecting the metric channels
+    
+    Returns:
+        dict with metrics, channels, spectral_method and h; raises
+        ValueError if a value is invalid
+    """
+    from calculator.metrics import CHANNELS, CHANNEL_METRICS, RECORD_METRICS
+    
+    get = params.get
+    options = {
+        'metrics': _parse_names(get('metrics'), CHANNEL_METRICS + RECORD_METRICS, 'metrics'),
+        'channels': _parse_names(get(channels_param), CHANNELS, channels_param),
+        'spectral_method': get('spectral_method') or 'fft',
+        'h': get('h'),
+    }
+    if options['spectral_method'] not in ('fft', 'welch'):
+        raise ValueError('spectral_method must be fft or welch')
+    if options['h'] in (None, ''):
+        options['h'] = None
+    else:
+        options['h'] = float(options['h'])
+        if not options['h'] > 0:
+            raise ValueError('h must be greater than 0')
+    return options
+
+
+def _job_fields(options):
+    """ProcessingJob fields of metric options"""
+    return {
+        'metric_names': options['metrics'],
+        'channels': options['channels'],
+        'spectral_method': options['spectral_method'],
+        'h': options['h'],
+    }
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def process_data(request, data_id):
-    """Process uploaded signal data"""
+    """Queue processing of uploaded signal data (poll the returned job)"""
     try:
         signal_data = SignalData.objects.get(id=data_id, user=request.user)
     except SignalData.DoesNotExist:
@@ -143,73 +358,406 @@ def process_data(request, data_id):
             status=status.HTTP_404_NOT_FOUND
         )
     
-    # Get file path
-    file_path = signal_data.original_file.path
+    try:
+        options = _parse_metric_options(request.data)
+    except (TypeError, ValueError) as e:
+        return Response(
+            {'error': f'Invalid metric options: {e}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    # Reuse the job already queued or running for this record with the same
+    # options, unless no live process holds it any more
+    expire_jobs(signal_data.jobs.all())
+    job = next(
+        (job for job in signal_data.jobs.filter(status__in=ProcessingJob.ACTIVE_STATUSES)
+         if job.metric_options == options),
+        None
+    )
+    if job is None:
+        job = ProcessingJob.objects.create(
+            user=request.user, signal_data=signal_data, **_job_fields(options)
+        )
+        enqueue_job(job)
+    
+    return Response(
+        ProcessingJobSerializer(job).data,
+        status=status.HTTP_202_ACCEPTED
+    )
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def process_batch(request):
+    """Queue processing of many signal data records (poll the returned batch)"""
+    ids = request.data.get('ids')
+    if not isinstance(ids, list) or not ids:
+        return Response(
+            {'error': 'ids must be a non-empty list'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(ids) > settings.PROCESSING_BATCH_MAX_ITEMS:
+        return Response(
+            {'error': f'At most {settings.PROCESSING_BATCH_MAX_ITEMS} ids per batch'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
     
     try:
-        # Import modules
-        process_signal_file, calculate_all_metrics = get_preprocessing_modules()
-        
-        # Preprocess
-        processed_data = process_signal_file(file_path)
-        
-        # Calculate metrics
-        metrics = calculate_all_metrics(processed_data)
-        
-        # Save results
-        signal_data.processed_data = processed_data
-        signal_data.metrics = metrics
-        from django.utils import timezone
-        signal_data.processed_at = timezone.now()
-        signal_data.save()
+        options = _parse_metric_options(request.data)
+    except (TypeError, ValueError) as e:
+        return Response(
+            {'error': f'Invalid metric options: {e}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    valid_ids = []
+    for data_id in ids:
+        try:
+            valid_ids.append(uuid.UUID(str(data_id)))
+        except ValueError:
+            pass
+    records = SignalData.objects.filter(id__in=valid_ids, user=request.user).in_bulk()
+    expire_jobs(ProcessingJob.objects.filter(signal_data_id__in=records.keys()))
+    active_jobs = {
+        job.signal_data_id: job
+        for job in ProcessingJob.objects.filter(
+            signal_data_id__in=records.keys(),
+            status__in=ProcessingJob.ACTIVE_STATUSES
+        )
+        if job.metric_options == options
+    }
+    
+    batch_id = uuid.uuid4()
+    items = []
+    new_jobs = []
+    for data_id in ids:
+        try:
+            key = uuid.UUID(str(data_id))
+        except ValueError:
+            items.append({'id': data_id, 'job': None, 'error': 'Invalid id'})
+            continue
+        if key not in records:
+            items.append({'id': data_id, 'job': None, 'error': 'Signal data not found'})
+            continue
         
-        return Response({
-            'id': str(signal_data.id),
-            'processed_data': processed_data,
-            'metrics': metrics
-        })
+        # Reuse the job already queued or running for this record
+        job = active_jobs.get(key)
+        if job is None:
+            job = ProcessingJob(
+                user=request.user, signal_data_id=key, batch_id=batch_id, **_job_fields(options)
+            )
+            active_jobs[key] = job
+            new_jobs.append(job)
+        items.append({'id': str(key), 'job': job, 'error': None})
     
-    except Exception as e:
+    if new_jobs:
+        ProcessingJob.objects.bulk_create(new_jobs)
+        enqueue_batch([job.id for job in new_jobs])
+    
+    for item in items:
+        if item['job'] is not None:
+            item['job'] = ProcessingJobSerializer(item['job']).data
+    
+    return Response(
+        {'batch_id': str(batch_id), 'items': items},
+        status=status.HTTP_202_ACCEPTED
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_batch(request, batch_id):
+    """Get state of every job queued in a batch"""
+    jobs = ProcessingJob.objects.filter(batch_id=batch_id, user=request.user).order_by('created_at')
+    if not jobs:
         return Response(
-            {'error': f'Processing failed: {str(e)}'},
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            {'error': 'Batch not found'},
+            status=status.HTTP_404_NOT_FOUND
         )
+    
+    counts = {}
+    for job in jobs:
+        counts[job.status] = counts.get(job.status, 0) + 1
+    
+    return Response({
+        'batch_id': str(batch_id),
+        'finished': not any(status_ in counts for status_ in ProcessingJob.ACTIVE_STATUSES),
+        'counts': counts,
+        'jobs': ProcessingJobSerializer(jobs, many=True).data
+    })
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+def get_job(request, job_id):
+    """Get state and progress of a processing job"""
+    try:
+        job = ProcessingJob.objects.get(id=job_id, user=request.user)
+    except ProcessingJob.DoesNotExist:
+        return Response(
+            {'error': 'Job not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    return Response(ProcessingJobSerializer(job).data)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def cancel_processing_job(request, job_id):
+    """Cancel a queued or running processing job"""
+    try:
+        job = ProcessingJob.objects.get(id=job_id, user=request.user)
+    except ProcessingJob.DoesNotExist:
+        return Response(
+            {'error': 'Job not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    if job.status not in ProcessingJob.ACTIVE_STATUSES:
+        return Response(
+            {'error': f'Job already {job.status}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    job = cancel_job(job)
+    return Response(ProcessingJobSerializer(job).data)
+
+
+def _parse_range(params):
+    """
+    Sample range (start, stop) and time range (t0, t1) from query parameters
+    
+    Returns:
+        tuple (start, stop, t0, t1), None where not given; raises ValueError
+        if a value is invalid or both kinds of range are given
+    """
+    def get(name, kind):
+        value = params.get(name)
+        return kind(value) if value not in (None, '') else None
+    
+    try:
+        start, stop = get('start', int), get('stop', int)
+        t0, t1 = get('t0', float), get('t1', float)
+    except ValueError:
+        raise ValueError('start, stop must be integers and t0, t1 numbers')
+    if (start is not None or stop is not None) and (t0 is not None or t1 is not None):
+        raise ValueError('give either start/stop or t0/t1')
+    return start, stop, t0, t1
+
+
+# Columns needed to answer a conditional GET (no blob or JSON fields)
+CONDITIONAL_FIELDS = ('id', 'user', 'file_name', 'processed_at', 'processing_version')
+
+
+def _result_etag(request, signal_data, coding=None):
+    """
+    Strong ETag of a result representation (None if not processed)
+    
+    Results only change when the record is reprocessed, so the tag is
+    derived from the record ID, processing version and processed_at, plus
+    the endpoint, query parameters and negotiated format. A content-coding
+    ('gzip') is appended, so each coding of the result has its own tag.
+    """
+    if signal_data.processed_at is None:
+        return None
+    key = '|'.join([
+        str(signal_data.id),
+        str(signal_data.processing_version),
+        signal_data.processed_at.isoformat(),
+        request.path,
+        request.accepted_renderer.format,
+        urlencode(sorted(request.query_params.lists()), doseq=True),
+    ])
+    tag = hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+    return quote_etag(f'{tag}-{coding}' if coding else tag)
+
+
+def _cache_headers(response, etag):
+    """ETag and revalidation headers of a result response (or its 304)"""
+    if etag is not None:
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Accept', 'Accept-Encoding'])
+    return response
+
+
+@api_view(['GET'])
+@renderer_classes([*api_settings.DEFAULT_RENDERER_CLASSES, SignalRenderer])
+@permission_classes([IsAuthenticated])
 def get_result(request, data_id):
-    """Get processing result"""
+    """
+    Get processing result
+    
+    processed_data can be limited to a sample range (start, stop) or a time
+    range in seconds (t0, t1) and to the given channels; it is streamed, so
+    memory use does not grow with the recording length. Sent as binary
+    arrays with Accept: application/vnd.herolab.signal (see api.renderers).
+    JSON is gzip-compressed on the fly; responses carry an ETag and
+    If-None-Match gets a 304 without loading the stored results.
+    
+    metrics, metric_channels, spectral_method and h select the metrics
+    returned (see _parse_metric_options); without them the stored metrics
+    of the processing run are returned as is.
+    """
     try:
-        signal_data = SignalData.objects.get(id=data_id, user=request.user)
+        signal_data = SignalData.objects.only(*CONDITIONAL_FIELDS).get(id=data_id, user=request.user)
     except SignalData.DoesNotExist:
         return Response(
             {'error': 'Signal data not found'},
             status=status.HTTP_404_NOT_FOUND
         )
     
-    if not signal_data.processed_data:
+    # Answered from the metadata columns, before the blob is loaded. Raw
+    # float arrays barely compress; JSON text shrinks ~2.7x
+    binary = request.accepted_renderer.format == 'signal'
+    gzip = not binary and accepts_gzip(request)
+    etag = _result_etag(request, signal_data, 'gzip' if gzip else None)
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return _cache_headers(not_modified, etag)
+    signal_data.refresh_from_db(fields=['processed_blob', 'metrics', 'timings'])
+    
+    if not signal_data.has_processed_data:
         return Response(
             {'error': 'Data not processed yet'},
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    return Response({
+    try:
+        start, stop, t0, t1 = _parse_range(request.query_params)
+        channels = _parse_names(request.query_params.get('channels'), SIGNAL_CHANNELS, 'channels')
+    except ValueError as e:
+        return Response(
+            {'error': f'Invalid result options: {e}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    # Selected metrics are computed on first access and memoized. Metric
+    # channels have their own parameter: channels only selects the data
+    selection = ('metrics', 'metric_channels', 'spectral_method', 'h')
+    if any(name in request.query_params for name in selection):
+        try:
+            options = _parse_metric_options(request.query_params, 'metric_channels')
+        except (TypeError, ValueError) as e:
+            return Response(
+                {'error': f'Invalid metric options: {e}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        metrics = get_metrics(signal_data, **options)
+    else:
+        metrics = signal_data.metrics
+    
+    # processed_data is streamed block by block from the encoded blob
+    blob = signal_data.processed_blob
+    header = read_header(blob)
+    start, stop = sample_range(header, start, stop, t0, t1, blob)
+    response = streaming_result_response({
         'id': str(signal_data.id),
         'file_name': signal_data.file_name,
-        'processed_data': signal_data.processed_data,
-        'metrics': signal_data.metrics,
-        'processed_at': signal_data.processed_at
-    })
+        'metrics': metrics,
+        'processed_at': signal_data.processed_at,
+        'timings': signal_data.timings,
+        'range': {'start': start, 'stop': stop, 'length': header[0]['length']}
+    }, blob, channels, start, stop, binary=binary)
+    response = _cache_headers(response, etag)
+    return gzip_streaming_response(request, response) if gzip else response
+
+
+@api_view(['GET'])
+@renderer_classes([*api_settings.DEFAULT_RENDERER_CLASSES, SignalRenderer])
+@permission_classes([IsAuthenticated])
+def get_window(request, data_id):
+    """
+    Get downsampled points of one channel for a time range and pixel width
+    (binary arrays with Accept: application/vnd.herolab.signal, JSON gzip
+    compressed)
+    """
+    from preprocessing.downsample import open_pyramid, query_window
+    
+    try:
+        signal_data = SignalData.objects.only(*CONDITIONAL_FIELDS).get(id=data_id, user=request.user)
+    except SignalData.DoesNotExist:
+        return Response(
+            {'error': 'Signal data not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    # Answered from the metadata columns, before the blob is loaded
+    binary = request.accepted_renderer.format == 'signal'
+    gzip = not binary and accepts_gzip(request)
+    etag = _result_etag(request, signal_data, 'gzip' if gzip else None)
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return _cache_headers(not_modified, etag)
+    signal_data.refresh_from_db(fields=['processed_blob'])
+    
+    if not signal_data.has_processed_data:
+        return Response(
+            {'error': 'Data not processed yet'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    channel = request.query_params.get('channel', 'channel1')
+    if channel not in SIGNAL_CHANNELS:
+        return Response(
+            {'error': f'channel must be one of {", ".join(SIGNAL_CHANNELS)}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        t0 = request.query_params.get('t0')
+        t1 = request.query_params.get('t1')
+        t0 = float(t0) if t0 not in (None, '') else None
+        t1 = float(t1) if t1 not in (None, '') else None
+        width = int(request.query_params.get('width', 1000))
+    except ValueError:
+        return Response(
+            {'error': 't0, t1 must be numbers and width an integer'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    width = min(max(width, 1), settings.SIGNAL_WINDOW_MAX_WIDTH)
+    
+    pyramid_dir = get_pyramid_dir(signal_data)
+    pyramid = open_pyramid(pyramid_dir)
+    if pyramid is None:
+        # Pyramid missing (processed before pyramids existed): build it once
+        build_signal_pyramid(signal_data, signal_data.processed_data)
+        pyramid = open_pyramid(pyramid_dir)
+    
+    blob = signal_data.processed_blob
+    header = read_header(blob)
+    
+    def read_raw(name, start, stop):
+        return decode_channel(blob, name, start, stop, header=header)
+    
+    window = query_window(pyramid, channel, t0, t1, width, read_raw)
+    data = {
+        'id': str(signal_data.id),
+        'channel': channel,
+        'level': int(window['level']),
+        'bucket': int(window['bucket']),
+        'time': window['time'],
+        'values': window['values']
+    }
+    
+    if binary:
+        data = encode_signal(data, dtype=settings.PROCESSED_DATA_DTYPE, compression=None)
+    response = _cache_headers(Response(data), etag)
+    return gzip_response(request, response) if gzip else response
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def list_data(request):
-    """List all signal data for current user"""
-    signal_data_list = SignalData.objects.filter(user=request.user)
-    serializer = SignalDataSerializer(signal_data_list, many=True)
-    return Response(serializer.data)
+    """List signal data for current user (paginated metadata, no payload)"""
+    signal_data_list = SignalData.objects.filter(user=request.user).select_related('user').only(
+        *SignalDataSummarySerializer.ONLY_FIELDS
+    )
+    paginator = api_settings.DEFAULT_PAGINATION_CLASS()
+    page = paginator.paginate_queryset(signal_data_list, request)
+    serializer = SignalDataSummarySerializer(page, many=True)
+    return paginator.get_paginated_response(serializer.data)
 
 
 @api_view(['DELETE'])
@@ -224,14 +772,22 @@ def delete_data(request, data_id):
             status=status.HTTP_404_NOT_FOUND
         )
     
-    # Delete the file from storage
-    if signal_data.original_file:
+    # Delete the file from storage (unless shared with a duplicate upload)
+    shared = SignalData.objects.filter(
+        original_file=signal_data.original_file.name
+    ).exclude(id=signal_data.id).exists()
+    if signal_data.original_file and not shared:
         try:
             signal_data.original_file.delete(save=False)
         except Exception as e:
             # Log error but continue with deletion
             print(f"Error deleting file: {e}")
     
+    # Delete the parsed columnar cache and the display pyramid
+    from preprocessing.cache import delete_signal_cache
+    delete_signal_cache(get_cache_dir(signal_data))
+    delete_signal_cache(get_pyramid_dir(signal_data))
+    
     # Delete the database record
     signal_data.delete()
     
@@ -308,16 +864,77 @@ def create_calculation(request):
         )
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def create_calculations_batch(request):
+    """Create many calculations (HR, PTT, MBP) in one request"""
+    items = request.data.get('items')
+    if not isinstance(items, list) or not items:
+        return Response(
+            {'error': 'items must be a non-empty list'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(items) > settings.CALCULATION_BATCH_MAX_ITEMS:
+        return Response(
+            {'error': f'At most {settings.CALCULATION_BATCH_MAX_ITEMS} items per batch'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    from calculator.metrics import calculate_all_manual_batch
+    
+    # Validate every row, invalid rows are reported instead of failing the batch
+    results = [{'index': i, 'calculation': None, 'error': None} for i in range(len(items))]
+    rows = []
+    for i, item in enumerate(items):
+        serializer = CalculationDataInputSerializer(data=item)
+        if serializer.is_valid():
+            rows.append((i, serializer.validated_data))
+        else:
+            results[i]['error'] = serializer.errors
+    
+    calculations = []
+    if rows:
+        fields = ('ri', 'ri_next', 'foot_j', 'r_j', 'h')
+        values = {field: [data[field] for _, data in rows] for field in fields}
+        computed = calculate_all_manual_batch(**values)
+        
+        for k, (i, data) in enumerate(rows):
+            if computed['errors'][k] is not None:
+                results[i]['error'] = computed['errors'][k]
+                continue
+            calculation = CalculationData(
+                user=request.user,
+                hr=float(computed['hr'][k]),
+                ptt=float(computed['ptt'][k]),
+                mbp=float(computed['mbp'][k]),
+                file_name=data.get('file_name', '') or ''
+            )
+            calculations.append((i, calculation))
+    
+    if calculations:
+        CalculationData.objects.bulk_create([calculation for _, calculation in calculations])
+        serialized = CalculationDataSerializer([c for _, c in calculations], many=True).data
+        for (i, _), data in zip(calculations, serialized):
+            results[i]['calculation'] = data
+    
+    return Response(
+        {'created': len(calculations), 'results': results},
+        status=status.HTTP_201_CREATED if calculations else status.HTTP_400_BAD_REQUEST
+    )
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def list_calculations(request):
     """List all calculations for current user"""
     try:
-        calculations = CalculationData.objects.filter(user=request.user).order_by('-created_at')
-        count = calculations.count()
-        print(f"Found {count} calculations for user {request.user.id}")
-        serializer = CalculationDataSerializer(calculations, many=True)
-        return Response(serializer.data)
+        calculations = CalculationData.objects.filter(user=request.user).select_related('user').only(
+            *CalculationDataSerializer.ONLY_FIELDS
+        ).order_by('-created_at')
+        paginator = api_settings.DEFAULT_PAGINATION_CLASS()
+        page = paginator.paginate_queryset(calculations, request)
+        serializer = CalculationDataSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
     except Exception as e:
         print(f"Error in list_calculations: {e}")
         import traceback
@@ -10,3 +10,9 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hero_lab.settings')
 
 application = get_asgi_application()
 
+# Serving processes only (runserver loads this module too): heartbeat the jobs
+# of this process and take over the ones left behind by a stopped server
+from api.jobs import start_monitor  # noqa: E402
+
+start_monitor()
+
@@ -108,6 +108,58 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Uploads are hashed while streamed in (SignalData.content_hash, deduplication)
+FILE_UPLOAD_HANDLERS = [
+    'api.uploadhandlers.HashingUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+# Largest chunk accepted by the chunked upload API (bytes per PUT)
+UPLOAD_CHUNK_MAX_SIZE = int(os.environ.get('UPLOAD_CHUNK_MAX_SIZE', str(64 * 1024 * 1024)))
+
+# Upload sessions not updated for this long are deleted with their chunks (seconds)
+UPLOAD_SESSION_EXPIRY = int(os.environ.get('UPLOAD_SESSION_EXPIRY', str(24 * 60 * 60)))
+
+# Columnar cache of parsed uploads (one sub-directory per SignalData)
+SIGNAL_CACHE_ROOT = MEDIA_ROOT / 'cache'
+
+# Min/max downsampling pyramids for signal display (one sub-directory per SignalData)
+SIGNAL_PYRAMID_ROOT = MEDIA_ROOT / 'pyramids'
+
+# Upper bound of the pixel width accepted by the window endpoint
+SIGNAL_WINDOW_MAX_WIDTH = 10000
+
+# Worker threads of the background processing job queue
+PROCESSING_WORKERS = int(os.environ.get('PROCESSING_WORKERS', '2'))
+
+# Job monitor: heartbeat period of the jobs a process holds, and the age
+# of the last heartbeat after which a queued/running job is orphaned
+# (seconds)
+PROCESSING_HEARTBEAT_INTERVAL = float(os.environ.get('PROCESSING_HEARTBEAT_INTERVAL', '15'))
+PROCESSING_JOB_TIMEOUT = float(os.environ.get('PROCESSING_JOB_TIMEOUT', '60'))
+
+# Batch processing: max records per request, records saved per transaction
+PROCESSING_BATCH_MAX_ITEMS = int(os.environ.get('PROCESSING_BATCH_MAX_ITEMS', '100'))
+PROCESSING_BATCH_WRITE_SIZE = int(os.environ.get('PROCESSING_BATCH_WRITE_SIZE', '10'))
+
+# Max rows per batch calculation request
+CALCULATION_BATCH_MAX_ITEMS = int(os.environ.get('CALCULATION_BATCH_MAX_ITEMS', '1000'))
+
+# Worker processes for per-channel metrics (1 = compute channels serially)
+METRICS_WORKERS = int(os.environ.get('METRICS_WORKERS', '1'))
+
+# Preprocessing stages applied before results are stored: baseline wander
+# removal ('median', 'mean' or empty) and per-channel filters (1 = on).
+# They are part of api.processing.processing_key, so stored results of
+# identical files computed with other values are not reused.
+SIGNAL_BASELINE = os.environ.get('SIGNAL_BASELINE', '') or None
+SIGNAL_FILTERS = os.environ.get('SIGNAL_FILTERS', '0') == '1'
+
+# Binary encoding of SignalData.processed_data (see api.codec)
+PROCESSED_DATA_DTYPE = os.environ.get('PROCESSED_DATA_DTYPE', '<f8')
+PROCESSED_DATA_COMPRESSION = os.environ.get('PROCESSED_DATA_COMPRESSION', 'zlib') or None
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -173,6 +225,7 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'x-chunk-sha256',
 ]
 
 # Expose headers that frontend might need
@@ -5,13 +5,14 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from api.urls import auth_urlpatterns, user_urlpatterns, data_urlpatterns, calculation_urlpatterns
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/auth/', include('api.urls')),
-    path('api/data/', include('api.urls')),
-    path('api/user/', include('api.urls')),
-    path('api/calculations/', include('api.urls')),
+    path('api/auth/', include(auth_urlpatterns)),
+    path('api/data/', include(data_urlpatterns)),
+    path('api/user/', include(user_urlpatterns)),
+    path('api/calculations/', include(calculation_urlpatterns)),
 ]
 
 if settings.DEBUG:
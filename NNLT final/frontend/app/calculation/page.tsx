@@ -21,6 +21,7 @@ export default function CalculationPage() {
     mbp: number | null;
   } | null>(null);
   const [calculations, setCalculations] = useState<CalculationData[]>([]);
+  const [nextPage, setNextPage] = useState<number | null>(null);
   const [loading, setLoading] = useState(false);
   const [submitting, setSubmitting] = useState(false);
   const [deleting, setDeleting] = useState<string | null>(null);
@@ -29,12 +30,12 @@ export default function CalculationPage() {
     loadCalculations();
   }, []);
 
-  const loadCalculations = async () => {
+  const loadCalculations = async (page = 1) => {
     try {
       setLoading(true);
-      const data = await calculationAPI.list();
-      console.log("Loaded calculations:", data); // Debug log
-      setCalculations(data);
+      const data = await calculationAPI.list(page);
+      setCalculations(page === 1 ? data.results : [...calculations, ...data.results]);
+      setNextPage(data.next ? page + 1 : null);
     } catch (err) {
       console.error("Failed to load calculations:", err);
     } finally {
@@ -330,7 +331,7 @@ export default function CalculationPage() {
       {/* History Table */}
       <div className="card mt-6">
         <h2 className="text-2xl font-semibold mb-4">Calculation History</h2>
-        {loading ? (
+        {loading && calculations.length === 0 ? (
           <div className="loading">Loading...</div>
         ) : calculations.length === 0 ? (
           <p className="text-gray-600">No calculations yet.</p>
@@ -399,6 +400,15 @@ export default function CalculationPage() {
                 ))}
               </tbody>
             </table>
+            {nextPage && (
+              <button
+                className="btn btn-primary mt-4"
+                onClick={() => loadCalculations(nextPage)}
+                disabled={loading}
+              >
+                {loading ? "Loading..." : "Load more"}
+              </button>
+            )}
           </div>
         )}
       </div>
@@ -2,7 +2,7 @@
 
 import { useState, useEffect } from "react";
 import { useRouter } from "next/navigation";
-import { dataAPI, SignalData } from "@/lib/api";
+import { dataAPI, SignalData, CHUNKED_UPLOAD_THRESHOLD } from "@/lib/api";
 import { clearAuthTokens } from "@/lib/auth";
 import SignalUpload from "@/components/SignalUpload";
 import SignalVisualization from "@/components/SignalVisualization";
@@ -12,6 +12,7 @@ export default function DashboardPage() {
   const router = useRouter();
   const [signalDataList, setSignalDataList] = useState<SignalData[]>([]);
   const [selectedData, setSelectedData] = useState<SignalData | null>(null);
+  const [nextPage, setNextPage] = useState<number | null>(null);
   const [loading, setLoading] = useState(false);
   const [processing, setProcessing] = useState<string | null>(null);
   const [deleting, setDeleting] = useState<string | null>(null);
@@ -25,11 +26,12 @@ export default function DashboardPage() {
     loadData();
   }, []);
 
-  const loadData = async () => {
+  const loadData = async (page = 1) => {
     try {
       setLoading(true);
-      const data = await dataAPI.list();
-      setSignalDataList(data);
+      const data = await dataAPI.list(page);
+      setSignalDataList(page === 1 ? data.results : [...signalDataList, ...data.results]);
+      setNextPage(data.next ? page + 1 : null);
     } catch (err) {
       console.error("Failed to load data:", err);
     } finally {
@@ -40,9 +42,13 @@ export default function DashboardPage() {
   const handleUpload = async (file: File) => {
     try {
       setLoading(true);
-      const newData = await dataAPI.upload(file);
+      const newData =
+        file.size > CHUNKED_UPLOAD_THRESHOLD
+          ? await dataAPI.uploadChunked(file)
+          : await dataAPI.upload(file);
       setSignalDataList([newData, ...signalDataList]);
-      setSelectedData(newData);
+      // Identical content already processed: its results are reused
+      await handleSelect(newData);
     } catch (err) {
       console.error("Upload failed:", err);
       alert("Upload failed");
@@ -55,7 +61,7 @@ export default function DashboardPage() {
     try {
       setProcessing(dataId);
       await dataAPI.process(dataId);
-      const result = await dataAPI.getResult(dataId);
+      const result = await loadResult(dataId);
       setSignalDataList(
         signalDataList.map((d) => (d.id === dataId ? result : d))
       );
@@ -68,6 +74,23 @@ export default function DashboardPage() {
     }
   };
 
+  // Metrics and sample count only: the charts fetch downsampled windows of
+  // the visible range themselves
+  const loadResult = (dataId: string) => dataAPI.getResult(dataId, { start: 0, stop: 0 });
+
+  // The list only carries metadata; fetch the results when a processed file is selected
+  const handleSelect = async (data: SignalData) => {
+    setSelectedData(data);
+    if (!(data.is_processed || data.processed_at) || data.range) return;
+    try {
+      const result = await loadResult(data.id);
+      setSignalDataList((list) => list.map((d) => (d.id === data.id ? result : d)));
+      setSelectedData((current) => (current?.id === data.id ? result : current));
+    } catch (err) {
+      console.error("Failed to load result:", err);
+    }
+  };
+
   const handleDeleteClick = (dataId: string, fileName: string) => {
     setDeleteModal({ isOpen: true, dataId, fileName });
   };
@@ -146,7 +169,7 @@ export default function DashboardPage() {
                     ? "bg-gray-100"
                     : "bg-white hover:bg-gray-50"
                 }`}
-                onClick={() => setSelectedData(data)}
+                onClick={() => handleSelect(data)}
               >
                 <div className="flex justify-between items-center gap-4">
                   <div className="flex-1 min-w-0">
@@ -165,7 +188,7 @@ export default function DashboardPage() {
                     </p>
                   </div>
                   <div className="flex items-center gap-3 flex-shrink-0 h-10">
-                    {!data.processed_data ? (
+                    {!data.processed_data && !data.is_processed ? (
                       <button
                         className="btn btn-primary whitespace-nowrap h-10 flex items-center justify-center text-lg"
                         onClick={(e) => {
@@ -196,11 +219,20 @@ export default function DashboardPage() {
                 </div>
               </div>
             ))}
+            {nextPage && (
+              <button
+                className="btn btn-primary"
+                onClick={() => loadData(nextPage)}
+                disabled={loading}
+              >
+                {loading ? "Loading..." : "Load more"}
+              </button>
+            )}
           </div>
         )}
       </div>
 
-      {selectedData && selectedData.processed_data && (
+      {selectedData && selectedData.range && (
         <div className="card">
           <h2 className="text-2xl font-semibold mb-4">
             Visualization & Results
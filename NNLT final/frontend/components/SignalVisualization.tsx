@@ -1,6 +1,6 @@
 'use client';
 
-import { useMemo, useState, useRef } from 'react';
+import { useEffect, useMemo, useState, useRef } from 'react';
 import {
   LineChart,
   Line,
@@ -10,95 +10,131 @@ import {
   Tooltip,
   Legend,
   ResponsiveContainer,
-  Brush,
   ReferenceArea,
   ReferenceLine,
 } from 'recharts';
-import { SignalData } from '@/lib/api';
+import { dataAPI, SignalData } from '@/lib/api';
 
 interface SignalVisualizationProps {
   data: SignalData;
 }
 
-interface ZoomState {
-  xDomain: [number, number] | null;
-  yDomain: [number, number] | null;
-}
+// Horizontal chart margins (left + right), not part of the plot width
+const CHART_MARGIN_X = 80;
+// Plot widths are rounded up to this step so small resizes reuse the cached window
+const WIDTH_STEP = 100;
+// Smallest zoom selection (ms)
+const MIN_SELECTION = 0.01;
 
 function ChartWithZoom({ 
-  chartData, 
+  dataId, 
   channel 
 }: { 
-  chartData: Array<{ time: number; channel1: number; channel2: number; channel3: number }>;
-  channel: { key: string; name: string; color: string; dataKey: string };
+  dataId: string;
+  channel: { key: string; name: string; color: string };
 }) {
-  const [zoom, setZoom] = useState<ZoomState>({ xDomain: null, yDomain: null });
+  // Visible time range in ms (null = whole recording)
+  const [xDomain, setXDomain] = useState<[number, number] | null>(null);
   const [isSelecting, setIsSelecting] = useState(false);
   const [selectionStart, setSelectionStart] = useState<number | null>(null);
   const [selectionEnd, setSelectionEnd] = useState<number | null>(null);
+  const [chartData, setChartData] = useState<Array<{ time: number; value: number }>>([]);
+  const [fullXDomain, setFullXDomain] = useState<[number, number]>([0, 0]);
+  const [width, setWidth] = useState(1000);
+  const [loading, setLoading] = useState(false);
+  const [error, setError] = useState<string | null>(null);
+  const containerRef = useRef<HTMLDivElement>(null);
   const chartRef = useRef<any>(null);
 
-  // Calculate full domain ranges
-  const fullXDomain = useMemo(() => {
-    if (chartData.length === 0) return [0, 0];
-    const times = chartData.map(d => d.time);
-    return [Math.min(...times), Math.max(...times)] as [number, number];
-  }, [chartData]);
+  // Plot width in pixels: the window endpoint returns about one point pair per pixel
+  useEffect(() => {
+    const element = containerRef.current;
+    if (!element) return;
+    const observer = new ResizeObserver(([entry]) => {
+      const plotWidth = Math.max(entry.contentRect.width - CHART_MARGIN_X, WIDTH_STEP);
+      setWidth(Math.ceil(plotWidth / WIDTH_STEP) * WIDTH_STEP);
+    });
+    observer.observe(element);
+    return () => observer.disconnect();
+  }, []);
+
+  // Fetch the downsampled window of the visible range whenever it or the width changes
+  useEffect(() => {
+    let cancelled = false;
+    setLoading(true);
+    dataAPI
+      .getWindowBinary(dataId, {
+        channel: channel.key,
+        t0: xDomain ? xDomain[0] / 1000 : undefined,
+        t1: xDomain ? xDomain[1] / 1000 : undefined,
+        width,
+      })
+      .then(({ arrays }) => {
+        if (cancelled) return;
+        const { time, values } = arrays;
+        // Convert: time from seconds to milliseconds, amplitude from Volt to millivolt
+        const points = Array.from(time, (t, i) => ({ time: t * 1000, value: values[i] * 1000 }));
+        setChartData(points);
+        if (!xDomain && points.length > 0) {
+          setFullXDomain([points[0].time, points[points.length - 1].time]);
+        }
+        setError(null);
+      })
+      .catch((err) => {
+        if (cancelled) return;
+        console.error('Failed to load window:', err);
+        setError('Failed to load signal window');
+      })
+      .finally(() => {
+        if (!cancelled) setLoading(false);
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, [dataId, channel.key, xDomain, width]);
 
-  const fullYDomain = useMemo(() => {
-    if (chartData.length === 0) return [0, 0];
-    const values = chartData.map(d => d[channel.dataKey as keyof typeof d] as number).filter(v => !isNaN(v));
-    if (values.length === 0) return [0, 0];
+  // Amplitude range of the points on screen
+  const yDomain = useMemo(() => {
+    const values = chartData.map(d => d.value).filter(v => !isNaN(v));
+    if (values.length === 0) return [0, 0] as [number, number];
     const min = Math.min(...values);
     const max = Math.max(...values);
     const range = max - min;
     const padding = range > 0 ? range * 0.1 : Math.abs(min) * 0.1 || 0.01; // 10% padding
     return [min - padding, max + padding] as [number, number];
-  }, [chartData, channel.dataKey]);
+  }, [chartData]);
 
-  const currentXDomain = zoom.xDomain || fullXDomain;
-  const currentYDomain = zoom.yDomain || fullYDomain;
+  const currentXDomain = xDomain || fullXDomain;
 
   const handleReset = () => {
-    setZoom({ xDomain: null, yDomain: null });
+    setXDomain(null);
     setIsSelecting(false);
     setSelectionStart(null);
     setSelectionEnd(null);
   };
 
-  const handleBrushChange = (brushData: any) => {
-    if (!brushData || !brushData.startIndex && brushData.startIndex !== 0 || !brushData.endIndex && brushData.endIndex !== 0) {
+  // Show [xMin, xMax] (clamped to the recording); the whole recording resets the zoom
+  const zoomTo = (xMin: number, xMax: number) => {
+    const [fullMin, fullMax] = fullXDomain;
+    const span = Math.min(xMax - xMin, fullMax - fullMin);
+    const start = Math.min(Math.max(xMin, fullMin), fullMax - span);
+    if (span >= fullMax - fullMin) {
       handleReset();
       return;
     }
+    setXDomain([start, start + span]);
+  };
 
-    const startIndex = brushData.startIndex;
-    const endIndex = brushData.endIndex;
-    
-    if (startIndex === 0 && endIndex === chartData.length - 1) {
-      // Full range selected, reset zoom
-      handleReset();
-      return;
-    }
+  const handleZoomOut = () => {
+    const [xMin, xMax] = currentXDomain;
+    const span = xMax - xMin;
+    zoomTo(xMin - span / 2, xMax + span / 2);
+  };
 
-    const xMin = chartData[startIndex]?.time;
-    const xMax = chartData[endIndex]?.time;
-    
-    if (xMin !== undefined && xMax !== undefined && xMax > xMin) {
-      const zoomedData = chartData.slice(startIndex, endIndex + 1);
-      if (zoomedData.length > 0) {
-        const values = zoomedData.map(d => d[channel.dataKey as keyof typeof d] as number).filter(v => !isNaN(v));
-        if (values.length > 0) {
-          const yMin = Math.min(...values);
-          const yMax = Math.max(...values);
-          const padding = (yMax - yMin) * 0.1 || 0.01;
-          setZoom({
-            xDomain: [xMin, xMax],
-            yDomain: [yMin - padding, yMax + padding]
-          });
-        }
-      }
-    }
+  const handlePan = (direction: -1 | 1) => {
+    const [xMin, xMax] = currentXDomain;
+    const step = ((xMax - xMin) / 2) * direction;
+    zoomTo(xMin + step, xMax + step);
   };
 
   const handleMouseDown = (e: any) => {
@@ -126,20 +162,9 @@ function ChartWithZoom({
       const xMin = Math.min(selectionStart, selectionEnd);
       const xMax = Math.max(selectionStart, selectionEnd);
       
-      if (xMax - xMin > 0.01) { // Minimum selection size
-        const zoomedData = chartData.filter(d => d.time >= xMin && d.time <= xMax);
-        if (zoomedData.length > 0) {
-          const values = zoomedData.map(d => d[channel.dataKey as keyof typeof d] as number).filter(v => !isNaN(v));
-          if (values.length > 0) {
-            const yMin = Math.min(...values);
-            const yMax = Math.max(...values);
-            const padding = (yMax - yMin) * 0.1 || 0.01;
-            setZoom({
-              xDomain: [xMin, xMax],
-              yDomain: [yMin - padding, yMax + padding]
-            });
-          }
-        }
+      if (xMax - xMin > MIN_SELECTION) {
+        // The finer window of the selection is fetched by the effect above
+        zoomTo(xMin, xMax);
       }
     }
     setIsSelecting(false);
@@ -147,7 +172,7 @@ function ChartWithZoom({
     setSelectionEnd(null);
   };
 
-  const isZoomed = zoom.xDomain !== null || zoom.yDomain !== null;
+  const isZoomed = xDomain !== null;
 
   // Calculate grid spacing based on 1mV : 40ms ratio
   const gridSpacingX = 40; // 40ms per small square
@@ -167,24 +192,52 @@ function ChartWithZoom({
   // Generate grid lines for Y axis (horizontal lines every 1mV)
   const yGridLines = useMemo(() => {
     const lines: number[] = [];
-    const start = Math.floor(currentYDomain[0] / gridSpacingY) * gridSpacingY;
-    const end = Math.ceil(currentYDomain[1] / gridSpacingY) * gridSpacingY;
+    const start = Math.floor(yDomain[0] / gridSpacingY) * gridSpacingY;
+    const end = Math.ceil(yDomain[1] / gridSpacingY) * gridSpacingY;
     for (let y = start; y <= end; y += gridSpacingY) {
       lines.push(y);
     }
     return lines;
-  }, [currentYDomain, gridSpacingY]);
+  }, [yDomain, gridSpacingY]);
 
   return (
-    <div className="relative">
+    <div className="relative" ref={containerRef}>
       {isZoomed && (
-        <button
-          onClick={handleReset}
-          className="absolute top-2 right-2 z-10 px-4 py-2 bg-blue-500 text-white text-sm font-medium rounded-md hover:bg-blue-600 transition-colors shadow-lg"
-          title="Reset to full view"
-        >
-          ↺ Reset View
-        </button>
+        <div className="absolute top-2 right-2 z-10 flex gap-2">
+          <button
+            onClick={() => handlePan(-1)}
+            className="px-3 py-2 bg-blue-500 text-white text-sm font-medium rounded-md hover:bg-blue-600 transition-colors shadow-lg"
+            title="Pan left"
+          >
+            ←
+          </button>
+          <button
+            onClick={() => handlePan(1)}
+            className="px-3 py-2 bg-blue-500 text-white text-sm font-medium rounded-md hover:bg-blue-600 transition-colors shadow-lg"
+            title="Pan right"
+          >
+            →
+          </button>
+          <button
+            onClick={handleZoomOut}
+            className="px-3 py-2 bg-blue-500 text-white text-sm font-medium rounded-md hover:bg-blue-600 transition-colors shadow-lg"
+            title="Zoom out"
+          >
+            −
+          </button>
+          <button
+            onClick={handleReset}
+            className="px-4 py-2 bg-blue-500 text-white text-sm font-medium rounded-md hover:bg-blue-600 transition-colors shadow-lg"
+            title="Reset to full view"
+          >
+            ↺ Reset View
+          </button>
+        </div>
+      )}
+      {(loading || error) && (
+        <div className="absolute top-2 left-12 z-10 text-xs text-gray-600">
+          {error || 'Loading...'}
+        </div>
       )}
       <ResponsiveContainer width="100%" height={400}>
         <LineChart 
@@ -219,15 +272,15 @@ function ChartWithZoom({
             dataKey="time" 
             label={{ value: 'Time (ms)', position: 'bottom', offset: 10 }}
             tickFormatter={(value) => value.toFixed(0)}
-            domain={zoom.xDomain || undefined}
-            allowDataOverflow={false}
+            domain={currentXDomain}
+            allowDataOverflow={true}
             type="number"
             scale="linear"
             tick={{ fontSize: 12 }}
           />
           <YAxis 
             label={{ value: 'Amplitude (mV)', angle: -90, position: 'left', offset: 10 }}
-            domain={zoom.yDomain || fullYDomain}
+            domain={yDomain}
             allowDataOverflow={false}
             type="number"
             scale="linear"
@@ -248,43 +301,22 @@ function ChartWithZoom({
             />
           )}
           <Line 
-            type="monotone" 
-            dataKey={channel.dataKey} 
+            type="linear" 
+            dataKey="value" 
             stroke={channel.color} 
             name={channel.name}
             dot={false}
             activeDot={{ r: 6, fill: channel.color }}
             strokeWidth={2}
-          />
-          <Brush
-            dataKey="time"
-            height={40}
-            className="brush-black-text"
-            style={{marginRight: 30}}
-            stroke={channel.color}
-            fill={channel.color}
-            fillOpacity={0.3}
-            tickFormatter={(value) => value.toFixed(0)}
-            onChange={handleBrushChange}
-            alwaysShowText={true}
-            startIndex={
-              zoom.xDomain 
-                ? Math.max(0, chartData.findIndex(d => d.time >= zoom.xDomain![0]) || 0)
-                : 0
-            }
-            endIndex={
-              zoom.xDomain 
-                ? Math.min(chartData.length - 1, chartData.findIndex(d => d.time >= zoom.xDomain![1]) || chartData.length - 1)
-                : chartData.length - 1
-            }
+            isAnimationActive={false}
           />
         </LineChart>
       </ResponsiveContainer>
       <div className=" text-xs text-gray-600 text-center">
         {!isZoomed ? (
-          <p>💡 Drag the brush below to select and zoom into a time range</p>
+          <p>💡 Drag across the chart to select and zoom into a time range</p>
         ) : (
-          <p>Zoomed view • Drag brush to change range • Click &quot;Reset View&quot; to return to full view</p>
+          <p>Zoomed view • Drag to zoom further, use ← → to pan • Click &quot;Reset View&quot; to return to full view</p>
         )}
       </div>
     </div>
@@ -292,29 +324,12 @@ function ChartWithZoom({
 }
 
 export default function SignalVisualization({ data }: SignalVisualizationProps) {
-  const chartData = useMemo(() => {
-    if (!data.processed_data) return [];
-
-    const { time, channel1, channel2, channel3 } = data.processed_data;
-    
-    // Sample data for performance (show every Nth point)
-    const sampleRate = Math.max(1, Math.floor(time.length / 2000));
-    
-    // Convert: time from seconds to milliseconds, amplitude from Volt to millivolt
-    return time
-      .map((t, i) => ({
-        time: t * 1000, // Convert seconds to milliseconds
-        channel1: channel1[i] * 1000, // Convert Volt to millivolt
-        channel2: channel2[i] * 1000, // Convert Volt to millivolt
-        channel3: channel3[i] * 1000, // Convert Volt to millivolt
-      }))
-      .filter((_, i) => i % sampleRate === 0);
-  }, [data.processed_data]);
-
+  // Each chart fetches the downsampled window of its visible range
+  // (processed_data is not loaded in full)
   const channels = [
-    { key: 'channel1', name: 'PCG (Phonocardiogram)', color: '#8884d8', dataKey: 'channel1' },
-    { key: 'channel2', name: 'PPG (Photoplethysmgram)', color: '#82ca9d', dataKey: 'channel2' },
-    { key: 'channel3', name: 'ECG (Electrocardiogram)', color: '#ffc658', dataKey: 'channel3' },
+    { key: 'channel1', name: 'PCG (Phonocardiogram)', color: '#8884d8' },
+    { key: 'channel2', name: 'PPG (Photoplethysmgram)', color: '#82ca9d' },
+    { key: 'channel3', name: 'ECG (Electrocardiogram)', color: '#ffc658' },
   ];
 
   const metrics = data.metrics;
@@ -329,7 +344,7 @@ export default function SignalVisualization({ data }: SignalVisualizationProps)
               <h4 className="text-lg font-medium mb-3" style={{ color: channel.color }}>
                 {channel.name}
               </h4>
-              <ChartWithZoom chartData={chartData} channel={channel} />
+              <ChartWithZoom key={data.id} dataId={data.id} channel={channel} />
             </div>
           ))}
         </div>
@@ -55,6 +55,9 @@ export interface SignalData {
   file_size: number;
   uploaded_at: string;
   processed_at?: string;
+  // Set by the list, upload and finalize endpoints, which return metadata only (no processed_data/metrics)
+  is_processed?: boolean;
+  processing_version?: number | null;
   processed_data?: {
     time: number[];
     channel1: number[];
@@ -62,6 +65,156 @@ export interface SignalData {
     channel3: number[];
   };
   metrics?: any;
+  // Per-stage processing timings (result endpoint only)
+  timings?: Record<string, StageTiming>;
+  // Sample range of processed_data (result endpoint only)
+  range?: { start: number; stop: number; length: number };
+}
+
+// Page of a paginated list endpoint (?page=N)
+export interface Paginated<T> {
+  count: number;
+  next: string | null;
+  previous: string | null;
+  results: T[];
+}
+
+export interface StageTiming {
+  wall: number;
+  cpu: number;
+  samples: number | null;
+}
+
+export interface SignalWindow {
+  id: string;
+  channel: string;
+  level: number;
+  bucket: number;
+  time: number[];
+  values: number[];
+}
+
+export interface ProcessingJob {
+  id: string;
+  signal_data: string;
+  batch_id?: string | null;
+  h?: number | null;
+  metric_names?: string[] | null;
+  channels?: string[] | null;
+  spectral_method?: 'fft' | 'welch';
+  status: 'queued' | 'running' | 'succeeded' | 'failed' | 'cancelled';
+  stage: string;
+  progress: number;
+  error: string;
+  cancel_requested: boolean;
+  created_at: string;
+  started_at?: string;
+  finished_at?: string;
+}
+
+export interface ProcessingBatchItem {
+  id: string;
+  job: ProcessingJob | null;
+  error: string | null;
+}
+
+export interface ProcessingBatch {
+  batch_id: string;
+  items: ProcessingBatchItem[];
+}
+
+export interface ProcessingBatchStatus {
+  batch_id: string;
+  finished: boolean;
+  counts: Record<string, number>;
+  jobs: ProcessingJob[];
+}
+
+// Metric selection (omitted = all metrics of all channels, FFT spectrum);
+// h in meters enables per-beat MBP in metrics.pulse_transit
+export interface MetricOptions {
+  metrics?: string[];
+  channels?: string[];
+  spectral_method?: 'fft' | 'welch';
+  h?: number;
+}
+
+// Part of processed_data to return: samples [start, stop) or time t0..t1 (seconds)
+// and signal_channels (sent as channels; MetricOptions.channels only selects metrics)
+export interface ResultRange {
+  start?: number;
+  stop?: number;
+  t0?: number;
+  t1?: number;
+  signal_channels?: string[];
+}
+
+const resultParams = (options?: MetricOptions & ResultRange) => {
+  if (!options) return undefined;
+  const { channels, signal_channels, ...rest } = options;
+  return {
+    ...rest,
+    metrics: options.metrics?.join(','),
+    metric_channels: channels?.join(','),
+    channels: signal_channels?.join(','),
+  };
+};
+
+// Binary signal format (Accept: SIGNAL_MEDIA_TYPE): 'HLSD' | uint32 header length |
+// JSON header | padding to 8 bytes | little-endian arrays. Arrays are typed-array
+// views of the response buffer (no copy); other fields are in extra.
+export const SIGNAL_MEDIA_TYPE = 'application/vnd.herolab.signal';
+
+export interface DecodedSignal {
+  arrays: Record<string, Float64Array | Float32Array>;
+  extra: Record<string, any>;
+}
+
+export function decodeSignal(buffer: ArrayBuffer): DecodedSignal {
+  const view = new DataView(buffer);
+  const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+  if (magic !== 'HLSD') {
+    throw new Error('Invalid signal data');
+  }
+  const headerLength = view.getUint32(4, true);
+  const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 8, headerLength)));
+  if (header.compression !== null) {
+    throw new Error('Compressed signal data is not supported');
+  }
+  const ArrayType = header.dtype === '<f4' ? Float32Array : Float64Array;
+  const payload = 8 + headerLength;
+  const arrays: Record<string, Float64Array | Float32Array> = {};
+  for (const [name, blocks] of Object.entries(header.channels as Record<string, [number, number][]>)) {
+    const [offset, nbytes] = blocks[0] ?? [0, 0];
+    arrays[name] = new ArrayType(buffer, payload + offset, nbytes / ArrayType.BYTES_PER_ELEMENT);
+  }
+  return { arrays, extra: header.extra };
+}
+
+const JOB_POLL_INTERVAL_MS = 1000;
+
+export interface UploadSession {
+  id: string;
+  file_name: string;
+  file_size: number;
+  // Bytes stored so far: offset of the next chunk
+  received: number;
+  max_chunk_size: number;
+  signal_data: string | null;
+  created_at: string;
+  updated_at: string;
+  completed_at: string | null;
+}
+
+// Files above this size are sent with the chunked, resumable upload API
+export const CHUNKED_UPLOAD_THRESHOLD = 16 * 1024 * 1024;
+const UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024;
+const UPLOAD_MAX_RETRIES = 5;
+
+// Hex SHA-256 of one chunk (only the chunk is held in memory)
+async function sha256Hex(chunk: Blob): Promise<string> {
+  const digest = await crypto.subtle.digest('SHA-256', await chunk.arrayBuffer());
+  return Array.from(new Uint8Array(digest), (b) => b.toString(16).padStart(2, '0')).join('');
 }
 
 export interface CalculationData {
@@ -110,18 +263,127 @@ export const dataAPI = {
     return response.data;
   },
 
-  process: async (dataId: string): Promise<any> => {
-    const response = await api.post(`/data/process/${dataId}/`);
+  // Upload in chunks; a failed chunk is retried from the offset the server
+  // reports, so a dropped connection does not restart the upload. Each
+  // chunk carries its SHA-256, verified by the server before it is kept
+  uploadChunked: async (
+    file: File,
+    onProgress?: (received: number, total: number) => void
+  ): Promise<SignalData> => {
+    let session: UploadSession = (
+      await api.post('/data/upload/sessions/', { file_name: file.name, file_size: file.size })
+    ).data;
+    const chunkSize = Math.min(UPLOAD_CHUNK_SIZE, session.max_chunk_size);
+    let retries = 0;
+    while (session.received < file.size) {
+      const offset = session.received;
+      const chunk = file.slice(offset, offset + chunkSize);
+      try {
+        const response = await api.put(`/data/upload/sessions/${session.id}/chunk/`, chunk, {
+          params: { offset },
+          headers: {
+            'Content-Type': 'application/octet-stream',
+            'X-Chunk-SHA256': await sha256Hex(chunk),
+          },
+        });
+        session = response.data;
+        retries = 0;
+        onProgress?.(session.received, file.size);
+      } catch (err) {
+        if (++retries > UPLOAD_MAX_RETRIES) throw err;
+        await new Promise((resolve) => setTimeout(resolve, 1000 * retries));
+        try {
+          session = (await api.get(`/data/upload/sessions/${session.id}/`)).data;
+        } catch {
+          // Keep the last known offset; a wrong one is answered with 409
+        }
+      }
+    }
+    const response = await api.post(`/data/upload/sessions/${session.id}/finalize/`, {});
+    return response.data;
+  },
+
+  // Queue processing and wait until the background job finishes
+  process: async (
+    dataId: string,
+    onProgress?: (job: ProcessingJob) => void,
+    options: MetricOptions = {}
+  ): Promise<ProcessingJob> => {
+    const response = await api.post(`/data/process/${dataId}/`, options);
+    let job: ProcessingJob = response.data;
+    while (job.status === 'queued' || job.status === 'running') {
+      onProgress?.(job);
+      await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+      job = await dataAPI.getJob(job.id);
+    }
+    if (job.status !== 'succeeded') {
+      throw new Error(job.error || `Processing ${job.status}`);
+    }
+    return job;
+  },
+
+  // Queue processing of many records at once (poll with getBatch)
+  processBatch: async (dataIds: string[], options: MetricOptions = {}): Promise<ProcessingBatch> => {
+    const response = await api.post('/data/process/batch/', { ids: dataIds, ...options });
+    return response.data;
+  },
+
+  getBatch: async (batchId: string): Promise<ProcessingBatchStatus> => {
+    const response = await api.get(`/data/batches/${batchId}/`);
     return response.data;
   },
 
-  getResult: async (dataId: string): Promise<SignalData> => {
-    const response = await api.get(`/data/result/${dataId}/`);
+  getJob: async (jobId: string): Promise<ProcessingJob> => {
+    const response = await api.get(`/data/jobs/${jobId}/`);
     return response.data;
   },
 
-  list: async (): Promise<SignalData[]> => {
-    const response = await api.get('/data/list/');
+  cancelJob: async (jobId: string): Promise<ProcessingJob> => {
+    const response = await api.post(`/data/jobs/${jobId}/cancel/`);
+    return response.data;
+  },
+
+  // Selected metrics not computed yet are computed on first request
+  getResult: async (dataId: string, options?: MetricOptions & ResultRange): Promise<SignalData> => {
+    const params = resultParams(options);
+    const response = await api.get(`/data/result/${dataId}/`, { params });
+    return response.data;
+  },
+
+  // Same result as binary arrays: arrays holds time and the channels,
+  // extra the other result fields (metrics, range, ...)
+  getResultBinary: async (dataId: string, options?: MetricOptions & ResultRange): Promise<DecodedSignal> => {
+    const params = resultParams(options);
+    const response = await api.get(`/data/result/${dataId}/`, {
+      params,
+      headers: { Accept: SIGNAL_MEDIA_TYPE },
+      responseType: 'arraybuffer',
+    });
+    return decodeSignal(response.data);
+  },
+
+  getWindow: async (
+    dataId: string,
+    params: { channel: string; t0?: number; t1?: number; width: number }
+  ): Promise<SignalWindow> => {
+    const response = await api.get(`/data/window/${dataId}/`, { params });
+    return response.data;
+  },
+
+  getWindowBinary: async (
+    dataId: string,
+    params: { channel: string; t0?: number; t1?: number; width: number }
+  ): Promise<DecodedSignal> => {
+    const response = await api.get(`/data/window/${dataId}/`, {
+      params,
+      headers: { Accept: SIGNAL_MEDIA_TYPE },
+      responseType: 'arraybuffer',
+    });
+    return decodeSignal(response.data);
+  },
+
+  list: async (page = 1): Promise<Paginated<SignalData>> => {
+    const response = await api.get('/data/list/', { params: { page } });
     return response.data;
   },
 
@@ -130,21 +392,38 @@ export const dataAPI = {
   },
 };
 
+export interface CalculationInput {
+  ri: number;
+  ri_next: number;
+  foot_j: number;
+  r_j: number;
+  h: number;
+  file_name?: string;
+}
+
+export interface CalculationBatchResult {
+  created: number;
+  results: {
+    index: number;
+    calculation: CalculationData | null;
+    error: string | Record<string, string[]> | null;
+  }[];
+}
+
 export const calculationAPI = {
-  create: async (data: {
-    ri: number;
-    ri_next: number;
-    foot_j: number;
-    r_j: number;
-    h: number;
-    file_name?: string;
-  }): Promise<CalculationData> => {
+  create: async (data: CalculationInput): Promise<CalculationData> => {
     const response = await api.post('/calculations/create/', data);
     return response.data;
   },
 
-  list: async (): Promise<CalculationData[]> => {
-    const response = await api.get('/calculations/list/');
+  // Invalid rows are reported per row; the request fails (400) only if no row was saved
+  createBatch: async (items: CalculationInput[]): Promise<CalculationBatchResult> => {
+    const response = await api.post('/calculations/create/batch/', { items });
+    return response.data;
+  },
+
+  list: async (page = 1): Promise<Paginated<CalculationData>> => {
+    const response = await api.get('/calculations/list/', { params: { page } });
     return response.data;
   },
 
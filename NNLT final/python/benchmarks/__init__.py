@@ -0,0 +1 @@
+# Benchmarks for preprocessing and calculator modules
@@ -0,0 +1,83 @@
+"""
+Benchmark: baseline trượt bằng running median / moving average so với
+np.median trên từng cửa sổ, và bản theo chunk so với toàn bộ tín hiệu
+
+Chạy từ thư mục python/:
+    python -m benchmarks.bench_baseline [--samples N] [--window W]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from preprocessing.baseline import (
+    StreamingBaselineRemover,
+    baseline_window_samples,
+    estimate_baseline,
+)
+
+SAMPLING_RATE = 1000.0
+
+# Giới hạn số mẫu cho cách tính np.median từng cửa sổ (O(n * size))
+NAIVE_MAX_SAMPLES = 200_000
+
+
+def make_signal(n_samples, seed=0):
+    """Xung 1.2 Hz + baseline wander 0.1 Hz + nhiễu"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_samples) / SAMPLING_RATE
+    return (np.sin(2 * np.pi * 1.2 * t) ** 15 + 0.5 * np.sin(2 * np.pi * 0.1 * t)
+            + rng.normal(0, 0.02, n_samples))
+
+
+def naive_median(x, size):
+    half = size // 2
+    padded = np.pad(x, half, mode='edge')
+    return np.median(np.lib.stride_tricks.sliding_window_view(padded, size), axis=1)
+
+
+def streamed(x, size, method, chunk_size):
+    remover = StreamingBaselineRemover(size, method)
+    parts = [remover.update(x[i:i + chunk_size]) for i in range(0, len(x), chunk_size)]
+    parts.append(remover.finalize())
+    return np.concatenate(parts)
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--samples', type=int, default=10_000_000)
+    parser.add_argument('--window', type=float, default=0.6, help='giây')
+    parser.add_argument('--chunk', type=int, default=1 << 18)
+    args = parser.parse_args()
+
+    n = args.samples
+    size = baseline_window_samples(args.window, SAMPLING_RATE)
+    x = make_signal(n)
+    print(f"samples: {n}  window: {size} mẫu")
+
+    for method in ('median', 'mean'):
+        elapsed, reference = timed(lambda: x - estimate_baseline(x, size, method))
+        stream_time, result = timed(lambda: streamed(x, size, method, args.chunk))
+        print(f"{method:<7} full    {elapsed / n * 1e9:8.1f} ns/sample")
+        print(f"{method:<7} chunked {stream_time / n * 1e9:8.1f} ns/sample  "
+              f"max diff {float(np.max(np.abs(result - reference))):.2e}")
+
+    m = min(n, NAIVE_MAX_SAMPLES)
+    naive_time, naive = timed(lambda: naive_median(x[:m], size))
+    fast_time, fast = timed(lambda: estimate_baseline(x[:m], size, 'median'))
+    print(f"np.median per window ({m} samples) {naive_time / m * 1e9:8.1f} ns/sample  "
+          f"{naive_time / fast_time:6.1f}x slower  max diff {float(np.max(np.abs(naive - fast))):.2e}")
+
+
+if __name__ == '__main__':
+    main()
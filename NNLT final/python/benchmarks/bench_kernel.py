@@ -0,0 +1,85 @@
+"""
+Benchmark: calculate_time_step + calculate_time_axis + convert_adc_to_volt (cũ)
+so với preprocess_kernel (float64 và float32)
+
+Chạy từ thư mục python/:
+    python -m benchmarks.bench_kernel [--samples N]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from preprocessing.processor import (
+    calculate_time_step,
+    calculate_time_axis,
+    convert_adc_to_volt,
+    preprocess_kernel,
+)
+
+
+def make_amplitudes(n_samples, seed=0):
+    """ADC raw ngẫu nhiên, một phần có time step f1/f2 hợp lệ"""
+    rng = np.random.default_rng(seed)
+    amp1 = np.where(rng.random(n_samples) < 0.5,
+                    rng.uniform(1, 3000, n_samples), rng.normal(0, 1e5, n_samples))
+    amp2 = np.where(rng.random(n_samples) < 0.3,
+                    rng.uniform(-10, 3000, n_samples), rng.normal(0, 1e5, n_samples))
+    amp3 = rng.uniform(0, 2e7, n_samples)
+    return amp1, amp2, amp3
+
+
+def old_path(amp1, amp2, amp3):
+    time_steps = calculate_time_step(amp1, amp2, amp3)
+    return np.stack([
+        calculate_time_axis(time_steps),
+        convert_adc_to_volt(amp1),
+        convert_adc_to_volt(amp2),
+        convert_adc_to_volt(amp3),
+    ])
+
+
+def best_of(func, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--samples', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    n = args.samples
+    amps = make_amplitudes(n)
+    out64 = np.empty((4, n), dtype=np.float64)
+    out32 = np.empty((4, n), dtype=np.float32)
+
+    old_time, reference = best_of(lambda: old_path(*amps), args.repeat)
+    k64_time, (result64, _) = best_of(lambda: preprocess_kernel(*amps, out=out64), args.repeat)
+    k32_time, (result32, _) = best_of(lambda: preprocess_kernel(*amps, out=out32), args.repeat)
+
+    def rel_error(result):
+        return float(np.max(np.abs(result - reference) / np.maximum(np.abs(reference), 1e-300)))
+
+    print(f"samples:          {n}")
+    for name, elapsed, result in (
+        ("old path", old_time, reference),
+        ("kernel float64", k64_time, result64),
+        ("kernel float32", k32_time, result32),
+    ):
+        print(f"{name:<16}  {elapsed / n * 1e9:8.1f} ns/sample  "
+              f"{old_time / elapsed:6.1f}x  max rel error {rel_error(result):.2e}")
+
+
+if __name__ == '__main__':
+    main()
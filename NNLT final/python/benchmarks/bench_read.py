@@ -0,0 +1,72 @@
+"""
+Benchmark: read_txt_file (cũ) so với read_channel_columns (parse hàng loạt)
+
+Chạy từ thư mục python/:
+    python -m benchmarks.bench_read [file.txt] [--samples N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from preprocessing.processor import read_txt_file, read_channel_columns
+
+
+def write_sample_file(file_path, n_samples, seed=0):
+    """Ghi file TXT 9 cột giống định dạng thiết bị (giá trị ADC ngẫu nhiên)"""
+    rng = np.random.default_rng(seed)
+    amps = (rng.normal(size=(n_samples, 3)) * 1e5).tolist()
+    with open(file_path, 'w') as f:
+        for i, (a1, a2, a3) in enumerate(amps):
+            f.write(f"24\t17\t5\t1\t{952 + i % 1000}\t{i % 1000}.0\t{a1!r}\t{a2!r}\t{a3!r}\n")
+
+
+def best_of(func, file_path, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(file_path)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('file', nargs='?', help='File TXT cần đo (mặc định: tạo file mẫu)')
+    parser.add_argument('--samples', type=int, default=200_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    tmp_path = None
+    file_path = args.file
+    if file_path is None:
+        fd, tmp_path = tempfile.mkstemp(suffix='.txt')
+        os.close(fd)
+        write_sample_file(tmp_path, args.samples)
+        file_path = tmp_path
+
+    try:
+        old_time, old_data = best_of(read_txt_file, file_path, args.repeat)
+        new_time, (new_data, rejected) = best_of(read_channel_columns, file_path, args.repeat)
+    finally:
+        if tmp_path:
+            os.remove(tmp_path)
+
+    n = len(new_data)
+    print(f"samples:              {n}")
+    print(f"rejected rows:        {rejected}")
+    print(f"read_txt_file:        {old_time:.3f} s ({old_time / max(n, 1) * 1e6:.2f} us/row)")
+    print(f"read_channel_columns: {new_time:.3f} s ({new_time / max(n, 1) * 1e6:.2f} us/row)")
+    print(f"speedup:              {old_time / new_time:.1f}x")
+    if len(old_data) == n:
+        print(f"identical values:     {np.array_equal(old_data[:, 6:9], new_data)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+"""
+Benchmark suite: thời gian và bộ nhớ đỉnh của từng bước preprocessing và
+metrics trên bản ghi tổng hợp (benchmarks.synthetic), lưu kết quả ra JSON
+và so sánh với một baseline đã lưu để phát hiện regression
+
+Chạy từ thư mục python/:
+    python -m benchmarks.suite [--samples 10000 100000 1000000]
+                               [--output results.json] [--baseline benchmarks/baseline.json]
+
+Exit code 1 nếu có bước chậm hơn / tốn bộ nhớ hơn baseline quá --tolerance.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import scipy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import write_recording
+from calculator.metrics import calculate_all_metrics
+from preprocessing.processor import (
+    calculate_time_axis,
+    calculate_time_step,
+    preprocess_kernel,
+    read_channel_columns,
+    read_txt_file,
+    stream_signal_file,
+)
+
+DEFAULT_SAMPLES = (10_000, 100_000, 1_000_000)
+
+# Các bước thuần Python (đọc từng dòng, vòng lặp trục thời gian) chỉ chạy
+# tới số mẫu này
+DEFAULT_LEGACY_MAX = 1_000_000
+
+# So sánh thời gian bỏ qua các bước nhanh hơn ngưỡng này (nhiễu đo)
+MIN_COMPARABLE_SECONDS = 0.005
+
+
+def _processed(ctx):
+    time_data, channel1, channel2, channel3 = ctx['preprocess_kernel']
+    return {'time': time_data, 'channel1': channel1, 'channel2': channel2, 'channel3': channel3}
+
+
+def _serialize(ctx):
+    data = {key: value.tolist() for key, value in _processed(ctx).items()}
+    return json.dumps({'processed_data': data, 'metrics': ctx['calculate_all_metrics']})
+
+
+def _stream(ctx):
+    count = 0
+    for chunk in stream_signal_file(ctx['file_path']):
+        count += len(chunk['time'])
+    return count
+
+
+# (tên, hàm(ctx), chỉ chạy khi số mẫu <= legacy_max); kết quả mỗi bước được
+# lưu vào ctx[tên] cho các bước sau
+STAGES = (
+    ('read_txt_file', lambda ctx: read_txt_file(ctx['file_path']), True),
+    ('read_channel_columns', lambda ctx: read_channel_columns(ctx['file_path'])[0], False),
+    ('calculate_time_step', lambda ctx: calculate_time_step(*ctx['read_channel_columns'].T), False),
+    ('calculate_time_axis', lambda ctx: calculate_time_axis(ctx['calculate_time_step']), True),
+    ('preprocess_kernel', lambda ctx: preprocess_kernel(*ctx['read_channel_columns'].T)[0], False),
+    ('calculate_all_metrics', lambda ctx: calculate_all_metrics(_processed(ctx)), False),
+    ('json_serialization', _serialize, False),
+    ('stream_signal_file', _stream, False),
+)
+
+
+def measure(func, ctx, repeat, memory):
+    """
+    Thời gian tốt nhất trong repeat lần chạy và bộ nhớ đỉnh (tracemalloc,
+    một lần chạy riêng để không làm sai thời gian)
+
+    Returns:
+        tuple (kết quả, seconds, peak_bytes hoặc None)
+    """
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        result = None
+        gc.collect()
+        start = time.perf_counter()
+        result = func(ctx)
+        best = min(best, time.perf_counter() - start)
+
+    peak = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            func(ctx)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result, best, peak
+
+
+def run_size(file_path, n_samples, repeat, memory, legacy_max, log):
+    """Chạy mọi bước trên một file, trả về dict stage -> kết quả đo"""
+    ctx = {'file_path': file_path}
+    results = {}
+    for name, func, legacy in STAGES:
+        if legacy and n_samples > legacy_max:
+            results[name] = {'skipped': True}
+            log(f'  {name:<22} skipped (> {legacy_max} samples)')
+            continue
+        value, seconds, peak = measure(func, ctx, repeat, memory)
+        ctx[name] = value
+        results[name] = {'seconds': seconds, 'ns_per_sample': seconds / n_samples * 1e9, 'peak_bytes': peak}
+        peak_text = f'{peak / 2**20:9.1f} MiB' if peak is not None else ''
+        log(f'  {name:<22} {seconds:9.4f} s {seconds / n_samples * 1e9:9.1f} ns/sample {peak_text}')
+    return results
+
+
+def environment():
+    return {
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    So sánh với baseline
+
+    Returns:
+        list các regression (samples, stage, chỉ số, tỉ lệ)
+    """
+    regressions = []
+    for samples, stages in results['results'].items():
+        for stage, current in stages.items():
+            previous = baseline.get('results', {}).get(samples, {}).get(stage)
+            if not previous or current.get('skipped') or previous.get('skipped'):
+                continue
+            if previous['seconds'] >= MIN_COMPARABLE_SECONDS:
+                ratio = current['seconds'] / previous['seconds']
+                if ratio > 1 + tolerance:
+                    regressions.append((samples, stage, 'seconds', ratio))
+            if current.get('peak_bytes') and previous.get('peak_bytes'):
+                ratio = current['peak_bytes'] / previous['peak_bytes']
+                if ratio > 1 + tolerance:
+                    regressions.append((samples, stage, 'peak_bytes', ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--samples', type=int, nargs='+', default=list(DEFAULT_SAMPLES),
+                        help='Số mẫu của các bản ghi (10^4 .. 10^8)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-memory', action='store_true', help='Không đo bộ nhớ đỉnh')
+    parser.add_argument('--legacy-max', type=int, default=DEFAULT_LEGACY_MAX)
+    parser.add_argument('--data-dir', help='Thư mục giữ các file tổng hợp để dùng lại (mặc định: tạm)')
+    parser.add_argument('--output', help='Lưu kết quả ra file JSON (dùng làm baseline)')
+    parser.add_argument('--baseline', help='File JSON baseline để so sánh')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Tỉ lệ chậm hơn / tốn bộ nhớ hơn cho phép (mặc định 0.25)')
+    args = parser.parse_args()
+
+    tmp_dir = None
+    data_dir = args.data_dir
+    if data_dir is None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        data_dir = tmp_dir.name
+    os.makedirs(data_dir, exist_ok=True)
+
+    results = {'environment': environment(), 'results': {}}
+    try:
+        for n_samples in args.samples:
+            file_path = os.path.join(data_dir, f'synthetic_{n_samples}.txt')
+            if not os.path.exists(file_path):
+                write_recording(file_path, n_samples)
+            print(f'samples: {n_samples} ({os.path.getsize(file_path) / 1e6:.1f} MB)')
+            results['results'][str(n_samples)] = run_size(
+                file_path, n_samples, args.repeat, not args.no_memory, args.legacy_max, print
+            )
+    finally:
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'saved {args.output}')
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for samples, stage, metric, ratio in regressions:
+            print(f'REGRESSION {samples} {stage} {metric}: {ratio:.2f}x baseline')
+        if regressions:
+            sys.exit(1)
+        print(f'no regression against {args.baseline} (tolerance {args.tolerance:.0%})')
+
+
+if __name__ == '__main__':
+    main()
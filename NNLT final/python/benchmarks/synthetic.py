@@ -0,0 +1,148 @@
+"""
+Sinh bản ghi tổng hợp giống thiết bị: file TXT 9 cột, cột 7-9 là ADC của
+PCG, PPG và ECG (mỗi nhịp có QRS, sóng P/T, xung PPG trễ PTT, tiếng tim
+S1/S2), kèm baseline wander và nhiễu
+
+Chạy từ thư mục python/:
+    python -m benchmarks.synthetic output.txt [--samples N] [--rate HZ]
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Volt -> ADC (nghịch đảo convert_adc_to_volt, 24-bit, dải 5 V)
+VOLT_TO_ADC = 2 ** 23 / 2.5
+
+DEFAULT_SAMPLING_RATE = 1000.0
+DEFAULT_HEART_RATE = 72.0
+DEFAULT_PTT = 0.2
+
+# Số mẫu sinh và ghi mỗi lần (giới hạn bộ nhớ khi sinh 10^8 mẫu)
+WRITE_BLOCK = 1 << 18
+
+
+def beat_times(duration, heart_rate=DEFAULT_HEART_RATE, seed=0):
+    """Thời điểm R-peak với RR dao động ~5% quanh 60 / heart_rate"""
+    rng = np.random.default_rng(seed)
+    rr = 60.0 / heart_rate
+    count = int(duration / rr * 1.2) + 2
+    intervals = rr * (1 + 0.05 * rng.standard_normal(count))
+    return np.cumsum(np.clip(intervals, 0.5 * rr, 1.5 * rr)) - rr / 2
+
+
+def _gauss(x, center, width):
+    return np.exp(-0.5 * ((x - center) / width) ** 2)
+
+
+def synthesize_block(start, n_samples, beats, sampling_rate=DEFAULT_SAMPLING_RATE,
+                     ptt=DEFAULT_PTT, seed=0):
+    """
+    Tín hiệu (Volt) của các mẫu [start, start + n_samples)
+
+    Args:
+        start: Index mẫu đầu tiên
+        n_samples: Số mẫu
+        beats: Thời điểm R-peak (beat_times)
+        sampling_rate: Tần số lấy mẫu (Hz)
+        ptt: Thời gian từ R-peak tới chân xung PPG (giây)
+        seed: Seed nhiễu (kết hợp với start)
+
+    Returns:
+        tuple (pcg, ppg, ecg) numpy array
+    """
+    rng = np.random.default_rng([seed, start])
+    t = (start + np.arange(n_samples)) / sampling_rate
+    # Pha so với R-peak gần nhất phía trước và phía sau
+    index = np.clip(np.searchsorted(beats, t, side='right') - 1, 0, len(beats) - 2)
+    since = t - beats[index]
+    until = t - beats[index + 1]
+
+    wander = 0.15e-3 * np.sin(2 * np.pi * 0.2 * t) + 0.05e-3 * np.sin(2 * np.pi * 0.05 * t)
+
+    ecg = (
+        1.0e-3 * _gauss(since, 0.0, 0.010) + 1.0e-3 * _gauss(until, 0.0, 0.010)
+        - 0.15e-3 * _gauss(since, 0.025, 0.008)
+        + 0.30e-3 * _gauss(since, 0.25, 0.040)
+        + 0.12e-3 * _gauss(until, -0.16, 0.025)
+        + wander + 0.02e-3 * rng.standard_normal(n_samples)
+        + 0.01e-3 * np.sin(2 * np.pi * 50 * t)
+    )
+
+    # Xung PPG: sườn lên nhanh sau PTT, giảm chậm, offset âm như thiết bị
+    rise = np.clip(since - ptt, 0, None)
+    ppg = (
+        -2.0e-3 + 0.8e-3 * (rise / 0.12) * np.exp(1 - rise / 0.12)
+        + 0.5 * wander + 0.01e-3 * rng.standard_normal(n_samples)
+    )
+
+    # S1 ngay sau QRS, S2 sau sóng T: dao động 50/70 Hz với bao Gauss
+    pcg = (
+        -70e-3
+        + 5e-3 * _gauss(since, 0.05, 0.02) * np.sin(2 * np.pi * 50 * since)
+        + 3e-3 * _gauss(since, 0.35, 0.015) * np.sin(2 * np.pi * 70 * since)
+        + 0.2e-3 * rng.standard_normal(n_samples)
+    )
+    return pcg, ppg, ecg
+
+
+def iter_recording(n_samples, sampling_rate=DEFAULT_SAMPLING_RATE, seed=0, block=WRITE_BLOCK):
+    """
+    Sinh bản ghi theo khối
+
+    Yields:
+        tuple (start, amp1, amp2, amp3) giá trị ADC của mỗi khối
+    """
+    beats = beat_times(n_samples / sampling_rate + 2.0, seed=seed)
+    for start in range(0, n_samples, block):
+        count = min(block, n_samples - start)
+        pcg, ppg, ecg = synthesize_block(start, count, beats, sampling_rate, seed=seed)
+        yield start, pcg * VOLT_TO_ADC, ppg * VOLT_TO_ADC, ecg * VOLT_TO_ADC
+
+
+def write_recording(file_path, n_samples, sampling_rate=DEFAULT_SAMPLING_RATE, seed=0):
+    """
+    Ghi file TXT 9 cột theo định dạng thiết bị
+
+    Cột 1-6 là bộ đếm/metadata, cột 7-9 là ADC của PCG, PPG, ECG. Kênh PCG
+    và PPG có offset âm nên f1/f2 không hợp lệ và time step lấy giá trị mặc
+    định (DEFAULT_TIME_STEP, 1 kHz) như dữ liệu thiết bị mẫu.
+
+    Args:
+        file_path: Đường dẫn file output
+        n_samples: Số mẫu (dòng)
+        sampling_rate: Tần số lấy mẫu dùng để sinh tín hiệu (Hz)
+        seed: Seed
+
+    Returns:
+        Kích thước file (bytes)
+    """
+    with open(file_path, 'w') as f:
+        for start, amp1, amp2, amp3 in iter_recording(n_samples, sampling_rate, seed):
+            counter = start + np.arange(len(amp1))
+            columns = np.column_stack([
+                np.full(len(amp1), 24), np.full(len(amp1), 17), np.full(len(amp1), 5),
+                np.ones(len(amp1)), 952 + counter % 1000, counter % 1000,
+                amp1, amp2, amp3
+            ])
+            np.savetxt(f, columns, fmt='%d\t%d\t%d\t%d\t%d\t%.1f\t%.10g\t%.10g\t%.10g')
+    return os.path.getsize(file_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('output')
+    parser.add_argument('--samples', type=int, default=100_000)
+    parser.add_argument('--rate', type=float, default=DEFAULT_SAMPLING_RATE)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    size = write_recording(args.output, args.samples, args.rate, args.seed)
+    print(f"{args.output}: {args.samples} samples, {size / 1e6:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,331 @@
+"""
+Beat Detection Module
+Phát hiện nhịp (R-peak ECG / đỉnh xung PPG) theo từng cửa sổ với ngưỡng
+thích nghi, giữ trạng thái giữa các chunk, và xuất chuỗi RR/HR theo từng
+nhịp cho bản ghi dài mà không cần giữ toàn bộ tín hiệu trong bộ nhớ
+"""
+from collections import deque
+
+import numpy as np
+from scipy.signal import find_peaks
+
+
+# Độ dài cửa sổ phân tích (giây)
+DEFAULT_WINDOW = 2.0
+
+# Khoảng cách tối thiểu giữa hai nhịp (giây), tương ứng 200 bpm
+DEFAULT_REFRACTORY = 0.3
+
+# Ngưỡng = noise level + threshold_ratio * (signal level - noise level)
+DEFAULT_THRESHOLD_RATIO = 0.5
+
+# Hệ số cập nhật trung bình mũ của signal/noise level (Pan-Tompkins)
+LEVEL_UPDATE = 0.125
+
+# Percentile độ cao các đỉnh ứng viên của cửa sổ đầu dùng làm signal level
+# ban đầu (không bị một artifact lớn kéo lên như max)
+INIT_PERCENTILE = 75
+
+# Searchback (Pan-Tompkins): khi không có nhịp trong RR_MISS_RATIO lần RR
+# trung bình của RR_AVERAGE_BEATS nhịp gần nhất, tìm lại đỉnh cao nhất trong
+# khoảng trống với ngưỡng SEARCHBACK_RATIO lần ngưỡng thường; nhịp tìm lại
+# cập nhật signal level với hệ số SEARCHBACK_UPDATE
+RR_AVERAGE_BEATS = 8
+RR_MISS_RATIO = 1.66
+SEARCHBACK_RATIO = 0.5
+SEARCHBACK_UPDATE = 0.25
+
+# Cửa sổ không có nhịp nào: signal level giảm về phía noise level theo hệ số này
+LEVEL_DECAY = 0.5
+
+
+def estimate_sampling_rate(time_data, default=1000.0):
+    """Tần số lấy mẫu từ trục thời gian (median của bước thời gian)"""
+    time_array = np.asarray(time_data, dtype=np.float64)
+    if len(time_array) < 2:
+        return default
+    dt = float(np.median(np.diff(time_array)))
+    return 1.0 / dt if dt > 0 else default
+
+
+class StreamingBeatDetector:
+    """
+    Bộ phát hiện nhịp tăng dần theo cửa sổ
+
+    Mỗi cửa sổ được trừ baseline (median của cửa sổ) rồi tìm đỉnh bằng
+    find_peaks với ngưỡng thích nghi kiểu Pan-Tompkins: signal level khởi
+    tạo từ percentile độ cao các đỉnh của cửa sổ đầu và được cập nhật từ
+    biên độ các nhịp đã nhận, noise level từ median |độ lệch| của từng cửa
+    sổ. Khoảng trống dài hơn RR_MISS_RATIO lần RR trung bình được tìm lại
+    (searchback) với ngưỡng thấp hơn, và signal level giảm dần qua các cửa
+    sổ không có nhịp, nên biên độ giảm đột ngột không làm mất nhịp. Mỗi cửa
+    sổ được phân tích kèm 2 * refractory mẫu ngữ cảnh phía trước và
+    refractory mẫu phía sau, còn nhịp chỉ được nhận bên trong cửa sổ, nên
+    đỉnh nằm ở biên cửa sổ vẫn có đủ ngữ cảnh hai phía và không bị đếm hai
+    lần. Chi phí O(n), bộ nhớ O(cửa sổ + chunk).
+
+    Dùng:
+        detector = StreamingBeatDetector(sampling_rate)
+        for chunk in chunks:
+            beats = detector.update(chunk["channel3"], chunk["time"])
+        beats = detector.finalize()
+    """
+
+    def __init__(self, sampling_rate=None, window=DEFAULT_WINDOW, refractory=DEFAULT_REFRACTORY,
+                 threshold_ratio=DEFAULT_THRESHOLD_RATIO, invert=False):
+        """
+        Args:
+            sampling_rate: Tần số lấy mẫu (Hz); None = ước lượng từ trục
+                           thời gian của chunk đầu tiên
+            window: Độ dài cửa sổ phân tích (giây)
+            refractory: Khoảng cách tối thiểu giữa hai nhịp (giây)
+            threshold_ratio: Vị trí ngưỡng giữa noise level và signal level
+            invert: True để tìm cực tiểu (ví dụ chân xung PPG)
+        """
+        self.sampling_rate = sampling_rate
+        self.window = window
+        self.refractory = refractory
+        self.threshold_ratio = threshold_ratio
+        self.invert = invert
+
+        self._values = np.empty(0, dtype=np.float64)
+        self._times = np.empty(0, dtype=np.float64)
+        # Index toàn cục của mẫu đầu tiên trong buffer
+        self._offset = 0
+        # Index toàn cục đầu vùng nhận nhịp tiếp theo
+        self._accept_from = 0
+        self._signal_level = None
+        self._noise_level = None
+        self._last_beat_index = None
+        self._last_beat_time = None
+        self._rr_history = deque(maxlen=RR_AVERAGE_BEATS)
+        self._window_samples = None
+        self._margin = None
+        self.count = 0
+
+    def _configure(self, times):
+        if self.sampling_rate is None:
+            self.sampling_rate = estimate_sampling_rate(times)
+        self._window_samples = max(int(round(self.window * self.sampling_rate)), 2)
+        self._margin = max(int(round(self.refractory * self.sampling_rate)), 1)
+
+    def update(self, values, times=None):
+        """
+        Thêm một chunk mẫu
+
+        Args:
+            values: Mẫu của channel
+            times: Thời điểm của các mẫu (None = index / sampling_rate)
+
+        Returns:
+            dict các nhịp mới xác định (xem _empty_beats)
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if times is None:
+            if self.sampling_rate is None:
+                raise ValueError("Cần sampling_rate hoặc trục thời gian")
+            start = self._offset + len(self._values)
+            times = np.arange(start, start + len(values)) / self.sampling_rate
+        times = np.asarray(times, dtype=np.float64)
+        if len(values) != len(times):
+            raise ValueError("values và times phải cùng độ dài")
+        if self._window_samples is None:
+            if len(values) == 0:
+                return _empty_beats()
+            self._configure(times)
+
+        self._values = np.concatenate([self._values, values])
+        self._times = np.concatenate([self._times, times])
+
+        # Xử lý khi buffer có đủ ngữ cảnh trước + một cửa sổ + ngữ cảnh sau
+        results = []
+        while self._buffer_end() - self._accept_from >= self._window_samples + self._margin:
+            results.append(self._process(self._accept_from + self._window_samples))
+        return _concat_beats(results)
+
+    def finalize(self):
+        """
+        Xử lý phần còn lại ở cuối bản ghi
+
+        Returns:
+            dict các nhịp mới xác định
+        """
+        if self._window_samples is None or self._buffer_end() <= self._accept_from:
+            return _empty_beats()
+        return self._process(self._buffer_end(), final=True)
+
+    def _buffer_end(self):
+        return self._offset + len(self._values)
+
+    def _process(self, accept_to, final=False):
+        """Tìm nhịp trong vùng [accept_from, accept_to) của buffer"""
+        first = max(self._accept_from - 2 * self._margin, self._offset)
+        last = self._buffer_end() if final else min(accept_to + self._margin, self._buffer_end())
+        segment = self._values[first - self._offset:last - self._offset]
+        times = self._times[first - self._offset:last - self._offset]
+        if self.invert:
+            segment = -segment
+
+        # Biên độ so với baseline của cửa sổ
+        y = segment - np.median(segment)
+        noise = float(np.median(np.abs(y)))
+        if self._signal_level is None:
+            candidates, _ = find_peaks(y, distance=self._margin)
+            heights = y[candidates] if len(candidates) else y
+            self._signal_level = float(np.percentile(heights, INIT_PERCENTILE))
+            self._noise_level = noise
+        else:
+            self._noise_level += LEVEL_UPDATE * (noise - self._noise_level)
+        threshold = self._noise_level + self.threshold_ratio * (self._signal_level - self._noise_level)
+
+        peaks, properties = find_peaks(y, height=threshold, distance=self._margin)
+        peaks = peaks + first
+        heights = properties["peak_heights"]
+        keep = (peaks >= self._accept_from) & (peaks < accept_to)
+        peaks, heights = peaks[keep], heights[keep]
+
+        # Khoảng trơ so với nhịp cuối của cửa sổ trước
+        if self._last_beat_index is not None and len(peaks):
+            keep = peaks - self._last_beat_index >= self._margin
+            peaks, heights = peaks[keep], heights[keep]
+
+        for height in heights:
+            self._signal_level += LEVEL_UPDATE * (height - self._signal_level)
+
+        peaks = self._searchback(y, first, accept_to, peaks, SEARCHBACK_RATIO * threshold)
+        if len(peaks) == 0:
+            self._signal_level = self._noise_level + LEVEL_DECAY * (self._signal_level - self._noise_level)
+
+        beat_times = times[peaks - first]
+
+        # RR so với nhịp trước (kể cả nhịp cuối của cửa sổ trước)
+        last_time = np.nan if self._last_beat_time is None else self._last_beat_time
+        rr = np.diff(np.concatenate([[last_time], beat_times]))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            hr = np.where(rr > 0, 60.0 / rr, np.nan)
+        self._rr_history.extend(rr[np.isfinite(rr)].tolist())
+
+        if len(peaks):
+            self._last_beat_index = int(peaks[-1])
+            self._last_beat_time = float(beat_times[-1])
+        self.count += len(peaks)
+
+        # Bỏ phần buffer không còn cần làm ngữ cảnh
+        self._accept_from = accept_to
+        drop = max(self._accept_from - 2 * self._margin - self._offset, 0)
+        if drop:
+            self._values = self._values[drop:]
+            self._times = self._times[drop:]
+            self._offset += drop
+
+        return {"indices": peaks, "times": beat_times, "rr": rr, "hr": hr}
+
+    def _searchback(self, y, first, accept_to, peaks, threshold):
+        """
+        Tìm lại nhịp bị bỏ sót trong các khoảng trống dài của cửa sổ
+
+        Khoảng trống là khoảng giữa hai nhịp liên tiếp (kể cả nhịp cuối của
+        cửa sổ trước) hoặc từ nhịp cuối tới hết cửa sổ, dài hơn RR_MISS_RATIO
+        lần RR trung bình. Đỉnh cao nhất trên threshold trong khoảng trống,
+        cách hai nhịp bên cạnh ít nhất refractory, được nhận thêm; lặp lại
+        tới khi không còn khoảng trống nào tìm được.
+
+        Args:
+            y: Cửa sổ đã trừ baseline (bắt đầu tại index toàn cục first)
+            first: Index toàn cục của y[0]
+            accept_to: Cuối vùng nhận nhịp
+            peaks: Index toàn cục các nhịp đã nhận (tăng dần)
+            threshold: Ngưỡng searchback
+
+        Returns:
+            Index toàn cục các nhịp (tăng dần)
+        """
+        if not self._rr_history or self._last_beat_index is None and len(peaks) == 0:
+            return peaks
+        limit = RR_MISS_RATIO * float(np.mean(self._rr_history)) * self.sampling_rate
+        anchors = np.concatenate([[] if self._last_beat_index is None else [self._last_beat_index], peaks, [accept_to]])
+        if not np.any(np.diff(anchors) > limit):
+            return peaks
+
+        candidates, properties = find_peaks(y, height=threshold, distance=self._margin)
+        candidates = candidates + first
+        heights = properties["peak_heights"]
+        keep = (candidates >= self._accept_from) & (candidates < accept_to)
+        candidates, heights = candidates[keep], heights[keep]
+
+        beats = list(peaks)
+        searched = set()
+        while len(candidates):
+            anchors = ([self._last_beat_index] if self._last_beat_index is not None else []) + beats
+            gaps = [
+                (begin, end) for begin, end in zip(anchors, anchors[1:] + [accept_to])
+                if end - begin > limit and begin not in searched
+            ]
+            if not gaps:
+                break
+            begin, end = gaps[0]
+            searched.add(begin)
+            upper = end if end == accept_to else end - self._margin
+            inside = (candidates >= begin + self._margin) & (candidates <= upper)
+            if not inside.any():
+                continue
+            best = np.flatnonzero(inside)[np.argmax(heights[inside])]
+            beats.append(int(candidates[best]))
+            beats.sort()
+            self._signal_level += SEARCHBACK_UPDATE * (heights[best] - self._signal_level)
+            searched.discard(begin)
+        return np.asarray(beats, dtype=np.int64)
+
+
+def _empty_beats():
+    empty = np.empty(0, dtype=np.float64)
+    return {"indices": np.empty(0, dtype=np.int64), "times": empty, "rr": empty, "hr": empty}
+
+
+def _concat_beats(results):
+    if not results:
+        return _empty_beats()
+    return {key: np.concatenate([r[key] for r in results]) for key in results[0]}
+
+
+def beat_timeline(chunks, channel, sampling_rate=None, **kwargs):
+    """
+    Chuỗi RR/HR theo từng nhịp của một channel qua một chuỗi chunk
+
+    Args:
+        chunks: Iterable các dict chứa time và channel (ví dụ stream_signal_file)
+        channel: Tên channel ('channel2' PPG, 'channel3' ECG, ...)
+        sampling_rate: Tần số lấy mẫu (None = ước lượng)
+        **kwargs: Tham số khác của StreamingBeatDetector
+
+    Returns:
+        dict chứa indices, times, rr (giây) và hr (bpm) dạng numpy array;
+        rr/hr của nhịp đầu tiên là NaN
+    """
+    detector = StreamingBeatDetector(sampling_rate, **kwargs)
+    results = [detector.update(chunk[channel], chunk["time"]) for chunk in chunks]
+    results.append(detector.finalize())
+    return _concat_beats(results)
+
+
+def detect_beats(channel_data, time_data, chunk_size=None, **kwargs):
+    """
+    Chuỗi RR/HR theo từng nhịp của một channel đã nằm trong bộ nhớ
+
+    Args:
+        channel_data: Mảng dữ liệu channel
+        time_data: Mảng thời gian
+        chunk_size: Số mẫu mỗi lần đưa vào detector (None = một lần)
+        **kwargs: Tham số của StreamingBeatDetector
+
+    Returns:
+        dict như beat_timeline
+    """
+    channel_array = np.asarray(channel_data, dtype=np.float64)
+    time_array = np.asarray(time_data, dtype=np.float64)
+    step = chunk_size or max(len(channel_array), 1)
+    chunks = (
+        {"time": time_array[i:i + step], "channel": channel_array[i:i + step]}
+        for i in range(0, len(channel_array), step)
+    )
+    return beat_timeline(chunks, "channel", **kwargs)
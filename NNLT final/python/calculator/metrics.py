@@ -2,10 +2,18 @@
 Calculator Module for Biological Signal Metrics
 Tính toán các chỉ số sinh học từ tín hiệu đã preprocess
 """
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 from scipy import signal
 from scipy.signal import find_peaks
 
+from .spectral import compute_spectrum, noise_power, dominant_frequency, welch_psd
+from .online_stats import DEFAULT_SKETCH_CAPACITY, OnlineStatistics
+from .beats import detect_beats
+from .pulse_transit import calculate_pulse_transit
+from preprocessing.timing import timed
+
 
 def detect_peaks(channel_data, time_data, min_height=None, min_distance=None):
     """
@@ -52,18 +60,23 @@ def detect_peaks(channel_data, time_data, min_height=None, min_distance=None):
     }
 
 
-def calculate_baseline(channel_data, method='median'):
+def calculate_baseline(channel_data, method='median', statistics=None):
     """
     Tính baseline của tín hiệu
     
     Args:
         channel_data: Mảng dữ liệu channel
         method: Phương pháp tính ('mean', 'median', 'mode')
+        statistics: Kết quả calculate_statistics đã có (dùng lại mean/median,
+                    tránh sắp xếp lại)
         
     Returns:
         Giá trị baseline
     """
-    channel_array = np.array(channel_data)
+    if statistics is not None and method in ('mean', 'median'):
+        return float(statistics[method])
+    
+    channel_array = np.asarray(channel_data)
     
     if method == 'mean':
         return float(np.mean(channel_array))
@@ -114,73 +127,125 @@ def calculate_heart_rate(peaks_data, time_data):
     return float(heart_rate)
 
 
+def calculate_heart_rate_timeline(channel_data, time_data):
+    """
+    Nhịp tim theo từng nhịp (beat-by-beat)
+    
+    Dùng StreamingBeatDetector (ngưỡng thích nghi theo cửa sổ) thay vì một
+    ngưỡng toàn cục; với file dài dùng beat_timeline trên stream_signal_file.
+    
+    Args:
+        channel_data: Mảng dữ liệu channel
+        time_data: Mảng thời gian
+        
+    Returns:
+        dict chứa count (số nhịp), times (thời điểm nhịp kết thúc mỗi khoảng
+        RR), rr (giây) và hr (bpm)
+    """
+    beats = detect_beats(channel_data, time_data)
+    
+    # Bỏ nhịp đầu tiên (chưa có RR) và khoảng thời gian không hợp lệ
+    valid = np.isfinite(beats["hr"])
+    
+    return {
+        "count": len(beats["times"]),
+        "times": beats["times"][valid].tolist(),
+        "rr": beats["rr"][valid].tolist(),
+        "hr": beats["hr"][valid].tolist()
+    }
+
+
 def calculate_statistics(channel_data):
     """
     Tính các thống kê cơ bản
     
+    Dùng OnlineStatistics với sketch đủ chứa toàn bộ mảng, nên median là
+    chính xác (chọn phần tử bằng partition, không sắp xếp toàn bộ).
+    
     Args:
         channel_data: Mảng dữ liệu channel
         
     Returns:
         dict chứa các thống kê
     """
-    channel_array = np.array(channel_data)
+    channel_array = np.asarray(channel_data, dtype=np.float64)
     
-    return {
-        "mean": float(np.mean(channel_array)),
-        "std": float(np.std(channel_array)),
-        "min": float(np.min(channel_array)),
-        "max": float(np.max(channel_array)),
-        "median": float(np.median(channel_array)),
-        "range": float(np.max(channel_array) - np.min(channel_array))
-    }
+    accumulator = OnlineStatistics(capacity=max(len(channel_array), 2))
+    accumulator.update(channel_array)
+    return accumulator.result()
 
 
-def calculate_snr(channel_data):
+def accumulate_statistics(chunks, channels=("channel1", "channel2", "channel3"),
+                          capacity=DEFAULT_SKETCH_CAPACITY):
+    """
+    Tích lũy thống kê của các channel qua một chuỗi chunk
+    
+    Dùng với stream_signal_file để tính thống kê của file dài mà không giữ
+    toàn bộ tín hiệu trong bộ nhớ. Kết quả của nhiều worker gộp được bằng
+    OnlineStatistics.merge / merge_statistics. Median chính xác khi số mẫu
+    không vượt quá capacity, ngược lại sai số thứ hạng <= rank_error()
+    (xem QuantileSketch).
+    
+    Args:
+        chunks: Iterable các dict chứa các channel (ví dụ stream_signal_file)
+        channels: Tên các channel cần tích lũy
+        capacity: Capacity của quantile sketch
+        
+    Returns:
+        dict tên channel -> OnlineStatistics (gọi .result() để lấy thống kê)
+    """
+    accumulators = {name: OnlineStatistics(capacity) for name in channels}
+    for chunk in chunks:
+        for name in channels:
+            accumulators[name].update(chunk[name])
+    return accumulators
+
+
+def calculate_snr(channel_data, spectrum=None):
     """
     Tính Signal-to-Noise Ratio
     
     Args:
         channel_data: Mảng dữ liệu channel
+        spectrum: Phổ đã tính sẵn (compute_spectrum), None = tự tính
         
     Returns:
         SNR (dB)
     """
-    channel_array = np.array(channel_data)
+    channel_array = np.asarray(channel_data)
     
     # Tính signal power (variance)
     signal_power = np.var(channel_array)
     
-    # Ước tính noise power từ high-frequency components
-    # Sử dụng FFT để tách high frequency
-    fft_data = np.fft.fft(channel_array)
-    fft_freq = np.fft.fftfreq(len(channel_array))
-    
-    # High frequency components (> 0.3 normalized frequency)
-    high_freq_mask = np.abs(fft_freq) > 0.3
-    noise_power = np.var(np.abs(fft_data[high_freq_mask]))
+    # Ước tính noise power từ high-frequency components (> 0.3 normalized frequency)
+    if spectrum is None:
+        spectrum = compute_spectrum(channel_array)
+    noise = noise_power(spectrum)
     
-    if noise_power == 0:
+    if noise == 0:
         return float('inf')
     
-    snr_linear = signal_power / noise_power
+    snr_linear = signal_power / noise
     snr_db = 10 * np.log10(snr_linear)
     
     return float(snr_db)
 
 
-def calculate_frequency_domain(channel_data, time_data):
+def calculate_frequency_domain(channel_data, time_data, spectrum=None, method='fft'):
     """
     Phân tích miền tần số
     
     Args:
         channel_data: Mảng dữ liệu channel
         time_data: Mảng thời gian
+        spectrum: Phổ đã tính sẵn (compute_spectrum), None = tự tính
+        method: 'fft' (phổ toàn bản ghi) hoặc 'welch' (PSD Welch, ổn định
+                hơn với bản ghi dài)
         
     Returns:
         dict chứa thông tin tần số
     """
-    channel_array = np.array(channel_data)
+    channel_array = np.asarray(channel_data)
     
     # Tính sampling rate
     if len(time_data) > 1:
@@ -192,88 +257,209 @@ def calculate_frequency_domain(channel_data, time_data):
     else:
         sampling_rate = 1000.0
     
-    # FFT
-    fft_data = np.fft.fft(channel_array)
-    fft_freq = np.fft.fftfreq(len(channel_array), d=1.0/sampling_rate)
-    
-    # Chỉ lấy phần dương
-    positive_freq_idx = fft_freq > 0
-    positive_freq = fft_freq[positive_freq_idx]
-    positive_fft = np.abs(fft_data[positive_freq_idx])
-    
-    # Tìm dominant frequency
-    if len(positive_fft) > 0:
-        dominant_freq_idx = np.argmax(positive_fft)
-        dominant_freq = positive_freq[dominant_freq_idx]
+    if method == 'welch':
+        if len(channel_array) < 2:
+            return {"sampling_rate": float(sampling_rate), "dominant_frequency": 0.0, "max_frequency": 0.0}
+        freq, psd = welch_psd(channel_array, sampling_rate)
+        # Bỏ DC, tìm dominant frequency trên PSD
+        dominant_freq = freq[1:][np.argmax(psd[1:])] if len(psd) > 1 else 0.0
+        max_freq = freq[-1] if len(freq) > 1 else 0.0
+    elif method == 'fft':
+        # Phổ một phía (rfft), chỉ lấy phần tần số dương
+        if spectrum is None:
+            spectrum = compute_spectrum(channel_array)
+        dominant_freq, max_freq = dominant_frequency(spectrum, sampling_rate)
     else:
-        dominant_freq = 0.0
+        raise ValueError(f"Phương pháp không hợp lệ: {method}")
     
     return {
         "sampling_rate": float(sampling_rate),
         "dominant_frequency": float(dominant_freq),
-        "max_frequency": float(np.max(positive_freq)) if len(positive_freq) > 0 else 0.0
+        "max_frequency": float(max_freq)
     }
 
 
-def calculate_all_metrics(processed_data):
+# Metrics của từng channel (theo thứ tự trong kết quả)
+CHANNEL_METRICS = (
+    "statistics", "baseline", "peaks", "heart_rate", "heart_rate_timeline", "snr", "frequency"
+)
+
+# Metrics của cả bản ghi
+RECORD_METRICS = ("overall", "pulse_transit")
+
+CHANNELS = ("channel1", "channel2", "channel3")
+
+
+def _select(names, allowed, kind):
+    """Kiểm tra danh sách được chọn (None = tất cả), giữ thứ tự của allowed"""
+    if names is None:
+        return allowed
+    unknown = set(names) - set(allowed)
+    if unknown:
+        raise ValueError(f"{kind} không hợp lệ: {', '.join(sorted(unknown))}")
+    return tuple(name for name in allowed if name in names)
+
+
+def calculate_channel_metrics(channel_data, time_data, spectral_method='fft', metrics=None, timings=None):
     """
-    Tính toán tất cả metrics cho cả 3 channels
+    Tính toán metrics cho một channel
+    
+    Chỉ các metric được chọn (và những gì chúng cần) được tính: phổ chỉ
+    được tính khi cần SNR hoặc frequency và dùng chung cho cả hai, peaks
+    chỉ được tính khi cần peaks hoặc heart_rate.
+    
+    Args:
+        channel_data: Mảng dữ liệu channel
+        time_data: Mảng thời gian
+        spectral_method: 'fft' hoặc 'welch' (xem calculate_frequency_domain)
+        metrics: Tên các metric cần tính (trong CHANNEL_METRICS, None = tất cả)
+        timings: dict nhận thời gian tính từng metric (gồm cả phần dùng
+                 chung được tính lần đầu trong metric đó)
+        
+    Returns:
+        dict chứa các metric được chọn (statistics, baseline, peaks,
+        heart_rate, heart_rate_timeline, snr, frequency)
+    """
+    names = _select(metrics, CHANNEL_METRICS, "Metric")
+    results = {}
+    cache = {}
+    
+    def statistics():
+        if "statistics" not in cache:
+            cache["statistics"] = calculate_statistics(channel_data)
+        return cache["statistics"]
+    
+    def peaks():
+        if "peaks" not in cache:
+            cache["peaks"] = detect_peaks(channel_data, time_data)
+        return cache["peaks"]
+    
+    def spectrum():
+        # Phổ dùng chung cho SNR và frequency
+        if "spectrum" not in cache:
+            cache["spectrum"] = compute_spectrum(channel_data)
+        return cache["spectrum"]
+    
+    def compute(name):
+        if name == "statistics":
+            return statistics()
+        if name == "baseline":
+            return calculate_baseline(channel_data, statistics=statistics())
+        if name == "peaks":
+            return peaks()
+        if name == "heart_rate":
+            # Heart rate (nếu có peaks)
+            return calculate_heart_rate(peaks(), time_data) if peaks()["count"] >= 2 else None
+        if name == "heart_rate_timeline":
+            # Heart rate theo từng nhịp
+            return calculate_heart_rate_timeline(channel_data, time_data)
+        if name == "snr":
+            return calculate_snr(channel_data, spectrum())
+        return calculate_frequency_domain(channel_data, time_data, spectrum(), method=spectral_method)
+    
+    for name in names:
+        with timed(timings, name, len(channel_data)):
+            results[name] = compute(name)
+    
+    return results
+
+
+def _timed_channel_metrics(channel_data, time_data, spectral_method, metrics):
+    """calculate_channel_metrics kèm timings (chạy được trong process worker)"""
+    timings = {}
+    results = calculate_channel_metrics(channel_data, time_data, spectral_method, metrics, timings)
+    return results, timings
+
+
+def calculate_all_metrics(processed_data, workers=None, executor=None, spectral_method='fft', h=None,
+                          metrics=None, channels=None, timings=None):
+    """
+    Tính toán metrics cho các channel
     - Channel 1: PCG (Phonocardiogram)
     - Channel 2: PPG (Photoplethysmgram)
     - Channel 3: ECG (Electrocardiogram)
     
+    Các channel độc lập với nhau nên có thể tính song song trên nhiều process
+    (find_peaks và FFT chiếm phần lớn thời gian). Kết quả giống hệt chế độ
+    tuần tự. Metric/channel không được chọn không tốn chi phí, và
+    processed_data chỉ cần chứa các channel thực sự được dùng.
+    
     Args:
         processed_data: dict chứa time, channel1, channel2, channel3
+        workers: Số process tính song song (None hoặc 1 = tuần tự)
+        executor: concurrent.futures.Executor dùng lại giữa các lần gọi
+                  (ưu tiên hơn workers)
+        spectral_method: 'fft' hoặc 'welch' cho phân tích miền tần số
+        h: h (meters) để tính MBP theo từng nhịp (None = chỉ tính PTT)
+        metrics: Tên các metric cần tính, trong CHANNEL_METRICS và
+                 RECORD_METRICS (None = tất cả)
+        channels: Các channel cần tính metrics của channel (None = tất cả)
+        timings: dict nhận thời gian của từng metric ("channel1.peaks", ...,
+                 "overall", "pulse_transit"); CPU time của metric tính trong
+                 process worker là của worker đó
         
     Returns:
-        dict chứa tất cả metrics
+        dict chứa các metrics được chọn
     """
+    names = _select(metrics, CHANNEL_METRICS + RECORD_METRICS, "Metric")
+    channel_metrics = [name for name in names if name in CHANNEL_METRICS]
+    channel_names = _select(channels, CHANNELS, "Channel") if channel_metrics else ()
+    
     time = processed_data["time"]
-    channel1 = processed_data["channel1"]
-    channel2 = processed_data["channel2"]
-    channel3 = processed_data["channel3"]
-    
-    results = {
-        "channel1": {},
-        "channel2": {},
-        "channel3": {},
-        "overall": {}
-    }
+    channel_arrays = [processed_data[name] for name in channel_names]
+    
+    results = {}
+    channel_func = calculate_channel_metrics if timings is None else _timed_channel_metrics
     
     # Xử lý từng channel
-    for i, channel_data in enumerate([channel1, channel2, channel3], 1):
-        channel_key = f"channel{i}"
-        
-        # Statistics
-        results[channel_key]["statistics"] = calculate_statistics(channel_data)
-        
-        # Baseline
-        results[channel_key]["baseline"] = calculate_baseline(channel_data)
-        
-        # Peaks
-        results[channel_key]["peaks"] = detect_peaks(channel_data, time)
-        
-        # Heart rate (nếu có peaks)
-        if results[channel_key]["peaks"]["count"] >= 2:
-            hr = calculate_heart_rate(results[channel_key]["peaks"], time)
-            results[channel_key]["heart_rate"] = hr
+    if not channel_arrays:
+        channel_results = []
+    elif executor is None and (workers is None or workers <= 1):
+        channel_results = [
+            channel_func(channel_data, time, spectral_method, channel_metrics)
+            for channel_data in channel_arrays
+        ]
+    else:
+        # Truyền numpy array (pickle nhanh hơn list float rất nhiều)
+        time_array = np.asarray(time, dtype=np.float64)
+        arrays = [np.asarray(channel_data, dtype=np.float64) for channel_data in channel_arrays]
+        if executor is not None:
+            futures = [
+                executor.submit(channel_func, a, time_array, spectral_method, channel_metrics)
+                for a in arrays
+            ]
+            channel_results = [future.result() for future in futures]
         else:
-            results[channel_key]["heart_rate"] = None
-        
-        # SNR
-        results[channel_key]["snr"] = calculate_snr(channel_data)
-        
-        # Frequency domain
-        results[channel_key]["frequency"] = calculate_frequency_domain(channel_data, time)
+            n = len(arrays)
+            with ProcessPoolExecutor(max_workers=min(workers, n)) as pool:
+                channel_results = list(pool.map(
+                    channel_func, arrays, [time_array] * n, [spectral_method] * n,
+                    [channel_metrics] * n
+                ))
+    
+    for name, channel_result in zip(channel_names, channel_results):
+        if timings is not None:
+            channel_result, channel_timings = channel_result
+            timings.update({f"{name}.{metric}": value for metric, value in channel_timings.items()})
+        results[name] = channel_result
     
     # Overall metrics
-    all_channels = np.concatenate([channel1, channel2, channel3])
-    results["overall"] = {
-        "total_samples": len(time),
-        "duration": float(time[-1] - time[0]) if len(time) > 1 else 0.0,
-        "mean_amplitude": float(np.mean(all_channels)),
-        "std_amplitude": float(np.std(all_channels))
-    }
+    if "overall" in names:
+        with timed(timings, "overall", len(time)):
+            all_channels = np.concatenate([processed_data[name] for name in CHANNELS])
+            results["overall"] = {
+                "total_samples": len(time),
+                "duration": float(time[-1] - time[0]) if len(time) > 1 else 0.0,
+                "mean_amplitude": float(np.mean(all_channels)),
+                "std_amplitude": float(np.std(all_channels))
+            }
+    
+    # PTT/MBP theo từng nhịp: R-peak ECG (channel3) -> chân xung PPG (channel2)
+    if "pulse_transit" in names:
+        with timed(timings, "pulse_transit", len(time)):
+            results["pulse_transit"] = calculate_pulse_transit(
+                processed_data["channel3"], processed_data["channel2"], time, h=h
+            )
     
     return results
 
@@ -363,6 +549,85 @@ def calculate_all_manual(ri, ri_next, foot_j, r_j, h):
     }
 
 
+def calculate_hr_array(ri, ri_next):
+    """
+    Phiên bản vector của calculate_hr
+    
+    Args:
+        ri: Mảng R_i (seconds)
+        ri_next: Mảng R_i+1 (seconds)
+        
+    Returns:
+        Mảng Heart Rate (bpm), NaN ở các dòng có R_i+1 <= R_i
+    """
+    rr = np.asarray(ri_next, dtype=np.float64) - np.asarray(ri, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(rr > 0, 60.0 / rr, np.nan)
+
+
+def calculate_ptt_array(foot_j, r_j):
+    """
+    Phiên bản vector của calculate_ptt
+    
+    Args:
+        foot_j: Mảng foot_j (seconds)
+        r_j: Mảng R_j (seconds)
+        
+    Returns:
+        Mảng Pulse Transit Time (seconds)
+    """
+    return np.asarray(foot_j, dtype=np.float64) - np.asarray(r_j, dtype=np.float64)
+
+
+def calculate_mbp_array(h, ptt):
+    """
+    Phiên bản vector của calculate_mbp
+    
+    Args:
+        h: Mảng (hoặc một giá trị) h (meters)
+        ptt: Mảng Pulse Transit Time (seconds)
+        
+    Returns:
+        Mảng Mean Blood Pressure (mmHg), NaN ở các dòng có PTT <= 0
+    """
+    h = np.asarray(h, dtype=np.float64)
+    ptt = np.asarray(ptt, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(ptt > 0, (1.947 * (h ** 2) / (ptt ** 2)) + 31.84 * h, np.nan)
+
+
+def calculate_all_manual_batch(ri, ri_next, foot_j, r_j, h):
+    """
+    Tính HR, PTT, MBP cho nhiều dòng input cùng lúc
+    
+    Dòng không hợp lệ không làm hỏng cả batch: lỗi được trả về theo từng
+    dòng, cùng thông báo với calculate_all_manual.
+    
+    Args:
+        ri, ri_next, foot_j, r_j, h: Các mảng cùng độ dài
+        
+    Returns:
+        dict chứa hr, ptt, mbp (numpy array) và errors (list, None nếu
+        dòng hợp lệ)
+    """
+    hr = calculate_hr_array(ri, ri_next)
+    ptt = calculate_ptt_array(foot_j, r_j)
+    mbp = calculate_mbp_array(h, ptt)
+    
+    errors = [None] * len(hr)
+    for i in np.flatnonzero(np.isnan(mbp)):
+        errors[i] = "PTT must be greater than 0"
+    for i in np.flatnonzero(np.isnan(hr)):
+        errors[i] = "R_i+1 must be greater than R_i"
+    
+    return {
+        "hr": hr,
+        "ptt": ptt,
+        "mbp": mbp,
+        "errors": errors
+    }
+
+
 if __name__ == "__main__":
     # Test
     import json
@@ -0,0 +1,199 @@
+"""
+Online Statistics Module
+Tích lũy thống kê của một channel theo từng chunk trong một lượt duyệt:
+mean/variance (Welford), min/max và quantile sketch bộ nhớ giới hạn cho
+median và percentile. Các accumulator gộp được với nhau, nên có thể tính
+song song trên nhiều worker rồi merge.
+"""
+import numpy as np
+
+
+# Số phần tử tối đa mỗi mức của quantile sketch
+DEFAULT_SKETCH_CAPACITY = 1 << 14
+
+
+class QuantileSketch:
+    """
+    Quantile sketch kiểu compactor (MRL/KLL) gộp được
+
+    Mức h chứa các phần tử đại diện cho 2^h mẫu. Khi một mức vượt quá
+    capacity phần tử, mức đó được sắp xếp và một nửa số phần tử (xen kẽ,
+    vị trí bắt đầu luân phiên 0/1) được đẩy lên mức h + 1.
+
+    Độ chính xác: khi tổng số mẫu n <= capacity không có mức nào bị nén và
+    quantile là chính xác (giống np.quantile). Ngược lại sai số thứ hạng
+    không vượt quá n * L / capacity, với L là số mức đã nén (rank_error);
+    ví dụ capacity = 16384 và n = 10^8 thì L <= 13, sai số <= 0.08% thứ
+    hạng. Bộ nhớ: tối đa capacity * (L + 1) giá trị.
+    """
+
+    def __init__(self, capacity=DEFAULT_SKETCH_CAPACITY):
+        if capacity < 2:
+            raise ValueError("capacity phải >= 2")
+        self.capacity = int(capacity)
+        self.count = 0
+        self._levels = []
+        self._parity = []
+
+    def _ensure_level(self, level):
+        while len(self._levels) <= level:
+            self._levels.append(np.empty(0, dtype=np.float64))
+            self._parity.append(0)
+
+    def _compress(self):
+        level = 0
+        while level < len(self._levels):
+            items = self._levels[level]
+            if len(items) > self.capacity:
+                items = np.sort(items)
+                # Số phần tử lẻ: giữ lại phần tử lớn nhất ở mức hiện tại
+                keep = items[-1:] if len(items) % 2 else items[:0]
+                paired = items[:len(items) - len(keep)]
+                offset = self._parity[level]
+                self._parity[level] ^= 1
+                self._ensure_level(level + 1)
+                self._levels[level] = keep.copy()
+                self._levels[level + 1] = np.concatenate([self._levels[level + 1], paired[offset::2]])
+            level += 1
+
+    def update(self, values):
+        """Thêm một chunk giá trị"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if len(values) == 0:
+            return
+        self._ensure_level(0)
+        self._levels[0] = np.concatenate([self._levels[0], values])
+        self.count += len(values)
+        self._compress()
+
+    def merge(self, other):
+        """Gộp một sketch khác vào sketch này"""
+        if other.count == 0:
+            return
+        self._ensure_level(len(other._levels) - 1)
+        for level, items in enumerate(other._levels):
+            self._levels[level] = np.concatenate([self._levels[level], items])
+        self.count += other.count
+        self._compress()
+
+    @property
+    def exact(self):
+        """True nếu chưa có mức nào bị nén (quantile chính xác)"""
+        return len(self._levels) <= 1
+
+    def rank_error(self):
+        """Cận trên sai số thứ hạng (tỉ lệ trên tổng số mẫu)"""
+        if self.exact:
+            return 0.0
+        return (len(self._levels) - 1) / self.capacity
+
+    def quantile(self, q):
+        """
+        Quantile q (0..1)
+
+        Chính xác (nội suy tuyến tính như np.quantile) khi exact, ngược lại
+        là phần tử có trọng số tích lũy đầu tiên đạt q * count.
+        """
+        if self.count == 0:
+            raise ValueError("Sketch rỗng")
+        if self.exact:
+            return float(np.quantile(self._levels[0], q))
+
+        values = np.concatenate(self._levels)
+        weights = np.concatenate([
+            np.full(len(items), 2.0 ** level) for level, items in enumerate(self._levels)
+        ])
+        order = np.argsort(values, kind='stable')
+        cumulative = np.cumsum(weights[order])
+        index = int(np.searchsorted(cumulative, q * cumulative[-1], side='left'))
+        return float(values[order][min(index, len(values) - 1)])
+
+
+class OnlineStatistics:
+    """
+    Accumulator thống kê một lượt cho một channel
+
+    Mean và variance được gộp theo công thức song song của Welford/Chan
+    (mỗi chunk tính mean và tổng bình phương độ lệch riêng, rồi gộp), nên
+    kết quả khớp np.mean/np.std tới sai số làm tròn. Min/max chính xác,
+    median và percentile lấy từ QuantileSketch.
+    """
+
+    def __init__(self, capacity=DEFAULT_SKETCH_CAPACITY):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.sketch = QuantileSketch(capacity)
+
+    def _combine(self, count, mean, m2, minimum, maximum):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.min = min(self.min, minimum)
+        self.max = max(self.max, maximum)
+
+    def update(self, values):
+        """Thêm một chunk giá trị"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if len(values) == 0:
+            return
+        mean = float(np.mean(values))
+        deviation = values - mean
+        self._combine(
+            len(values), mean, float(np.dot(deviation, deviation)),
+            float(np.min(values)), float(np.max(values))
+        )
+        self.sketch.update(values)
+
+    def merge(self, other):
+        """Gộp accumulator của một worker khác vào accumulator này"""
+        if other.count == 0:
+            return
+        self._combine(other.count, other.mean, other.m2, other.min, other.max)
+        self.sketch.merge(other.sketch)
+
+    @property
+    def variance(self):
+        return self.m2 / self.count if self.count else 0.0
+
+    def quantile(self, q):
+        """Quantile q (0..1), xem QuantileSketch.quantile"""
+        return min(max(self.sketch.quantile(q), self.min), self.max)
+
+    def result(self):
+        """
+        Thống kê đã tích lũy
+
+        Returns:
+            dict chứa mean, std, min, max, median, range (giống
+            calculate_statistics)
+        """
+        if self.count == 0:
+            raise ValueError("Không có dữ liệu")
+        return {
+            "mean": float(self.mean),
+            "std": float(np.sqrt(self.variance)),
+            "min": float(self.min),
+            "max": float(self.max),
+            "median": float(self.quantile(0.5)),
+            "range": float(self.max - self.min)
+        }
+
+
+def merge_statistics(accumulators):
+    """
+    Gộp nhiều accumulator (ví dụ từ các worker song song)
+
+    Returns:
+        OnlineStatistics mới chứa toàn bộ dữ liệu
+    """
+    accumulators = list(accumulators)
+    capacity = accumulators[0].sketch.capacity if accumulators else DEFAULT_SKETCH_CAPACITY
+    merged = OnlineStatistics(capacity)
+    for accumulator in accumulators:
+        merged.merge(accumulator)
+    return merged
@@ -0,0 +1,192 @@
+"""
+Pulse Transit Module
+Tính PTT và MBP theo từng nhịp cho toàn bộ bản ghi: R-peak của ECG
+(channel3) được ghép với chân xung PPG (channel2) ngay sau nó; các cặp
+cho PTT/MBP không hợp lý về sinh lý hoặc lệch xa phần còn lại bị loại
+"""
+import numpy as np
+
+from .beats import detect_beats, estimate_sampling_rate
+
+
+# Khoảng PTT được chấp nhận khi ghép R-peak với chân xung (giây)
+DEFAULT_MIN_PTT = 0.08
+DEFAULT_MAX_PTT = 0.5
+
+# Khoảng MBP được chấp nhận (mmHg); rộng vì thang MBP phụ thuộc h
+DEFAULT_MBP_RANGE = (20.0, 300.0)
+
+# Ngưỡng modified z-score (0.6745 * |x - median| / MAD) để loại PTT ngoại lai
+DEFAULT_OUTLIER_Z = 3.5
+
+# Khoảng tìm chân xung trước điểm dốc lên lớn nhất của mỗi xung (giây)
+DEFAULT_FOOT_LOOKBACK = 0.3
+
+# Khoảng lấy sai phân khi tính độ dốc PPG (giây), làm mượt nhiễu
+SLOPE_SPAN = 0.02
+
+# Số nhịp xử lý mỗi lần khi tìm chân xung (giới hạn bộ nhớ)
+_FOOT_BLOCK = 4096
+
+
+def detect_pulse_feet(ppg_data, time_data, lookback=DEFAULT_FOOT_LOOKBACK):
+    """
+    Tìm chân xung PPG bằng phương pháp tiếp tuyến cắt nhau (intersecting
+    tangents): giao điểm của tiếp tuyến tại điểm dốc lên lớn nhất với
+    đường nằm ngang qua cực tiểu ngay trước nó
+
+    Điểm dốc lên lớn nhất được tìm bằng detect_beats trên độ dốc của PPG
+    (sai phân qua SLOPE_SPAN giây), nên không bị ảnh hưởng bởi baseline
+    wander. Chân xung của mọi nhịp được tìm cùng lúc trên một ma trận
+    index (nhịp x mẫu), theo từng khối nhịp. Kết quả nằm giữa các mẫu, nên
+    không bị lệch về phía đuôi xung trước như điểm xa nhất dưới dây cung.
+
+    Args:
+        ppg_data: Tín hiệu PPG (channel2)
+        time_data: Mảng thời gian
+        lookback: Khoảng tìm cực tiểu trước điểm dốc nhất (giây)
+
+    Returns:
+        Mảng thời điểm chân xung (tăng dần, không trùng)
+    """
+    ppg_array = np.asarray(ppg_data, dtype=np.float64)
+    time_array = np.asarray(time_data, dtype=np.float64)
+    sampling_rate = estimate_sampling_rate(time_array)
+
+    # Độ dốc tại mẫu i: x[i + span] - x[i - span]
+    span = max(int(round(SLOPE_SPAN * sampling_rate / 2)), 1)
+    slope = np.zeros_like(ppg_array)
+    slope[span:-span] = ppg_array[2 * span:] - ppg_array[:-2 * span]
+
+    peaks = detect_beats(slope, time_array)["indices"]
+    peaks = peaks[(peaks >= span) & (peaks < len(ppg_array) - span)]
+    if len(peaks) == 0:
+        return np.empty(0, dtype=np.float64)
+
+    width = max(int(round(lookback * sampling_rate)), 1)
+    offsets = np.arange(-width, 1)
+    feet = np.empty(len(peaks), dtype=np.float64)
+    for begin in range(0, len(peaks), _FOOT_BLOCK):
+        block = peaks[begin:begin + _FOOT_BLOCK]
+        index = np.clip(block[:, None] + offsets, 0, len(ppg_array) - 1)
+        lowest = index[np.arange(len(block)), np.argmin(ppg_array[index], axis=1)]
+        # Độ dốc (đơn vị/giây) tại điểm dốc nhất
+        rate = slope[block] / (time_array[block + span] - time_array[block - span])
+        rise = ppg_array[block] - ppg_array[lowest]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            foot = np.where(rate > 0, time_array[block] - rise / rate, time_array[lowest])
+        feet[begin:begin + len(block)] = np.clip(foot, time_array[lowest], time_array[block])
+    return np.unique(feet)
+
+
+def reject_outliers(values, z=DEFAULT_OUTLIER_Z):
+    """
+    Mask các giá trị không ngoại lai theo modified z-score (median/MAD)
+
+    Args:
+        values: Mảng giá trị
+        z: Ngưỡng modified z-score
+
+    Returns:
+        Mảng bool (True = giữ)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return np.ones(0, dtype=bool)
+    deviation = np.abs(values - np.median(values))
+    mad = np.median(deviation)
+    if mad == 0:
+        return deviation == 0
+    return 0.6745 * deviation / mad <= z
+
+
+def pair_r_peaks_with_feet(r_times, foot_times, max_ptt=DEFAULT_MAX_PTT, min_ptt=DEFAULT_MIN_PTT):
+    """
+    Ghép mỗi R-peak với chân xung PPG đầu tiên sau nó ít nhất min_ptt
+
+    Chân xung sớm hơn min_ptt sau R-peak không thể là xung của nhịp đó
+    (thời gian lan truyền tối thiểu) nên bị bỏ qua; cặp chỉ hợp lệ khi
+    chân xung nằm trước R-peak kế tiếp và PTT không vượt quá max_ptt.
+
+    Args:
+        r_times: Thời điểm R-peak (tăng dần)
+        foot_times: Thời điểm chân xung (tăng dần)
+        max_ptt: PTT tối đa (giây)
+        min_ptt: PTT tối thiểu (giây)
+
+    Returns:
+        tuple (index R-peak, index chân xung) của các cặp hợp lệ
+    """
+    r_times = np.asarray(r_times, dtype=np.float64)
+    foot_times = np.asarray(foot_times, dtype=np.float64)
+
+    feet = np.searchsorted(foot_times, r_times + min_ptt, side='left')
+    valid = feet < len(foot_times)
+    r_index = np.flatnonzero(valid)
+    feet = feet[valid]
+
+    ptt = foot_times[feet] - r_times[r_index]
+    next_r = np.append(r_times[1:], np.inf)[r_index]
+    valid = (ptt <= max_ptt) & (foot_times[feet] < next_r)
+
+    return r_index[valid], feet[valid]
+
+
+def calculate_pulse_transit(ecg_data, ppg_data, time_data, h=None, max_ptt=DEFAULT_MAX_PTT,
+                            min_ptt=DEFAULT_MIN_PTT, mbp_range=DEFAULT_MBP_RANGE,
+                            outlier_z=DEFAULT_OUTLIER_Z):
+    """
+    PTT và MBP theo từng nhịp
+
+    PTT_i = foot_i - R_i, MBP_i = 1.947 * h² / PTT_i² + 31.84 * h
+    (giống calculate_ptt / calculate_mbp nhưng cho cả bản ghi một lần).
+    Cặp bị loại khi PTT ngoài [min_ptt, max_ptt], là ngoại lai so với các
+    PTT khác (modified z-score > outlier_z) hoặc MBP ngoài mbp_range; chỉ
+    các cặp còn lại được trả về và tính trung bình / trung vị.
+
+    Args:
+        ecg_data: Tín hiệu ECG (channel3)
+        ppg_data: Tín hiệu PPG (channel2)
+        time_data: Mảng thời gian
+        h: h (meters); None = không tính MBP
+        max_ptt: PTT tối đa khi ghép (giây)
+        min_ptt: PTT tối thiểu khi ghép (giây)
+        mbp_range: (min, max) MBP hợp lệ (mmHg)
+        outlier_z: Ngưỡng modified z-score của PTT (None = không loại)
+
+    Returns:
+        dict chứa count, rejected, h, r_times, foot_times, ptt, mbp (list,
+        mbp None nếu không có h), mean_ptt, median_ptt, mean_mbp, median_mbp
+    """
+    from .metrics import calculate_mbp_array
+
+    time_array = np.asarray(time_data, dtype=np.float64)
+    r_times = detect_beats(ecg_data, time_array)["times"]
+    foot_times = detect_pulse_feet(ppg_data, time_array)
+
+    r_index, foot_index = pair_r_peaks_with_feet(r_times, foot_times, max_ptt, min_ptt)
+    r_times = r_times[r_index]
+    foot_times = foot_times[foot_index]
+    ptt = foot_times - r_times
+    paired = len(ptt)
+
+    keep = reject_outliers(ptt, outlier_z) if outlier_z is not None else np.ones(paired, dtype=bool)
+    mbp = calculate_mbp_array(h, ptt) if h is not None else None
+    if mbp is not None:
+        keep &= (mbp >= mbp_range[0]) & (mbp <= mbp_range[1])
+        mbp = mbp[keep]
+    r_times, foot_times, ptt = r_times[keep], foot_times[keep], ptt[keep]
+
+    return {
+        "count": len(ptt),
+        "rejected": paired - len(ptt),
+        "h": h,
+        "r_times": r_times.tolist(),
+        "foot_times": foot_times.tolist(),
+        "ptt": ptt.tolist(),
+        "mbp": mbp.tolist() if mbp is not None else None,
+        "mean_ptt": float(np.mean(ptt)) if len(ptt) else None,
+        "median_ptt": float(np.median(ptt)) if len(ptt) else None,
+        "mean_mbp": float(np.mean(mbp)) if mbp is not None and len(mbp) else None,
+        "median_mbp": float(np.median(mbp)) if mbp is not None and len(mbp) else None
+    }
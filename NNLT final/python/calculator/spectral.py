@@ -0,0 +1,136 @@
+"""
+Spectral Analysis Module
+Tính phổ biên độ một lần cho mỗi channel (real FFT) để SNR và phân tích
+miền tần số dùng chung, cùng với ước lượng PSD Welch cho bản ghi dài
+"""
+import numpy as np
+from scipy import fft as sp_fft
+from scipy.signal import welch
+
+
+# Tần số chuẩn hóa (chu kỳ/mẫu) phân biệt nhiễu tần số cao
+NOISE_CUTOFF = 0.3
+
+# Độ dài mỗi đoạn Welch mặc định (mẫu)
+DEFAULT_WELCH_SEGMENT = 4096
+
+
+def fast_length(n):
+    """Độ dài >= n mà real FFT tính nhanh (tích các thừa số nguyên tố nhỏ)"""
+    return sp_fft.next_fast_len(max(int(n), 1), real=True)
+
+
+def compute_spectrum(channel_data, n_fft=None):
+    """
+    Tính phổ biên độ một phía bằng real FFT
+
+    Tín hiệu thực có phổ đối xứng liên hợp, nên rfft chỉ tính n_fft // 2 + 1
+    bin tần số không âm thay vì n_fft bin phức của fft. Tín hiệu được đệm 0
+    tới độ dài nhanh gần nhất.
+
+    Args:
+        channel_data: Mảng dữ liệu channel
+        n_fft: Độ dài FFT (None = fast_length(len(channel_data)))
+
+    Returns:
+        dict chứa magnitude (|X_k|, k = 0..n_fft // 2), n (số mẫu gốc) và n_fft
+    """
+    channel_array = np.asarray(channel_data, dtype=np.float64)
+    n = len(channel_array)
+    if n_fft is None:
+        n_fft = fast_length(n)
+
+    magnitude = np.abs(sp_fft.rfft(channel_array, n=n_fft)) if n > 0 else np.zeros(0)
+
+    return {
+        "magnitude": magnitude,
+        "n": n,
+        "n_fft": n_fft
+    }
+
+
+def _two_sided_weights(n_fft, count):
+    """
+    Số lần mỗi bin rfft xuất hiện trong phổ hai phía của fft
+
+    Bin 0 và bin Nyquist (n_fft chẵn) xuất hiện một lần, các bin còn lại hai
+    lần (tần số dương và âm có cùng biên độ).
+    """
+    weights = np.full(count, 2.0)
+    if count > 0:
+        weights[0] = 1.0
+        if n_fft % 2 == 0:
+            weights[-1] = 1.0
+    return weights
+
+
+def noise_power(spectrum, cutoff=NOISE_CUTOFF):
+    """
+    Phương sai biên độ của các thành phần tần số cao (|f| > cutoff)
+
+    Tương đương np.var(np.abs(fft(x))[np.abs(fftfreq(n_fft)) > cutoff]) nhưng
+    chỉ dùng nửa phổ: mỗi bin được tính với trọng số bằng số lần nó xuất hiện
+    trong phổ hai phía.
+
+    Args:
+        spectrum: Kết quả compute_spectrum
+        cutoff: Tần số chuẩn hóa (chu kỳ/mẫu)
+
+    Returns:
+        Noise power (0.0 nếu không có bin nào)
+    """
+    magnitude = spectrum["magnitude"]
+    n_fft = spectrum["n_fft"]
+
+    weights = _two_sided_weights(n_fft, len(magnitude))
+    mask = np.arange(len(magnitude)) / n_fft > cutoff
+    if not np.any(mask):
+        return 0.0
+
+    values = magnitude[mask]
+    weights = weights[mask]
+    mean = np.average(values, weights=weights)
+    return float(np.average((values - mean) ** 2, weights=weights))
+
+
+def dominant_frequency(spectrum, sampling_rate):
+    """
+    Tần số dương có biên độ lớn nhất và tần số dương lớn nhất của phổ
+
+    Chỉ xét các bin 0 < k < n_fft / 2 (giống phần tần số dương của fftfreq).
+
+    Args:
+        spectrum: Kết quả compute_spectrum
+        sampling_rate: Tần số lấy mẫu (Hz)
+
+    Returns:
+        tuple (dominant_frequency, max_frequency) theo Hz
+    """
+    n_fft = spectrum["n_fft"]
+    positive = spectrum["magnitude"][1:(n_fft - 1) // 2 + 1]
+    if len(positive) == 0:
+        return 0.0, 0.0
+
+    resolution = sampling_rate / n_fft
+    dominant = (int(np.argmax(positive)) + 1) * resolution
+    return float(dominant), float(len(positive) * resolution)
+
+
+def welch_psd(channel_data, sampling_rate, nperseg=DEFAULT_WELCH_SEGMENT):
+    """
+    Mật độ phổ công suất theo phương pháp Welch
+
+    Trung bình phổ của các đoạn chồng nhau 50%, nên ít nhiễu hơn một FFT
+    toàn bộ bản ghi và chỉ cần bộ nhớ cỡ một đoạn cho mỗi FFT.
+
+    Args:
+        channel_data: Mảng dữ liệu channel
+        sampling_rate: Tần số lấy mẫu (Hz)
+        nperseg: Số mẫu mỗi đoạn (bị giới hạn bởi độ dài tín hiệu)
+
+    Returns:
+        tuple (freq, psd)
+    """
+    channel_array = np.asarray(channel_data, dtype=np.float64)
+    nperseg = max(1, min(int(nperseg), len(channel_array)))
+    return welch(channel_array, fs=sampling_rate, nperseg=nperseg)
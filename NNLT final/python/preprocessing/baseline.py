@@ -0,0 +1,205 @@
+"""
+Baseline Module
+Ước lượng baseline trượt (running median / moving average) và trừ baseline
+wander khỏi từng channel, cho cả tín hiệu trong bộ nhớ lẫn theo từng chunk
+"""
+import numpy as np
+from scipy.ndimage import median_filter, uniform_filter1d
+
+
+# Độ dài cửa sổ baseline mặc định (giây), dài hơn một phức bộ QRS / một xung
+DEFAULT_BASELINE_WINDOW = 0.6
+
+BASELINE_METHODS = ("median", "mean")
+
+
+def baseline_window_samples(window, sampling_rate):
+    """Số mẫu (lẻ, >= 1) của cửa sổ baseline window giây"""
+    size = max(int(round(window * sampling_rate)), 1)
+    return size if size % 2 else size + 1
+
+
+def running_median(channel_data, size):
+    """
+    Median trượt, cửa sổ size mẫu căn giữa
+
+    Bộ lọc hạng 1 chiều của scipy.ndimage giữ cửa sổ trong hai heap nên
+    chi phí O(n log size), không sắp xếp lại từng cửa sổ như np.median. Hai
+    đầu tín hiệu được đệm bằng mẫu gần nhất.
+
+    Args:
+        channel_data: Mảng dữ liệu channel
+        size: Số mẫu của cửa sổ
+
+    Returns:
+        numpy array cùng độ dài
+    """
+    channel_array = np.asarray(channel_data, dtype=np.float64)
+    return median_filter(channel_array, size=int(size), mode='nearest')
+
+
+def moving_average(channel_data, size):
+    """
+    Trung bình trượt, cửa sổ size mẫu căn giữa
+
+    Dùng tổng trượt (cộng mẫu vào, trừ mẫu ra) nên chi phí O(n) bất kể
+    size. Hai đầu tín hiệu được đệm bằng mẫu gần nhất.
+
+    Args:
+        channel_data: Mảng dữ liệu channel
+        size: Số mẫu của cửa sổ
+
+    Returns:
+        numpy array cùng độ dài
+    """
+    channel_array = np.asarray(channel_data, dtype=np.float64)
+    return uniform_filter1d(channel_array, size=int(size), mode='nearest')
+
+
+def estimate_baseline(channel_data, size, method='median'):
+    """
+    Baseline trượt của tín hiệu
+
+    Args:
+        channel_data: Mảng dữ liệu channel
+        size: Số mẫu của cửa sổ
+        method: 'median' (running median) hoặc 'mean' (moving average)
+
+    Returns:
+        numpy array cùng độ dài
+    """
+    if method == 'median':
+        return running_median(channel_data, size)
+    if method == 'mean':
+        return moving_average(channel_data, size)
+    raise ValueError(f"Phương pháp baseline không hợp lệ: {method}")
+
+
+def remove_baseline(channel_data, sampling_rate, window=DEFAULT_BASELINE_WINDOW, method='median'):
+    """
+    Trừ baseline wander khỏi một channel
+
+    Args:
+        channel_data: Mảng dữ liệu channel
+        sampling_rate: Tần số lấy mẫu (Hz)
+        window: Độ dài cửa sổ baseline (giây)
+        method: 'median' hoặc 'mean'
+
+    Returns:
+        numpy array đã trừ baseline
+    """
+    channel_array = np.asarray(channel_data, dtype=np.float64)
+    size = baseline_window_samples(window, sampling_rate)
+    return channel_array - estimate_baseline(channel_array, size, method)
+
+
+class StreamingBaselineRemover:
+    """
+    Trừ baseline trượt theo từng chunk
+
+    Mỗi lần lọc, chunk mới được ghép với size - 1 mẫu cuối của lần trước
+    (nửa cửa sổ làm ngữ cảnh bên trái, nửa cửa sổ chưa xuất vì còn thiếu
+    ngữ cảnh bên phải), nên đầu ra trễ size // 2 mẫu và ghép lại giống hệt
+    remove_baseline trên toàn bộ tín hiệu. Bộ nhớ O(size + chunk).
+
+    Dùng:
+        remover = StreamingBaselineRemover(size)
+        for chunk in chunks:
+            corrected = remover.update(chunk)
+        corrected = remover.finalize()
+    """
+
+    def __init__(self, size, method='median'):
+        """
+        Args:
+            size: Số mẫu của cửa sổ
+            method: 'median' hoặc 'mean'
+        """
+        if method not in BASELINE_METHODS:
+            raise ValueError(f"Phương pháp baseline không hợp lệ: {method}")
+        self.size = int(size)
+        self.method = method
+        self._half = self.size // 2
+        self._values = np.empty(0, dtype=np.float64)
+        # Vị trí trong buffer của mẫu đầu tiên chưa xuất
+        self._pending = 0
+
+    def _emit(self, end):
+        baseline = estimate_baseline(self._values, self.size, self.method)
+        corrected = self._values[self._pending:end] - baseline[self._pending:end]
+        # Giữ lại nửa cửa sổ trước mẫu chưa xuất đầu tiên làm ngữ cảnh
+        drop = max(end - self._half, 0)
+        self._values = self._values[drop:]
+        self._pending = end - drop
+        return corrected
+
+    def update(self, values):
+        """
+        Thêm một chunk mẫu
+
+        Returns:
+            Các mẫu đã trừ baseline vừa đủ ngữ cảnh (trễ size // 2 mẫu)
+        """
+        values = np.asarray(values, dtype=np.float64)
+        self._values = np.concatenate([self._values, values])
+        ready = len(self._values) - self._half
+        if ready <= self._pending:
+            return np.empty(0, dtype=np.float64)
+        return self._emit(ready)
+
+    def finalize(self):
+        """
+        Các mẫu còn lại ở cuối bản ghi (đệm bằng mẫu cuối như remove_baseline)
+        """
+        if len(self._values) <= self._pending:
+            return np.empty(0, dtype=np.float64)
+        return self._emit(len(self._values))
+
+
+def remove_baseline_chunks(chunks, channels=("channel1", "channel2", "channel3"),
+                           sampling_rate=None, window=DEFAULT_BASELINE_WINDOW, method='median'):
+    """
+    Trừ baseline của các channel trong một chuỗi chunk (ví dụ stream_signal_file)
+
+    Args:
+        chunks: Iterable các dict chứa time và các channel
+        channels: Các channel cần trừ baseline
+        sampling_rate: Tần số lấy mẫu (None = ước lượng từ chunk đầu tiên)
+        window: Độ dài cửa sổ baseline (giây)
+        method: 'median' hoặc 'mean'
+
+    Yields:
+        dict chứa start, time và các channel đã trừ baseline (chunk trễ
+        nửa cửa sổ so với đầu vào, tổng số mẫu không đổi)
+    """
+    removers = None
+    times = np.empty(0, dtype=np.float64)
+    start = 0
+
+    def take(corrected):
+        nonlocal times, start
+        count = len(corrected[channels[0]])
+        chunk = {"start": start, "time": times[:count], **corrected}
+        times = times[count:]
+        start += count
+        return chunk
+
+    for chunk in chunks:
+        time = np.asarray(chunk["time"], dtype=np.float64)
+        if removers is None:
+            if len(time) == 0:
+                continue
+            if sampling_rate is None:
+                dt = float(np.median(np.diff(time))) if len(time) > 1 else 0.0
+                sampling_rate = 1.0 / dt if dt > 0 else 1000.0
+            size = baseline_window_samples(window, sampling_rate)
+            removers = {channel: StreamingBaselineRemover(size, method) for channel in channels}
+        times = np.concatenate([times, time])
+        corrected = {channel: removers[channel].update(chunk[channel]) for channel in channels}
+        if len(corrected[channels[0]]):
+            yield take(corrected)
+
+    if removers is not None:
+        corrected = {channel: removers[channel].finalize() for channel in channels}
+        if len(corrected[channels[0]]):
+            yield take(corrected)
@@ -0,0 +1,196 @@
+"""
+Columnar Cache Module
+Lưu dữ liệu đã parse của mỗi file upload thành các cột nhị phân (sidecar)
+và mở lại bằng np.memmap, để các lần xử lý sau không phải parse lại text
+"""
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from .processor import DEFAULT_CHUNK_SAMPLES, iter_time_chunks
+
+
+# Tăng khi định dạng cache thay đổi để cache cũ tự bị bỏ qua
+CACHE_VERSION = 1
+
+# Các cột được lưu: ADC raw của 3 channel và trục thời gian
+CACHE_COLUMNS = ("amp1", "amp2", "amp3", "time")
+
+CACHE_DTYPE = "<f8"
+
+META_FILE = "meta.json"
+
+
+def _source_signature(file_path):
+    """Kích thước và mtime của file gốc, dùng để phát hiện cache cũ"""
+    stat = os.stat(file_path)
+    return {"source_size": stat.st_size, "source_mtime_ns": stat.st_mtime_ns}
+
+
+def _make_meta(file_path, n_samples, rejected):
+    """meta.json của cache tạo từ file_path"""
+    return {
+        "version": CACHE_VERSION,
+        "samples": n_samples,
+        "dtype": CACHE_DTYPE,
+        "columns": list(CACHE_COLUMNS),
+        "rejected_rows": rejected,
+        **_source_signature(file_path)
+    }
+
+
+def _read_meta(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, META_FILE), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def build_signal_cache(file_path, cache_dir, chunk_size=DEFAULT_CHUNK_SAMPLES):
+    """
+    Parse file TXT một lần và ghi các cột ra thư mục cache
+
+    File được xử lý theo chunk (iter_time_chunks) nên bộ nhớ không phụ thuộc
+    độ dài file. Cache được ghi vào thư mục tạm rồi đổi tên, nên tiến trình
+    khác không bao giờ thấy cache ghi dở.
+
+    Args:
+        file_path: Đường dẫn đến file .txt
+        cache_dir: Thư mục cache của bản ghi
+        chunk_size: Số mẫu mỗi chunk khi parse
+
+    Returns:
+        dict meta của cache
+    """
+    parent = os.path.dirname(os.path.abspath(cache_dir))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=parent)
+
+    try:
+        files = {
+            name: open(os.path.join(tmp_dir, f"{name}.bin"), 'wb')
+            for name in CACHE_COLUMNS
+        }
+        n_samples = 0
+        rejected = 0
+        try:
+            for chunk in iter_time_chunks(file_path, chunk_size):
+                for name in CACHE_COLUMNS:
+                    column = np.ascontiguousarray(chunk[name], dtype=CACHE_DTYPE)
+                    files[name].write(column.tobytes())
+                n_samples += len(chunk["time"])
+                rejected += chunk["rejected_rows"]
+        finally:
+            for f in files.values():
+                f.close()
+
+        meta = _make_meta(file_path, n_samples, rejected)
+        with open(os.path.join(tmp_dir, META_FILE), 'w') as f:
+            json.dump(meta, f)
+
+        delete_signal_cache(cache_dir)
+        try:
+            os.replace(tmp_dir, cache_dir)
+        except OSError:
+            # Tiến trình khác vừa ghi cache của cùng file vào cache_dir
+            if not os.path.isdir(cache_dir):
+                raise
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    return meta
+
+
+def open_signal_cache(cache_dir, file_path=None):
+    """
+    Mở cache bằng np.memmap (chỉ đọc)
+
+    Args:
+        cache_dir: Thư mục cache của bản ghi
+        file_path: File gốc; nếu có, cache chỉ hợp lệ khi kích thước và
+                   mtime của file gốc khớp với lúc tạo cache
+
+    Returns:
+        dict chứa amp1, amp2, amp3, time (np.memmap) và meta,
+        hoặc None nếu cache không tồn tại hoặc đã cũ
+    """
+    meta = _read_meta(cache_dir)
+    if meta is None or meta.get("version") != CACHE_VERSION:
+        return None
+
+    if file_path is not None:
+        try:
+            signature = _source_signature(file_path)
+        except OSError:
+            return None
+        if any(meta.get(key) != value for key, value in signature.items()):
+            return None
+
+    n_samples = meta["samples"]
+    columns = {}
+    for name in meta["columns"]:
+        path = os.path.join(cache_dir, f"{name}.bin")
+        try:
+            if n_samples == 0 or os.path.getsize(path) != n_samples * np.dtype(meta["dtype"]).itemsize:
+                return None
+        except OSError:
+            return None
+        columns[name] = np.memmap(path, dtype=meta["dtype"], mode='r', shape=(n_samples,))
+
+    columns["meta"] = meta
+    return columns
+
+
+def load_signal_cache(file_path, cache_dir, chunk_size=DEFAULT_CHUNK_SAMPLES):
+    """
+    Mở cache của file, tạo mới nếu chưa có hoặc đã cũ
+
+    Args:
+        file_path: Đường dẫn đến file .txt
+        cache_dir: Thư mục cache của bản ghi
+        chunk_size: Số mẫu mỗi chunk khi phải parse lại
+
+    Cache vừa tạo có thể bị xóa hoặc thay thế bởi tiến trình khác trước khi
+    được mở lại (delete_signal_cache, build_signal_cache song song); khi đó
+    các cột được đọc thẳng từ file gốc như khi không có cache.
+
+    Returns:
+        dict như open_signal_cache (không bao giờ None)
+    """
+    columns = open_signal_cache(cache_dir, file_path)
+    if columns is None:
+        build_signal_cache(file_path, cache_dir, chunk_size)
+        columns = open_signal_cache(cache_dir, file_path)
+    if columns is None:
+        columns = read_signal_columns(file_path, chunk_size)
+    return columns
+
+
+def read_signal_columns(file_path, chunk_size=DEFAULT_CHUNK_SAMPLES):
+    """
+    Các cột của cache đọc thẳng từ file gốc, không ghi ra đĩa
+
+    Returns:
+        dict như open_signal_cache, các cột là np.ndarray trong bộ nhớ
+    """
+    blocks = {name: [] for name in CACHE_COLUMNS}
+    rejected = 0
+    for chunk in iter_time_chunks(file_path, chunk_size):
+        for name in CACHE_COLUMNS:
+            blocks[name].append(np.asarray(chunk[name], dtype=CACHE_DTYPE))
+        rejected += chunk["rejected_rows"]
+
+    columns = {name: np.concatenate(parts) for name, parts in blocks.items()}
+    columns["meta"] = _make_meta(file_path, len(columns["time"]), rejected)
+    return columns
+
+
+def delete_signal_cache(cache_dir):
+    """Xóa thư mục cache của bản ghi (nếu có)"""
+    shutil.rmtree(cache_dir, ignore_errors=True)
@@ -0,0 +1,183 @@
+"""
+Downsampling Module for Signal Display
+Xây dựng pyramid min/max nhiều mức cho từng channel và truy vấn số điểm
+vừa đủ để vẽ một khoảng thời gian với độ rộng pixel cho trước
+"""
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+
+# Tăng khi định dạng pyramid thay đổi
+PYRAMID_VERSION = 1
+
+# Mỗi mức gộp PYRAMID_FACTOR bucket của mức dưới
+PYRAMID_FACTOR = 8
+
+# Dừng khi số bucket của mức cao nhất không vượt quá ngưỡng này
+MAX_TOP_BUCKETS = 1024
+
+META_FILE = "meta.json"
+
+
+def _reduce_minmax(minimum, maximum, factor):
+    """Gộp từng nhóm factor phần tử (nhóm cuối có thể thiếu)"""
+    n = len(minimum)
+    starts = np.arange(0, n, factor)
+    return np.minimum.reduceat(minimum, starts), np.maximum.reduceat(maximum, starts)
+
+
+def build_minmax_pyramid(time_data, channels, factor=PYRAMID_FACTOR, max_top_buckets=MAX_TOP_BUCKETS):
+    """
+    Xây dựng pyramid min/max cho các channel
+
+    Mức k có bucket dài factor^(k+1) mẫu; mỗi bucket lưu thời điểm mẫu
+    đầu tiên và giá trị min/max của từng channel trong bucket.
+
+    Args:
+        time_data: Mảng thời gian
+        channels: dict tên channel -> mảng giá trị
+        factor: Hệ số gộp giữa hai mức liên tiếp
+        max_top_buckets: Số bucket tối đa của mức cao nhất
+
+    Returns:
+        list các mức, mỗi mức là dict chứa bucket (số mẫu/bucket), time
+        và <channel>_min, <channel>_max
+    """
+    time_array = np.asarray(time_data, dtype=np.float64)
+    arrays = {name: np.asarray(values, dtype=np.float64) for name, values in channels.items()}
+    n = len(time_array)
+
+    levels = []
+    if n == 0:
+        return levels
+
+    bucket = 1
+    current = {name: (values, values) for name, values in arrays.items()}
+    while True:
+        bucket *= factor
+        level = {"bucket": bucket, "time": time_array[::bucket].copy()}
+        for name, (minimum, maximum) in current.items():
+            minimum, maximum = _reduce_minmax(minimum, maximum, factor)
+            level[f"{name}_min"] = minimum
+            level[f"{name}_max"] = maximum
+            current[name] = (minimum, maximum)
+        levels.append(level)
+        if len(level["time"]) <= max_top_buckets:
+            break
+
+    return levels
+
+
+def save_pyramid(levels, pyramid_dir, n_samples):
+    """
+    Ghi pyramid ra thư mục (mỗi mảng là một file .npy để mở bằng memmap)
+
+    Args:
+        levels: Kết quả build_minmax_pyramid
+        pyramid_dir: Thư mục đích (bị thay thế nếu đã tồn tại)
+        n_samples: Số mẫu của bản ghi
+    """
+    parent = os.path.dirname(os.path.abspath(pyramid_dir))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=parent)
+
+    try:
+        meta_levels = []
+        for k, level in enumerate(levels):
+            names = []
+            for name, values in level.items():
+                if name == "bucket":
+                    continue
+                np.save(os.path.join(tmp_dir, f"L{k}_{name}.npy"), values)
+                names.append(name)
+            meta_levels.append({"bucket": level["bucket"], "count": len(level["time"]), "arrays": names})
+
+        with open(os.path.join(tmp_dir, META_FILE), 'w') as f:
+            json.dump({"version": PYRAMID_VERSION, "samples": n_samples, "levels": meta_levels}, f)
+
+        shutil.rmtree(pyramid_dir, ignore_errors=True)
+        os.replace(tmp_dir, pyramid_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+def open_pyramid(pyramid_dir):
+    """
+    Đọc meta của pyramid
+
+    Returns:
+        dict meta hoặc None nếu pyramid không tồn tại / đã cũ
+    """
+    try:
+        with open(os.path.join(pyramid_dir, META_FILE), 'r') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("version") != PYRAMID_VERSION:
+        return None
+    meta["dir"] = pyramid_dir
+    return meta
+
+
+def _level_array(meta, k, name):
+    return np.load(os.path.join(meta["dir"], f"L{k}_{name}.npy"), mmap_mode='r')
+
+
+def query_window(meta, channel, t0, t1, width, read_raw):
+    """
+    Trả về các điểm cần vẽ channel trong khoảng [t0, t1] với width pixel
+
+    Nếu số mẫu gốc trong khoảng không vượt quá 2 * width, trả về mẫu gốc.
+    Ngược lại chọn mức pyramid mịn nhất có không quá width bucket trong
+    khoảng và trả về cặp (min, max) của từng bucket, nên số điểm luôn
+    khoảng 2 * width bất kể độ dài bản ghi.
+
+    Args:
+        meta: Kết quả open_pyramid
+        channel: Tên channel ('channel1', 'channel2', 'channel3')
+        t0, t1: Khoảng thời gian (None = đầu/cuối bản ghi)
+        width: Số pixel theo trục thời gian
+        read_raw: Hàm (name, start, stop) -> mảng mẫu gốc trong [start, stop)
+
+    Returns:
+        dict chứa level (-1 = mẫu gốc), bucket, time và values
+    """
+    width = max(1, int(width))
+    n = meta["samples"]
+
+    # Khoảng mẫu gốc, xác định qua thời điểm bucket của mức thấp nhất
+    base = meta["levels"][0]["bucket"]
+    base_time = _level_array(meta, 0, "time")
+    first = 0 if t0 is None else max(int(np.searchsorted(base_time, t0, side='right')) - 1, 0)
+    last = len(base_time) if t1 is None else int(np.searchsorted(base_time, t1, side='right'))
+    start, stop = first * base, min(last * base, n)
+
+    if stop - start <= 2 * width:
+        time = np.asarray(read_raw("time", start, stop))
+        values = np.asarray(read_raw(channel, start, stop))
+        lo = 0 if t0 is None else int(np.searchsorted(time, t0, side='left'))
+        hi = len(time) if t1 is None else int(np.searchsorted(time, t1, side='right'))
+        return {"level": -1, "bucket": 1, "time": time[lo:hi], "values": values[lo:hi]}
+
+    for k, level in enumerate(meta["levels"]):
+        bucket = level["bucket"]
+        b0, b1 = start // bucket, -(-stop // bucket)
+        if b1 - b0 <= width or k == len(meta["levels"]) - 1:
+            break
+
+    time = _level_array(meta, k, "time")[b0:b1]
+    minimum = _level_array(meta, k, f"{channel}_min")[b0:b1]
+    maximum = _level_array(meta, k, f"{channel}_max")[b0:b1]
+
+    # Mỗi bucket -> 2 điểm (min, max) cùng thời điểm bắt đầu bucket
+    return {
+        "level": k,
+        "bucket": bucket,
+        "time": np.repeat(time, 2),
+        "values": np.column_stack([minimum, maximum]).ravel()
+    }
@@ -0,0 +1,170 @@
+"""
+Filters Module
+Bộ lọc theo từng channel (ECG band-pass, PPG low-pass, PCG band-pass) dạng
+second-order sections, thiết kế một lần cho mỗi tần số lấy mẫu: zero-phase
+(sosfiltfilt) khi xử lý offline, nhân quả với trạng thái mang qua các chunk
+khi streaming
+"""
+from functools import lru_cache
+
+import numpy as np
+from scipy.signal import butter, sosfilt, sosfilt_zi, sosfiltfilt
+
+
+# Bộ lọc Butterworth mặc định của từng channel: (loại, tần số cắt Hz, bậc)
+FILTER_SPECS = {
+    # PCG (Phonocardiogram): tiếng tim 25-400 Hz
+    "channel1": ("bandpass", (25.0, 400.0), 4),
+    # PPG: dạng xung dưới 8 Hz
+    "channel2": ("lowpass", 8.0, 4),
+    # ECG: 0.5-40 Hz, loại baseline wander và nhiễu điện lưới/cơ
+    "channel3": ("bandpass", (0.5, 40.0), 4),
+}
+
+# Số chữ số có nghĩa của tần số lấy mẫu khi tra cache thiết kế
+SAMPLING_RATE_DIGITS = 4
+
+
+@lru_cache(maxsize=64)
+def design_sos(btype, cutoff, order, sampling_rate):
+    """
+    Thiết kế bộ lọc Butterworth dạng SOS (có cache theo tham số)
+
+    Tần số cắt không nhỏ hơn Nyquist được bỏ: band-pass thành high-pass,
+    low-pass thành không lọc.
+
+    Args:
+        btype: 'lowpass', 'highpass' hoặc 'bandpass'
+        cutoff: Tần số cắt (Hz), tuple (thấp, cao) với band-pass
+        order: Bậc bộ lọc
+        sampling_rate: Tần số lấy mẫu (Hz)
+
+    Returns:
+        Mảng SOS (n_sections, 6) hoặc None nếu không cần lọc
+    """
+    nyquist = sampling_rate / 2.0
+    if btype == "bandpass":
+        low, high = cutoff
+        if high >= nyquist:
+            btype, cutoff = "highpass", low
+    if btype in ("lowpass", "highpass"):
+        cutoff = float(cutoff)
+        if not 0 < cutoff < nyquist:
+            return None
+    elif btype != "bandpass":
+        raise ValueError(f"Loại bộ lọc không hợp lệ: {btype}")
+    return butter(order, cutoff, btype=btype, fs=sampling_rate, output="sos")
+
+
+def channel_sos(spec, sampling_rate):
+    """
+    SOS của một spec (btype, cutoff, order) tại tần số lấy mẫu
+
+    Tần số lấy mẫu được làm tròn tới SAMPLING_RATE_DIGITS chữ số có nghĩa
+    (sai khác của tần số ước lượng từ trục thời gian không đáng kể với đáp
+    ứng bộ lọc), nên các bản ghi cùng thiết bị dùng chung một thiết kế.
+    """
+    btype, cutoff, order = spec
+    if isinstance(cutoff, (list, tuple)):
+        cutoff = tuple(float(c) for c in cutoff)
+    sampling_rate = float(f"{float(sampling_rate):.{SAMPLING_RATE_DIGITS}g}")
+    return design_sos(btype, cutoff, int(order), sampling_rate)
+
+
+def filter_channel(channel_data, sampling_rate, spec):
+    """
+    Lọc zero-phase một channel (sosfiltfilt, không trễ pha)
+
+    Args:
+        channel_data: Mảng dữ liệu channel
+        sampling_rate: Tần số lấy mẫu (Hz)
+        spec: (btype, cutoff, order), xem FILTER_SPECS
+
+    Returns:
+        numpy array đã lọc
+    """
+    channel_array = np.asarray(channel_data, dtype=np.float64)
+    sos = channel_sos(spec, sampling_rate)
+    if sos is None or len(channel_array) < 2:
+        return channel_array.copy()
+    # Tín hiệu ngắn hơn đoạn đệm mặc định của sosfiltfilt
+    padlen = 3 * (2 * len(sos) + 1)
+    return sosfiltfilt(sos, channel_array, padlen=min(padlen, len(channel_array) - 1))
+
+
+def filter_signal(data, sampling_rate, specs=None):
+    """
+    Lọc zero-phase các channel của một bản ghi
+
+    Args:
+        data: dict chứa các channel
+        sampling_rate: Tần số lấy mẫu (Hz)
+        specs: dict channel -> spec (None = FILTER_SPECS)
+
+    Returns:
+        dict channel -> numpy array đã lọc
+    """
+    specs = FILTER_SPECS if specs is None else specs
+    return {channel: filter_channel(data[channel], sampling_rate, spec) for channel, spec in specs.items()}
+
+
+class StreamingFilter:
+    """
+    Lọc nhân quả (sosfilt) theo từng chunk
+
+    Trạng thái của các section được mang từ chunk này sang chunk sau nên
+    ghép các chunk lại giống hệt sosfilt trên toàn bộ tín hiệu. Trạng thái
+    đầu được đặt ở trạng thái ổn định với mẫu đầu tiên (sosfilt_zi), tránh
+    quá độ khi tín hiệu có offset DC.
+    """
+
+    def __init__(self, sos):
+        """
+        Args:
+            sos: Mảng SOS (None = không lọc)
+        """
+        self.sos = sos
+        self._zi = None
+
+    def update(self, values):
+        """Lọc một chunk, trả về chunk đã lọc cùng độ dài"""
+        values = np.asarray(values, dtype=np.float64)
+        if self.sos is None or len(values) == 0:
+            return values
+        if self._zi is None:
+            self._zi = sosfilt_zi(self.sos) * values[0]
+        filtered, self._zi = sosfilt(self.sos, values, zi=self._zi)
+        return filtered
+
+
+def filter_chunks(chunks, specs=None, sampling_rate=None):
+    """
+    Lọc các channel trong một chuỗi chunk (ví dụ stream_signal_file)
+
+    Args:
+        chunks: Iterable các dict chứa time và các channel
+        specs: dict channel -> spec (None = FILTER_SPECS)
+        sampling_rate: Tần số lấy mẫu (None = ước lượng từ chunk đầu tiên)
+
+    Yields:
+        Chunk với các channel đã lọc (các key khác giữ nguyên)
+    """
+    specs = FILTER_SPECS if specs is None else specs
+    filters = None
+    for chunk in chunks:
+        if filters is None:
+            if len(chunk["time"]) == 0:
+                yield chunk
+                continue
+            if sampling_rate is None:
+                time = np.asarray(chunk["time"], dtype=np.float64)
+                dt = float(np.median(np.diff(time))) if len(time) > 1 else 0.0
+                sampling_rate = 1.0 / dt if dt > 0 else 1000.0
+            filters = {
+                channel: StreamingFilter(channel_sos(spec, sampling_rate))
+                for channel, spec in specs.items()
+            }
+        yield {
+            **chunk,
+            **{channel: channel_filter.update(chunk[channel]) for channel, channel_filter in filters.items()}
+        }
@@ -3,9 +3,30 @@ Preprocessing Module for Signal Data
 Converts ADC raw values to Volt and calculates time axis
 """
 import json
+import itertools
+import warnings
 import numpy as np
 
 
+# Cột 7, 8, 9 (index 6, 7, 8) chứa giá trị ADC của 3 channel
+CHANNEL_COLUMNS = (6, 7, 8)
+
+# Số cột tối thiểu của một dòng hợp lệ
+MIN_COLUMNS = 9
+
+# Số dòng đọc mỗi block khi parse hàng loạt
+DEFAULT_BLOCK_LINES = 1 << 16
+
+# Số mẫu mỗi chunk ở chế độ streaming
+DEFAULT_CHUNK_SAMPLES = 1 << 18
+
+# Time step mặc định khi không có time step hợp lệ (1ms)
+DEFAULT_TIME_STEP = 0.001
+
+# Block nhỏ hơn ngưỡng này sẽ được parse từng dòng khi có dòng lỗi
+_FALLBACK_LINES = 64
+
+
 def read_txt_file(file_path):
     """
     Đọc file TXT và trả về dữ liệu dạng mảng
@@ -34,6 +55,132 @@ def read_txt_file(file_path):
     return np.array(data)
 
 
+def count_lines(file_path, buffer_size=1 << 24):
+    """
+    Đếm số dòng của file (giới hạn trên của số mẫu) mà không decode text
+    
+    Args:
+        file_path: Đường dẫn đến file .txt
+        buffer_size: Kích thước buffer đọc (bytes)
+        
+    Returns:
+        Số dòng trong file
+    """
+    count = 0
+    last = b'\n'
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(buffer_size), b''):
+            count += chunk.count(b'\n')
+            last = chunk[-1:]
+    # Dòng cuối không có ký tự xuống dòng
+    if last != b'\n':
+        count += 1
+    return count
+
+
+def _parse_lines(lines, usecols, dtype):
+    """
+    Parse một block dòng, chỉ đọc các cột trong usecols
+    
+    Block được parse bằng np.loadtxt (C parser). Nếu block có dòng lỗi,
+    block được chia đôi và parse lại cho đến khi đủ nhỏ, khi đó các dòng
+    được kiểm tra từng dòng như read_txt_file.
+    
+    Returns:
+        tuple (list các mảng 2D, số dòng bị loại)
+    """
+    try:
+        with warnings.catch_warnings():
+            # Block chỉ gồm dòng trống: loadtxt cảnh báo "input contained no data"
+            warnings.simplefilter('ignore', UserWarning)
+            block = np.loadtxt(lines, usecols=usecols, dtype=dtype, comments=None, ndmin=2)
+        return [block], 0
+    except ValueError:
+        pass
+    
+    if len(lines) > _FALLBACK_LINES:
+        mid = len(lines) // 2
+        head, head_rejected = _parse_lines(lines[:mid], usecols, dtype)
+        tail, tail_rejected = _parse_lines(lines[mid:], usecols, dtype)
+        return head + tail, head_rejected + tail_rejected
+    
+    min_columns = max(MIN_COLUMNS, max(usecols) + 1)
+    rows = []
+    rejected = 0
+    for line in lines:
+        values = line.split()
+        if not values:
+            continue
+        if len(values) < min_columns:
+            rejected += 1
+            continue
+        try:
+            rows.append([float(values[c]) for c in usecols])
+        except ValueError:
+            rejected += 1
+    
+    block = np.array(rows, dtype=dtype).reshape(len(rows), len(usecols))
+    return [block], rejected
+
+
+def iter_column_blocks(file_path, usecols=CHANNEL_COLUMNS, dtype=np.float64,
+                       block_lines=DEFAULT_BLOCK_LINES):
+    """
+    Đọc file TXT theo từng block, chỉ giữ các cột cần thiết
+    
+    Args:
+        file_path: Đường dẫn đến file .txt
+        usecols: Các cột cần đọc (index từ 0)
+        dtype: Kiểu dữ liệu của mảng kết quả
+        block_lines: Số dòng mỗi block
+        
+    Yields:
+        tuple (mảng 2D shape (n, len(usecols)), số dòng bị loại trong block)
+    """
+    usecols = tuple(usecols)
+    with open(file_path, 'r') as f:
+        while True:
+            lines = list(itertools.islice(f, block_lines))
+            if not lines:
+                break
+            blocks, rejected = _parse_lines(lines, usecols, dtype)
+            for i, block in enumerate(blocks):
+                yield block, rejected if i == 0 else 0
+
+
+def read_channel_columns(file_path, usecols=CHANNEL_COLUMNS, dtype=np.float64,
+                         block_lines=DEFAULT_BLOCK_LINES):
+    """
+    Đọc hàng loạt các cột ADC từ file TXT vào buffer NumPy cấp phát trước
+    
+    Khác với read_txt_file, hàm chỉ parse các cột trong usecols và parse
+    theo block bằng C parser của NumPy. Dòng trống bị bỏ qua; dòng có ít hơn
+    9 cột hoặc có giá trị không phải số ở các cột được đọc bị loại và được
+    đếm. Giá trị ở các cột metadata (1-6) không được kiểm tra.
+    
+    Args:
+        file_path: Đường dẫn đến file .txt
+        usecols: Các cột cần đọc (mặc định cột 7, 8, 9)
+        dtype: Kiểu dữ liệu của buffer kết quả
+        block_lines: Số dòng mỗi block
+        
+    Returns:
+        tuple (numpy array shape (n, len(usecols)), số dòng bị loại)
+    """
+    usecols = tuple(usecols)
+    capacity = count_lines(file_path)
+    data = np.empty((capacity, len(usecols)), dtype=dtype)
+    
+    n = 0
+    rejected = 0
+    for block, block_rejected in iter_column_blocks(file_path, usecols, dtype, block_lines):
+        data[n:n + len(block)] = block
+        n += len(block)
+        rejected += block_rejected
+    
+    return data[:n], rejected
+
+
 def extract_channels(data):
     """
     Trích xuất 3 channel từ cột 7, 8, 9
@@ -54,14 +201,9 @@ def extract_channels(data):
     return amp1, amp2, amp3
 
 
-def calculate_time_step(amp1, amp2, amp3):
+def select_time_steps(amp1, amp2, amp3):
     """
-    Tính time step từ công thức f1, f2 và f3
-    
-    Công thức:
-    Channel 1 (PCG): f1 = ((5/2) / (2^23)) * Amp1
-    Channel 2 (PPG): f2 = ((5/2) / (2^23)) * Amp2
-    Channel 3 (ECG): f3 = (10*(Amp3 - 2^24) / 2) / (2^24 - 1)
+    Chọn time step thô từ f1, f2, f3 (chưa thay thế giá trị không hợp lệ)
     
     Args:
         amp1: Mảng giá trị Amp1
@@ -69,7 +211,7 @@ def calculate_time_step(amp1, amp2, amp3):
         amp3: Mảng giá trị Amp3
         
     Returns:
-        numpy array chứa time steps
+        numpy array chứa time steps thô
     """
     # Tính f1, f2 và f3
     f1 = ((5.0 / 2.0) / (2**23)) * amp1
@@ -78,7 +220,7 @@ def calculate_time_step(amp1, amp2, amp3):
     
     # Sử dụng f1 làm time step chính, fallback sang f2, sau đó f3
     # Nếu f1 có giá trị hợp lệ, dùng f1, ngược lại thử f2, cuối cùng dùng f3
-    time_steps = np.where(
+    return np.where(
         (np.abs(f1) > 1e-10) & (f1 > 0) & (f1 < 1.0), 
         f1,
         np.where(
@@ -87,23 +229,47 @@ def calculate_time_step(amp1, amp2, amp3):
             f3
         )
     )
+
+
+def calculate_time_step(amp1, amp2, amp3, mean_step=None):
+    """
+    Tính time step từ công thức f1, f2 và f3
+    
+    Công thức:
+    Channel 1 (PCG): f1 = ((5/2) / (2^23)) * Amp1
+    Channel 2 (PPG): f2 = ((5/2) / (2^23)) * Amp2
+    Channel 3 (ECG): f3 = (10*(Amp3 - 2^24) / 2) / (2^24 - 1)
+    
+    Args:
+        amp1: Mảng giá trị Amp1
+        amp2: Mảng giá trị Amp2
+        amp3: Mảng giá trị Amp3
+        mean_step: Giá trị thay thế cho time step không hợp lệ
+                   (None = trung bình các time step hợp lệ trong mảng)
+        
+    Returns:
+        numpy array chứa time steps
+    """
+    time_steps = select_time_steps(amp1, amp2, amp3)
     
     # Đảm bảo time step dương và hợp lý
     # Nếu time step âm hoặc quá lớn, sử dụng giá trị trung bình
-    valid_steps = time_steps[(time_steps > 0) & (time_steps < 1.0)]
-    if len(valid_steps) > 0:
-        mean_step = np.mean(valid_steps)
-    else:
-        # Fallback: tính time step từ sampling rate giả định
-        mean_step = 0.001  # 1ms default
+    valid = (time_steps > 0) & (time_steps < 1.0)
+    if mean_step is None:
+        valid_steps = time_steps[valid]
+        if len(valid_steps) > 0:
+            mean_step = np.mean(valid_steps)
+        else:
+            # Fallback: tính time step từ sampling rate giả định
+            mean_step = DEFAULT_TIME_STEP
     
     # Thay thế các giá trị không hợp lệ bằng mean_step
-    time_steps = np.where((time_steps > 0) & (time_steps < 1.0), time_steps, mean_step)
+    time_steps = np.where(valid, time_steps, mean_step)
     
     return time_steps
 
 
-def calculate_time_axis(time_steps):
+def calculate_time_axis(time_steps, start=None):
     """
     Tính trục thời gian từ time steps
     
@@ -111,11 +277,15 @@ def calculate_time_axis(time_steps):
     
     Args:
         time_steps: Mảng time steps
+        start: Thời điểm của mẫu ngay trước mảng (khi xử lý theo chunk).
+               None = mảng bắt đầu từ đầu bản ghi, t[0] = 0
         
     Returns:
         numpy array chứa thời gian tích lũy
     """
     time = np.zeros(len(time_steps))
+    if len(time_steps) > 0 and start is not None:
+        time[0] = start + time_steps[0]
     for i in range(1, len(time_steps)):
         time[i] = time[i-1] + time_steps[i]
     
@@ -142,47 +312,330 @@ def convert_adc_to_volt(adc_value, adc_resolution=24, voltage_range=5.0):
     return volt
 
 
-def process_signal_file(file_path):
+def _cumsum_inplace(values):
+    """
+    Cộng dồn tại chỗ; với float32 dùng bộ cộng float64 theo block
+    để sai số trục thời gian không tăng theo số mẫu
+    """
+    if values.dtype == np.float64:
+        np.cumsum(values, out=values)
+        return values
+    
+    block = 1 << 16
+    scratch = np.empty(min(block, len(values)), dtype=np.float64)
+    carry = 0.0
+    for begin in range(0, len(values), block):
+        part = values[begin:begin + block]
+        acc = scratch[:len(part)]
+        np.cumsum(part, dtype=np.float64, out=acc)
+        acc += carry
+        carry = float(acc[-1])
+        part[...] = acc
+    return values
+
+
+def preprocess_kernel(amp1, amp2, amp3, out=None, dtype=np.float64, mean_step=None, start=None):
+    """
+    Kernel tiền xử lý gộp: time step, trục thời gian và ADC -> Volt
+    
+    Tương đương calculate_time_step + calculate_time_axis + 3 lần
+    convert_adc_to_volt nhưng ghi trực tiếp vào một buffer (4, n) cấp phát
+    một lần, dùng các phép toán out= / tại chỗ và cumsum thay cho vòng lặp
+    Python. Bộ nhớ tạm chỉ gồm 2 mảng bool độ dài n.
+    
+    Sai số so với các hàm cũ:
+    - float64: channel và time step giống hệt từng bit; trục thời gian giống
+      hệt khi mean_step được truyền vào, còn khi kernel tự tính mean_step thì
+      sai khác tương đối <= 1e-12 (chỉ do thứ tự cộng khi lấy trung bình)
+    - float32: channel sai khác tương đối <= 6e-8 (làm tròn float32); time
+      step f3 tính bằng float32, trục thời gian được cộng dồn bằng float64
+      nên sai số tương đối của trục thời gian <= 5e-7
+    
+    Args:
+        amp1: Mảng giá trị Amp1
+        amp2: Mảng giá trị Amp2
+        amp3: Mảng giá trị Amp3
+        out: Buffer kết quả shape (4, n) (None = cấp phát mới)
+        dtype: np.float64 hoặc np.float32 (bỏ qua nếu có out)
+        mean_step: Time step thay thế (None = trung bình các time step hợp lệ)
+        start: Thời điểm của mẫu ngay trước mảng (xem calculate_time_axis)
+        
+    Returns:
+        tuple (out, mean_step) với out[0] = time, out[1..3] = channel1..3 (Volt)
+    """
+    n = len(amp1)
+    if out is None:
+        out = np.empty((4, n), dtype=dtype)
+    time, channel1, channel2, channel3 = out
+    
+    # ADC -> Volt; với channel 1, 2 đây cũng chính là f1, f2
+    # ((5/2) / 2^23) * Amp == (Amp / 2^23) * (5/2) vì chia cho lũy thừa của 2 là chính xác
+    scale = (5.0 / 2.0) / (2**23)
+    np.multiply(amp1, scale, out=channel1)
+    np.multiply(amp2, scale, out=channel2)
+    np.multiply(amp3, scale, out=channel3)
+    
+    # f3 = (10*(Amp3 - 2^24) / 2) / (2^24 - 1), ghi vào hàng time làm time step
+    np.subtract(amp3, 2**24, out=time)
+    np.multiply(time, 10.0, out=time)
+    np.divide(time, 2.0, out=time)
+    np.divide(time, 2**24 - 1, out=time)
+    
+    # Ưu tiên f1, sau đó f2, cuối cùng f3 (ghi đè theo thứ tự ngược)
+    mask = np.empty(n, dtype=bool)
+    scratch = np.empty(n, dtype=bool)
+    for f in (channel2, channel1):
+        np.greater(f, 1e-10, out=mask)
+        np.less(f, 1.0, out=scratch)
+        np.logical_and(mask, scratch, out=mask)
+        np.copyto(time, f, where=mask)
+    
+    # Time step không hợp lệ -> mean_step
+    np.greater(time, 0, out=mask)
+    np.less(time, 1.0, out=scratch)
+    np.logical_and(mask, scratch, out=mask)
+    if mean_step is None:
+        valid_count = np.count_nonzero(mask)
+        if valid_count > 0:
+            mean_step = float(np.sum(time, where=mask, dtype=np.float64)) / valid_count
+        else:
+            mean_step = DEFAULT_TIME_STEP
+    np.logical_not(mask, out=mask)
+    np.copyto(time, mean_step, where=mask)
+    
+    # Trục thời gian: t[0] = 0 (hoặc start + step[0]), t[n] = t[n-1] + step[n]
+    if n > 0:
+        time[0] = 0.0 if start is None else start + time[0]
+        _cumsum_inplace(time)
+    
+    return out, mean_step
+
+
+def process_signal_file(file_path, cache_dir=None, baseline=None, baseline_window=None, filters=None,
+                        timings=None):
     """
     Hàm chính xử lý file signal
     
     Args:
         file_path: Đường dẫn đến file .txt
+        cache_dir: Thư mục cache dạng cột (xem preprocessing.cache). Nếu có,
+                   ADC raw và trục thời gian được đọc bằng np.memmap từ cache
+                   (tạo cache ở lần đầu) thay vì parse lại file text
+        baseline: Trừ baseline wander khỏi mỗi channel ('median' hoặc
+                  'mean', xem preprocessing.baseline); None = giữ nguyên
+        baseline_window: Độ dài cửa sổ baseline (giây, None = mặc định)
+        filters: Lọc zero-phase từng channel sau khi trừ baseline: True =
+                 preprocessing.filters.FILTER_SPECS, hoặc dict channel ->
+                 (btype, cutoff, order); None = không lọc
+        timings: dict nhận thời gian của từng bước (read, time_axis hoặc
+                 convert, baseline, filters, tolist), xem preprocessing.timing
         
     Returns:
         dict chứa time, channel1, channel2, channel3 (đã convert sang Volt)
+        và rejected_rows (số dòng bị loại khi đọc file)
     """
-    # Đọc dữ liệu
-    data = read_txt_file(file_path)
-    
-    if len(data) == 0:
-        raise ValueError("File không chứa dữ liệu hợp lệ")
+    from .timing import timed
     
-    # Trích xuất channels
-    amp1, amp2, amp3 = extract_channels(data)
-    
-    # Tính time steps
-    time_steps = calculate_time_step(amp1, amp2, amp3)
+    if cache_dir is not None:
+        from .cache import load_signal_cache
+        
+        # Trục thời gian đã có trong cache, chỉ cần convert ADC sang Volt
+        with timed(timings, "read") as record:
+            columns = load_signal_cache(file_path, cache_dir)
+            time = columns["time"]
+            record["samples"] = len(time)
+        with timed(timings, "convert", len(time)):
+            channel1_volt = convert_adc_to_volt(columns["amp1"])
+            channel2_volt = convert_adc_to_volt(columns["amp2"])
+            channel3_volt = convert_adc_to_volt(columns["amp3"])
+        rejected = columns["meta"]["rejected_rows"]
+    else:
+        # Đọc dữ liệu (chỉ cột 7, 8, 9)
+        with timed(timings, "read") as record:
+            data, rejected = read_channel_columns(file_path)
+            record["samples"] = len(data)
+        
+        if len(data) == 0:
+            raise ValueError("File không chứa dữ liệu hợp lệ")
+        
+        # Trích xuất channels (data chỉ chứa 3 cột đã chọn)
+        amp1, amp2, amp3 = data[:, 0], data[:, 1], data[:, 2]
+        
+        # Time step, trục thời gian và ADC -> Volt trong một buffer
+        with timed(timings, "time_axis", len(data)):
+            out, _ = preprocess_kernel(amp1, amp2, amp3)
+        time, channel1_volt, channel2_volt, channel3_volt = out
     
-    # Tính trục thời gian
-    time = calculate_time_axis(time_steps)
+    if baseline is not None:
+        from .baseline import DEFAULT_BASELINE_WINDOW, remove_baseline
+        
+        with timed(timings, "baseline", len(time)):
+            sampling_rate = _sampling_rate(time)
+            window = baseline_window or DEFAULT_BASELINE_WINDOW
+            channel1_volt, channel2_volt, channel3_volt = (
+                remove_baseline(channel, sampling_rate, window, baseline)
+                for channel in (channel1_volt, channel2_volt, channel3_volt)
+            )
     
-    # Convert ADC sang Volt
-    channel1_volt = convert_adc_to_volt(amp1)
-    channel2_volt = convert_adc_to_volt(amp2)
-    channel3_volt = convert_adc_to_volt(amp3)
+    if filters:
+        from .filters import filter_signal
+        
+        with timed(timings, "filters", len(time)):
+            channels = {"channel1": channel1_volt, "channel2": channel2_volt, "channel3": channel3_volt}
+            channels.update(filter_signal(channels, _sampling_rate(time), None if filters is True else filters))
+            channel1_volt, channel2_volt, channel3_volt = (
+                channels["channel1"], channels["channel2"], channels["channel3"]
+            )
     
     # Trả về kết quả
-    result = {
-        "time": time.tolist(),
-        "channel1": channel1_volt.tolist(),
-        "channel2": channel2_volt.tolist(),
-        "channel3": channel3_volt.tolist()
-    }
+    with timed(timings, "tolist", len(time)):
+        result = {
+            "time": time.tolist(),
+            "channel1": channel1_volt.tolist(),
+            "channel2": channel2_volt.tolist(),
+            "channel3": channel3_volt.tolist(),
+            "rejected_rows": rejected
+        }
     
     return result
 
 
+def _sampling_rate(time):
+    """
+    Tần số lấy mẫu trung bình của trục thời gian (bằng 1 / mean_step, vì mọi
+    time step không hợp lệ đã được thay bằng mean_step)
+    """
+    duration = float(time[-1] - time[0]) if len(time) > 1 else 0.0
+    return (len(time) - 1) / duration if duration > 0 else 1.0 / DEFAULT_TIME_STEP
+
+
+def calculate_mean_step(file_path, chunk_size=DEFAULT_CHUNK_SAMPLES):
+    """
+    Quét file theo chunk để tính time step thay thế toàn cục
+    
+    Kết quả bằng giá trị mean_step mà calculate_time_step tính trên toàn bộ
+    file (sai khác chỉ do thứ tự cộng dấu phẩy động, cỡ 1e-15 tương đối).
+    
+    Args:
+        file_path: Đường dẫn đến file .txt
+        chunk_size: Số mẫu mỗi chunk
+        
+    Returns:
+        tuple (mean_step, tổng số mẫu hợp lệ)
+    """
+    step_sum = 0.0
+    step_count = 0
+    n_samples = 0
+    for block, _ in iter_column_blocks(file_path, block_lines=chunk_size):
+        time_steps = select_time_steps(block[:, 0], block[:, 1], block[:, 2])
+        valid_steps = time_steps[(time_steps > 0) & (time_steps < 1.0)]
+        step_sum += float(np.sum(valid_steps))
+        step_count += len(valid_steps)
+        n_samples += len(block)
+    
+    mean_step = step_sum / step_count if step_count > 0 else DEFAULT_TIME_STEP
+    return mean_step, n_samples
+
+
+def iter_time_chunks(file_path, chunk_size=DEFAULT_CHUNK_SAMPLES, mean_step=None):
+    """
+    Đọc file theo chunk và tính trục thời gian, giữ nguyên giá trị ADC
+    
+    Trạng thái giữa các chunk gồm thời điểm của mẫu cuối (để nối trục thời
+    gian) và time step thay thế toàn cục. Nếu mean_step không được truyền
+    vào, file được quét một lượt trước để tính giá trị này, nên kết quả ghép
+    lại giống xử lý toàn bộ file.
+    
+    Args:
+        file_path: Đường dẫn đến file .txt
+        chunk_size: Số mẫu tối đa mỗi chunk
+        mean_step: Time step thay thế (None = tính từ toàn bộ file)
+        
+    Yields:
+        dict chứa start (index mẫu đầu tiên), amp1, amp2, amp3 (ADC raw),
+        time, channel1, channel2, channel3 (Volt) và rejected_rows
+    """
+    if mean_step is None:
+        mean_step, n_samples = calculate_mean_step(file_path, chunk_size)
+        if n_samples == 0:
+            raise ValueError("File không chứa dữ liệu hợp lệ")
+    
+    start = 0
+    last_time = None
+    for block, rejected in iter_column_blocks(file_path, block_lines=chunk_size):
+        amp1, amp2, amp3 = block[:, 0], block[:, 1], block[:, 2]
+        
+        out, _ = preprocess_kernel(amp1, amp2, amp3, mean_step=mean_step, start=last_time)
+        time = out[0]
+        
+        yield {
+            "start": start,
+            "amp1": amp1,
+            "amp2": amp2,
+            "amp3": amp3,
+            "time": time,
+            "channel1": out[1],
+            "channel2": out[2],
+            "channel3": out[3],
+            "rejected_rows": rejected
+        }
+        
+        if len(block) > 0:
+            start += len(block)
+            last_time = float(time[-1])
+    
+    if start == 0:
+        raise ValueError("File không chứa dữ liệu hợp lệ")
+
+
+def stream_signal_file(file_path, chunk_size=DEFAULT_CHUNK_SAMPLES, mean_step=None,
+                       baseline=None, baseline_window=None, filters=None):
+    """
+    Xử lý file signal theo từng chunk với bộ nhớ giới hạn
+    
+    Mỗi chunk đi qua parse -> calculate_time_step -> trục thời gian ->
+    convert_adc_to_volt (xem iter_time_chunks). Bộ nhớ đỉnh chỉ phụ thuộc
+    vào chunk_size.
+    
+    Args:
+        file_path: Đường dẫn đến file .txt
+        chunk_size: Số mẫu tối đa mỗi chunk
+        mean_step: Time step thay thế (None = tính từ toàn bộ file)
+        baseline: Trừ baseline wander ('median' hoặc 'mean'); các chunk
+                  chồng nhau nửa cửa sổ khi lọc nên kết quả ghép lại giống
+                  process_signal_file, nhưng trễ nửa cửa sổ và không còn
+                  rejected_rows
+        baseline_window: Độ dài cửa sổ baseline (giây, None = mặc định)
+        filters: Như process_signal_file, nhưng lọc nhân quả (sosfilt) với
+                 trạng thái bộ lọc mang qua các chunk
+        
+    Yields:
+        dict chứa start (index mẫu đầu tiên), time, channel1, channel2,
+        channel3 (numpy array, đã convert sang Volt) và rejected_rows
+    """
+    keys = ("start", "time", "channel1", "channel2", "channel3", "rejected_rows")
+    if (baseline is not None or filters) and mean_step is None:
+        mean_step, n_samples = calculate_mean_step(file_path, chunk_size)
+        if n_samples == 0:
+            raise ValueError("File không chứa dữ liệu hợp lệ")
+    chunks = (
+        {key: chunk[key] for key in keys}
+        for chunk in iter_time_chunks(file_path, chunk_size, mean_step)
+    )
+    if baseline is not None:
+        from .baseline import DEFAULT_BASELINE_WINDOW, remove_baseline_chunks
+        
+        chunks = remove_baseline_chunks(
+            chunks, sampling_rate=1.0 / mean_step,
+            window=baseline_window or DEFAULT_BASELINE_WINDOW, method=baseline
+        )
+    if filters:
+        from .filters import filter_chunks
+        
+        chunks = filter_chunks(chunks, None if filters is True else filters, sampling_rate=1.0 / mean_step)
+    yield from chunks
+
+
 def save_processed_data(data, output_path):
     """
     Lưu dữ liệu đã xử lý ra file JSON
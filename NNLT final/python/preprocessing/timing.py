@@ -0,0 +1,44 @@
+"""
+Timing Module
+Đo thời gian wall-clock, CPU và số mẫu của từng bước xử lý, để chẩn đoán
+bản ghi xử lý chậm
+"""
+import time
+from contextlib import contextmanager
+
+
+@contextmanager
+def timed(timings, stage, samples=None):
+    """
+    Đo một khối lệnh và ghi vào timings[stage]
+
+    CPU time là của thread hiện tại (time.thread_time), nên không lẫn với
+    các job khác chạy song song trong cùng process.
+
+    Dùng:
+        with timed(timings, "read") as record:
+            data = read(...)
+            record["samples"] = len(data)
+
+    Args:
+        timings: dict kết quả (None = không đo)
+        stage: Tên bước
+        samples: Số mẫu được xử lý (có thể gán sau qua record["samples"])
+
+    Yields:
+        dict của bước; timings[stage] = {"wall", "cpu", "samples"} (giây)
+    """
+    record = {"samples": samples}
+    if timings is None:
+        yield record
+        return
+    wall = time.perf_counter()
+    cpu = time.thread_time()
+    try:
+        yield record
+    finally:
+        timings[stage] = {
+            "wall": time.perf_counter() - wall,
+            "cpu": time.thread_time() - cpu,
+            "samples": record["samples"]
+        }
@@ -0,0 +1,25 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import beat_times, synthesize_block
+
+SAMPLING_RATE = 1000.0
+
+
+def make_recording(duration=60.0, ptt=0.2, sampling_rate=SAMPLING_RATE, seed=0):
+    """Bản ghi tổng hợp (time, pcg, ppg, ecg, R-peak thật) với PTT đã biết"""
+    n_samples = int(duration * sampling_rate)
+    beats = beat_times(duration + 2.0, seed=seed)
+    pcg, ppg, ecg = synthesize_block(0, n_samples, beats, sampling_rate, ptt=ptt, seed=seed)
+    time = np.arange(n_samples) / sampling_rate
+    return time, pcg, ppg, ecg, beats[beats < duration]
+
+
+@pytest.fixture(scope="session")
+def recording():
+    return make_recording()
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from preprocessing.baseline import (
+    StreamingBaselineRemover,
+    baseline_window_samples,
+    moving_average,
+    remove_baseline,
+    remove_baseline_chunks,
+    running_median,
+)
+
+
+def naive(values, size, reduce):
+    """Cửa sổ trượt căn giữa tính trực tiếp, đệm bằng mẫu gần nhất"""
+    half = size // 2
+    padded = np.pad(values, half, mode='edge')
+    return np.array([reduce(padded[i:i + size]) for i in range(len(values))])
+
+
+@pytest.fixture
+def signal():
+    rng = np.random.default_rng(0)
+    t = np.arange(5000) / 1000.0
+    return 1e-3 * np.sin(2 * np.pi * 0.3 * t) + 1e-4 * rng.standard_normal(len(t))
+
+
+@pytest.mark.parametrize("size", [1, 5, 101])
+def test_running_filters_match_naive(signal, size):
+    values = signal[:700]
+    np.testing.assert_array_equal(running_median(values, size), naive(values, size, np.median))
+    np.testing.assert_allclose(moving_average(values, size), naive(values, size, np.mean), atol=1e-15)
+
+
+def test_baseline_window_samples_is_odd():
+    assert baseline_window_samples(0.6, 1000.0) == 601
+    assert baseline_window_samples(0.6, 500.0) == 301
+    assert baseline_window_samples(0.0, 1000.0) == 1
+
+
+def test_remove_baseline_removes_wander():
+    t = np.arange(20000) / 1000.0
+    spikes = np.where(np.arange(len(t)) % 800 == 400, 1e-3, 0.0)
+    wander = 0.5e-3 * np.sin(2 * np.pi * 0.1 * t)
+    corrected = remove_baseline(spikes + wander, 1000.0)
+    # Median của đoạn sin đơn điệu là giá trị ở tâm; sai số lớn nhất ở đỉnh sin
+    np.testing.assert_allclose(corrected[1000:-1000], spikes[1000:-1000], atol=1e-5)
+
+
+@pytest.mark.parametrize("method", ["median", "mean"])
+@pytest.mark.parametrize("chunk_size", [1, 37, 250, 1000, 6000])
+def test_streaming_remover_matches_remove_baseline(signal, method, chunk_size):
+    size = baseline_window_samples(0.2, 1000.0)
+    remover = StreamingBaselineRemover(size, method)
+    parts = [remover.update(signal[i:i + chunk_size]) for i in range(0, len(signal), chunk_size)]
+    parts.append(remover.finalize())
+    streamed = np.concatenate(parts)
+    expected = remove_baseline(signal, 1000.0, 0.2, method)
+    assert len(streamed) == len(signal)
+    np.testing.assert_allclose(streamed, expected, rtol=1e-12, atol=1e-15)
+
+
+def test_remove_baseline_chunks_keeps_time_aligned(signal):
+    time = np.arange(len(signal)) / 1000.0
+    chunks = (
+        {"start": i, "time": time[i:i + 700], "channel1": signal[i:i + 700]}
+        for i in range(0, len(signal), 700)
+    )
+    out = list(remove_baseline_chunks(chunks, channels=("channel1",), window=0.2))
+    assert [chunk["start"] for chunk in out] == list(np.cumsum([0] + [len(c["time"]) for c in out[:-1]]))
+    np.testing.assert_array_equal(np.concatenate([chunk["time"] for chunk in out]), time)
+    np.testing.assert_allclose(
+        np.concatenate([chunk["channel1"] for chunk in out]),
+        remove_baseline(signal, 1000.0, 0.2), rtol=1e-12, atol=1e-15
+    )
+
+
+def test_invalid_method():
+    with pytest.raises(ValueError):
+        StreamingBaselineRemover(5, "mode")
+    with pytest.raises(ValueError):
+        remove_baseline(np.zeros(10), 1000.0, method="mode")
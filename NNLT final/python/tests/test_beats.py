@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from calculator.beats import StreamingBeatDetector, detect_beats
+from tests.conftest import make_recording
+
+# Sai số cho phép giữa R-peak phát hiện và R-peak thật (giây)
+TOLERANCE = 0.02
+
+
+def match(detected, true):
+    """(số nhịp thật được phát hiện, số nhịp phát hiện không khớp nhịp thật)"""
+    detected = np.asarray(detected)
+    if len(detected) == 0:
+        return 0, 0
+    distance = np.abs(detected[:, None] - true[None, :])
+    hits = np.unique(np.argmin(distance, axis=1)[distance.min(axis=1) <= TOLERANCE])
+    false = int(np.sum(distance.min(axis=1) > TOLERANCE))
+    return len(hits), false
+
+
+def true_beats(beats, time, start=0.0):
+    # Bỏ nhịp quá sát hai đầu bản ghi
+    return beats[(beats >= start + 0.05) & (beats <= time[-1] - 0.05)]
+
+
+def test_clean_recording(recording):
+    time, _, _, ecg, beats = recording
+    true = true_beats(beats, time)
+    hits, false = match(detect_beats(ecg, time)["times"], true)
+    assert hits == len(true)
+    assert false == 0
+
+
+def test_artifact_spike_in_first_window(recording):
+    time, _, _, ecg, beats = recording
+    ecg = ecg.copy()
+    # Spike gấp 20 lần biên độ QRS giữa hai nhịp đầu
+    spike = int((beats[0] + beats[1]) / 2 * 1000)
+    ecg[spike:spike + 5] += 20e-3
+    true = true_beats(beats, time)
+    hits, false = match(detect_beats(ecg, time)["times"], true)
+    assert hits == len(true)
+    assert false <= 1
+
+
+def test_amplitude_drop():
+    time, _, _, ecg, beats = make_recording(duration=120.0)
+    ecg = ecg.copy()
+    ecg[time >= 60.0] *= 0.3
+    true = true_beats(beats, time, start=60.0)
+    detected = detect_beats(ecg, time)["times"]
+    hits, false = match(detected[detected >= 60.0], true)
+    assert hits >= len(true) - 1
+    assert false == 0
+
+
+def test_amplitude_drop_recovers_before_next_window():
+    time, _, _, ecg, beats = make_recording(duration=120.0)
+    ecg = ecg.copy()
+    ecg[time >= 60.0] *= 0.3
+    true = true_beats(beats, time, start=63.0)
+    detected = detect_beats(ecg, time)["times"]
+    hits, _ = match(detected[detected >= 63.0], true)
+    assert hits == len(true)
+
+
+@pytest.mark.parametrize("chunk_size", [7, 997, 2000, 4096])
+def test_chunk_invariance(recording, chunk_size):
+    time, _, _, ecg, _ = recording
+    ecg = ecg.copy()
+    ecg[1500:1505] += 20e-3
+    ecg[time >= 30.0] *= 0.3
+    whole = detect_beats(ecg, time)
+    chunked = detect_beats(ecg, time, chunk_size=chunk_size)
+    for key in ("indices", "times", "rr", "hr"):
+        np.testing.assert_array_equal(chunked[key], whole[key])
+
+
+def test_rr_and_hr(recording):
+    time, _, _, ecg, beats = recording
+    result = detect_beats(ecg, time)
+    assert np.isnan(result["rr"][0]) and np.isnan(result["hr"][0])
+    np.testing.assert_allclose(result["rr"][1:], np.diff(result["times"]))
+    assert np.nanmedian(result["hr"]) == pytest.approx(72, rel=0.05)
+
+
+def test_requires_time_or_sampling_rate():
+    with pytest.raises(ValueError):
+        StreamingBeatDetector().update(np.zeros(10))
@@ -0,0 +1,48 @@
+import numpy as np
+
+from preprocessing import cache
+from preprocessing.cache import build_signal_cache, load_signal_cache, open_signal_cache
+from tests.test_processor import write_signal_file
+
+
+def assert_same_columns(columns, expected):
+    for name in cache.CACHE_COLUMNS:
+        np.testing.assert_array_equal(columns[name], expected[name])
+    assert columns["meta"] == expected["meta"]
+
+
+def test_load_after_lost_race_reads_the_source(tmp_path, monkeypatch):
+    path = tmp_path / "signal.txt"
+    write_signal_file(path, n_rows=2000)
+    build_signal_cache(path, tmp_path / "expected", chunk_size=300)
+    expected = open_signal_cache(tmp_path / "expected", path)
+
+    cache_dir = tmp_path / "cache"
+    build = cache.build_signal_cache
+
+    def build_then_delete(*args):
+        # Tiến trình khác xóa cache ngay sau khi tạo
+        meta = build(*args)
+        cache.delete_signal_cache(cache_dir)
+        return meta
+
+    monkeypatch.setattr(cache, "build_signal_cache", build_then_delete)
+    assert_same_columns(load_signal_cache(path, cache_dir, chunk_size=300), expected)
+
+
+def test_build_keeps_the_cache_of_a_concurrent_build(tmp_path, monkeypatch):
+    path = tmp_path / "signal.txt"
+    write_signal_file(path, n_rows=2000)
+    cache_dir = tmp_path / "cache"
+    delete = cache.delete_signal_cache
+
+    def delete_then_lose(target):
+        # Tiến trình khác ghi xong cache giữa lúc xóa và lúc đổi tên
+        delete(target)
+        monkeypatch.setattr(cache, "delete_signal_cache", delete)
+        build_signal_cache(path, cache_dir)
+
+    monkeypatch.setattr(cache, "delete_signal_cache", delete_then_lose)
+    meta = build_signal_cache(path, cache_dir)
+    assert meta == open_signal_cache(cache_dir, path)["meta"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["cache", "signal.txt"]
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from preprocessing.downsample import build_minmax_pyramid, open_pyramid, query_window, save_pyramid
+
+
+@pytest.fixture(scope="module")
+def pyramid(tmp_path_factory):
+    rng = np.random.default_rng(0)
+    n = 200000
+    time = np.arange(n) / 1000.0
+    values = np.sin(2 * np.pi * time) + 0.1 * rng.standard_normal(n)
+    directory = tmp_path_factory.mktemp("pyramid")
+    save_pyramid(build_minmax_pyramid(time, {"channel1": values}), directory, n)
+    raw = {"time": time, "channel1": values}
+
+    def read_raw(name, start, stop):
+        return raw[name][start:stop]
+
+    return open_pyramid(directory), time, values, read_raw
+
+
+@pytest.mark.parametrize("t0, t1, width", [(None, None, 500), (10.0, 150.0, 300), (50.0, 50.2, 1000)])
+def test_window_envelope(pyramid, t0, t1, width):
+    meta, time, values, read_raw = pyramid
+    window = query_window(meta, "channel1", t0, t1, width, read_raw)
+    assert len(window["time"]) <= 2 * width
+    lo = 0 if t0 is None else np.searchsorted(time, t0)
+    hi = len(time) if t1 is None else np.searchsorted(time, t1, side="right")
+    # Min/max của cửa sổ bằng min/max của mẫu gốc trong khoảng
+    # (bucket biên có thể lấn ra ngoài khoảng)
+    assert np.min(window["values"]) <= np.min(values[lo:hi])
+    assert np.max(window["values"]) >= np.max(values[lo:hi])
+    if window["level"] == -1:
+        np.testing.assert_array_equal(window["values"], values[lo:hi])
+
+
+def test_every_bucket_bounds_its_samples(pyramid):
+    meta, time, values, read_raw = pyramid
+    window = query_window(meta, "channel1", 20.0, 40.0, 100, read_raw)
+    bucket = window["bucket"]
+    assert window["level"] >= 0
+    starts = np.round(window["time"][::2] * 1000).astype(int)
+    for start, minimum, maximum in zip(starts, window["values"][::2], window["values"][1::2]):
+        samples = values[start:start + bucket]
+        assert minimum == samples.min() and maximum == samples.max()
+
+
+def test_open_missing_pyramid(tmp_path):
+    assert open_pyramid(tmp_path / "missing") is None
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+from scipy.signal import sosfilt, sosfilt_zi
+
+from preprocessing.filters import (
+    FILTER_SPECS,
+    StreamingFilter,
+    channel_sos,
+    design_sos,
+    filter_channel,
+    filter_chunks,
+    filter_signal,
+)
+
+SAMPLING_RATE = 1000.0
+
+
+def tone(frequency, n=10000, offset=0.0):
+    t = np.arange(n) / SAMPLING_RATE
+    return t, offset + np.sin(2 * np.pi * frequency * t)
+
+
+def test_design_drops_cutoff_above_nyquist():
+    # Band-pass 25-400 Hz ở 500 Hz: thành high-pass 25 Hz
+    assert design_sos("bandpass", (25.0, 400.0), 4, 500.0).shape == design_sos("highpass", 25.0, 4, 500.0).shape
+    assert design_sos("lowpass", 8.0, 4, 10.0) is None
+    with pytest.raises(ValueError):
+        design_sos("notch", 50.0, 2, SAMPLING_RATE)
+
+
+def test_channel_sos_rounds_sampling_rate():
+    assert channel_sos(FILTER_SPECS["channel3"], 1000.00001) is channel_sos(FILTER_SPECS["channel3"], 1000.0)
+
+
+def test_filter_channel_is_zero_phase():
+    _, passband = tone(10.0)
+    _, stopband = tone(100.0)
+    filtered = filter_channel(passband + stopband, SAMPLING_RATE, FILTER_SPECS["channel3"])
+    middle = slice(2000, 8000)
+    # 10 Hz giữ nguyên biên độ và pha, 100 Hz bị loại
+    np.testing.assert_allclose(filtered[middle], passband[middle], atol=0.02)
+
+
+def test_filter_signal_keeps_unfiltered_channels():
+    _, values = tone(5.0, n=2000)
+    data = {"channel1": values, "channel2": values, "channel3": values}
+    filtered = filter_signal(data, SAMPLING_RATE, {"channel2": FILTER_SPECS["channel2"]})
+    assert list(filtered) == ["channel2"]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 33, 1000, 10000])
+def test_streaming_filter_matches_sosfilt(chunk_size):
+    _, values = tone(20.0, offset=0.5)
+    values = values + np.random.default_rng(0).standard_normal(len(values)) * 0.1
+    sos = channel_sos(FILTER_SPECS["channel3"], SAMPLING_RATE)
+    streaming = StreamingFilter(sos)
+    streamed = np.concatenate([
+        streaming.update(values[i:i + chunk_size]) for i in range(0, len(values), chunk_size)
+    ])
+    expected, _ = sosfilt(sos, values, zi=sosfilt_zi(sos) * values[0])
+    np.testing.assert_allclose(streamed, expected, rtol=1e-12, atol=1e-15)
+
+
+def test_filter_chunks_matches_whole_signal():
+    time, values = tone(7.0, offset=-2e-3)
+    chunks = [
+        {"start": i, "time": time[i:i + 999], "channel1": values[i:i + 999],
+         "channel2": values[i:i + 999], "channel3": values[i:i + 999]}
+        for i in range(0, len(time), 999)
+    ]
+    out = list(filter_chunks(chunks))
+    assert [chunk["start"] for chunk in out] == [chunk["start"] for chunk in chunks]
+    for channel, spec in FILTER_SPECS.items():
+        sos = channel_sos(spec, SAMPLING_RATE)
+        expected, _ = sosfilt(sos, values, zi=sosfilt_zi(sos) * values[0])
+        np.testing.assert_allclose(
+            np.concatenate([chunk[channel] for chunk in out]), expected, rtol=1e-12, atol=1e-15
+        )
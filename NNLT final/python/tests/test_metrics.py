@@ -0,0 +1,106 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from calculator.metrics import (
+    accumulate_statistics,
+    calculate_all_manual,
+    calculate_all_manual_batch,
+    calculate_all_metrics,
+    calculate_channel_metrics,
+    calculate_frequency_domain,
+    calculate_snr,
+    calculate_statistics,
+)
+from calculator.spectral import compute_spectrum, noise_power
+
+
+@pytest.fixture(scope="module")
+def processed_data():
+    """20 giây tín hiệu tổng hợp 1 kHz: PCG, PPG và ECG dạng xung"""
+    rng = np.random.default_rng(0)
+    time = np.arange(20000) / 1000.0
+    noise = 0.01 * rng.standard_normal((3, len(time)))
+    return {
+        "time": time,
+        "channel1": 0.1 * np.sin(2 * np.pi * 50 * time) + noise[0],
+        "channel2": np.sin(2 * np.pi * 1.25 * time) + noise[1],
+        "channel3": np.exp(-0.5 * ((time % 0.8) / 0.01) ** 2) + noise[2],
+    }
+
+
+def test_noise_power_matches_full_fft():
+    values = np.random.default_rng(0).standard_normal(1001)
+    spectrum = compute_spectrum(values)
+    n_fft = spectrum["n_fft"]
+    magnitude = np.abs(np.fft.fft(values, n=n_fft))
+    expected = np.var(magnitude[np.abs(np.fft.fftfreq(n_fft)) > 0.3])
+    assert noise_power(spectrum) == pytest.approx(expected, rel=1e-10)
+
+
+def test_shared_spectrum_gives_same_results(processed_data):
+    values, time = processed_data["channel3"], processed_data["time"]
+    spectrum = compute_spectrum(values)
+    assert calculate_snr(values, spectrum) == calculate_snr(values)
+    assert calculate_frequency_domain(values, time, spectrum) == calculate_frequency_domain(values, time)
+    dominant = calculate_frequency_domain(np.sin(2 * np.pi * 50 * time), time)["dominant_frequency"]
+    assert dominant == pytest.approx(50.0, abs=0.1)
+
+
+def test_snr_of_constant_signal_is_infinite():
+    assert calculate_snr(np.ones(64)) == float("inf")
+
+
+def test_statistics_match_numpy(processed_data):
+    values = processed_data["channel2"]
+    result = calculate_statistics(values)
+    assert result["median"] == np.median(values)
+    assert result["mean"] == pytest.approx(np.mean(values), rel=1e-12)
+    assert result["std"] == pytest.approx(np.std(values), rel=1e-9)
+
+
+def test_accumulate_statistics_matches_whole_signal(processed_data):
+    chunks = (
+        {name: processed_data[name][i:i + 3000] for name in ("channel1", "channel2", "channel3")}
+        for i in range(0, 20000, 3000)
+    )
+    accumulators = accumulate_statistics(chunks, capacity=1 << 15)
+    for name, accumulator in accumulators.items():
+        expected = calculate_statistics(processed_data[name])
+        for key, value in accumulator.result().items():
+            assert value == pytest.approx(expected[key], rel=1e-9, abs=1e-15)
+
+
+def test_parallel_matches_serial(processed_data):
+    serial = calculate_all_metrics(processed_data)
+    with ThreadPoolExecutor(3) as executor:
+        assert calculate_all_metrics(processed_data, executor=executor) == serial
+    assert calculate_all_metrics(processed_data, workers=2) == serial
+
+
+def test_metric_selection(processed_data):
+    result = calculate_all_metrics(processed_data, metrics=["snr"], channels=["channel2"])
+    assert list(result) == ["channel2"]
+    assert list(result["channel2"]) == ["snr"]
+    assert list(calculate_channel_metrics(processed_data["channel1"], processed_data["time"], metrics=[])) == []
+    with pytest.raises(ValueError):
+        calculate_all_metrics(processed_data, metrics=["nope"])
+    with pytest.raises(ValueError):
+        calculate_all_metrics(processed_data, metrics=["snr"], channels=["channel9"])
+
+
+def test_timings_are_recorded(processed_data):
+    timings = {}
+    calculate_all_metrics(processed_data, metrics=["peaks", "overall"], channels=["channel3"], timings=timings)
+    assert set(timings) == {"channel3.peaks", "overall"}
+
+
+def test_manual_batch_matches_single_rows():
+    rows = [(0.0, 0.8, 0.35, 0.1, 0.5), (1.0, 1.0, 0.3, 0.1, 0.5), (0.0, 1.0, 0.1, 0.1, 0.5)]
+    batch = calculate_all_manual_batch(*map(np.array, zip(*rows)))
+    single = calculate_all_manual(*rows[0])
+    assert batch["hr"][0] == pytest.approx(single["hr"])
+    assert batch["ptt"][0] == pytest.approx(single["ptt"])
+    assert batch["mbp"][0] == pytest.approx(single["mbp"])
+    assert batch["errors"] == [None, "R_i+1 must be greater than R_i", "PTT must be greater than 0"]
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from calculator.online_stats import OnlineStatistics, QuantileSketch, merge_statistics
+
+QUANTILES = (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99)
+
+
+def rank(values, value):
+    """Thứ hạng (tỉ lệ) của value trong values đã sắp xếp"""
+    return np.searchsorted(values, value, side="right") / len(values)
+
+
+def test_sketch_is_exact_below_capacity():
+    values = np.random.default_rng(0).standard_normal(1000)
+    sketch = QuantileSketch(capacity=1024)
+    sketch.update(values[:400])
+    sketch.update(values[400:])
+    assert sketch.exact
+    assert sketch.rank_error() == 0.0
+    for q in QUANTILES:
+        assert sketch.quantile(q) == np.quantile(values, q)
+
+
+@pytest.mark.parametrize("chunk_size", [100, 4096, 100000])
+def test_sketch_rank_error_bound(chunk_size):
+    values = np.random.default_rng(1).lognormal(size=200000)
+    sketch = QuantileSketch(capacity=1024)
+    for i in range(0, len(values), chunk_size):
+        sketch.update(values[i:i + chunk_size])
+    assert not sketch.exact
+    assert sketch.count == len(values)
+    ordered = np.sort(values)
+    bound = sketch.rank_error()
+    for q in QUANTILES:
+        assert abs(rank(ordered, sketch.quantile(q)) - q) <= bound + 1.0 / len(values)
+
+
+def test_sketch_merge_bound():
+    rng = np.random.default_rng(2)
+    parts = [rng.uniform(size=30000) + i for i in range(4)]
+    sketches = []
+    for part in parts:
+        sketch = QuantileSketch(capacity=512)
+        sketch.update(part)
+        sketches.append(sketch)
+    merged = QuantileSketch(capacity=512)
+    for sketch in sketches:
+        merged.merge(sketch)
+    ordered = np.sort(np.concatenate(parts))
+    assert merged.count == len(ordered)
+    for q in QUANTILES:
+        assert abs(rank(ordered, merged.quantile(q)) - q) <= merged.rank_error() + 1.0 / len(ordered)
+
+
+def test_empty_sketch():
+    with pytest.raises(ValueError):
+        QuantileSketch().quantile(0.5)
+    with pytest.raises(ValueError):
+        QuantileSketch(capacity=1)
+
+
+def test_online_statistics_matches_numpy():
+    values = 1e-3 * np.random.default_rng(3).standard_normal(50000) - 70e-3
+    stats = OnlineStatistics(capacity=2048)
+    for i in range(0, len(values), 777):
+        stats.update(values[i:i + 777])
+    result = stats.result()
+    assert result["mean"] == pytest.approx(np.mean(values), rel=1e-12)
+    assert result["std"] == pytest.approx(np.std(values), rel=1e-9)
+    assert result["min"] == np.min(values)
+    assert result["max"] == np.max(values)
+    assert result["range"] == np.max(values) - np.min(values)
+    bound = stats.sketch.rank_error() + 1.0 / len(values)
+    assert abs(rank(np.sort(values), result["median"]) - 0.5) <= bound
+
+
+def test_merge_statistics_matches_single_pass():
+    values = np.random.default_rng(4).standard_normal(20000)
+    accumulators = []
+    for part in np.array_split(values, 5):
+        stats = OnlineStatistics()
+        stats.update(part)
+        accumulators.append(stats)
+    merged = merge_statistics(accumulators + [OnlineStatistics()])
+    single = OnlineStatistics()
+    single.update(values)
+    for key, value in single.result().items():
+        assert merged.result()[key] == pytest.approx(value, rel=1e-12, abs=1e-15)
+
+
+def test_empty_statistics():
+    with pytest.raises(ValueError):
+        OnlineStatistics().result()
@@ -0,0 +1,218 @@
+import numpy as np
+import pytest
+
+from preprocessing.processor import (
+    _parse_lines,
+    calculate_time_axis,
+    calculate_time_step,
+    convert_adc_to_volt,
+    extract_channels,
+    iter_column_blocks,
+    preprocess_kernel,
+    process_signal_file,
+    read_channel_columns,
+    read_txt_file,
+    stream_signal_file,
+)
+
+# Dòng lỗi chèn vào file mẫu: (dòng, có bị loại không)
+MALFORMED_LINES = [
+    ("\n", False),
+    ("   \t \n", False),
+    ("1\t2\t3\t4\t5\t6\t7\t8\n", True),
+    ("1\t2\t3\t4\t5\t6\t7\tx\t9\n", True),
+    ("1\t2\t3\t4\t5\t6\t7\t8\tnan?\n", True),
+]
+
+
+def write_signal_file(path, n_rows=3000, seed=0, malformed=True, trailing_newline=True):
+    """
+    File TXT 9 cột với time step hợp lệ ở f1, f2, f3 hoặc không hợp lệ
+    (mean_step), xen kẽ các dòng lỗi
+
+    Returns:
+        (số dòng hợp lệ, số dòng bị loại)
+    """
+    rng = np.random.default_rng(seed)
+    # f1, f2 hợp lệ khi 0 < Amp < 2^23 / 2.5; f3 khi 2^24 < Amp3 < 2^24 + 2^23 / 2.5
+    amp1 = rng.integers(-1_000_000, 5_000_000, n_rows)
+    amp2 = rng.integers(-1_000_000, 5_000_000, n_rows)
+    amp3 = rng.integers(2**24 - 1_000_000, 2**24 + 5_000_000, n_rows)
+    lines = [
+        f"24\t17\t5\t1\t{952 + i % 1000}\t{i % 1000}.0\t{a}\t{b}\t{c}\n"
+        for i, (a, b, c) in enumerate(zip(amp1, amp2, amp3))
+    ]
+    rejected = 0
+    if malformed:
+        for k, (line, is_rejected) in enumerate(MALFORMED_LINES * 7):
+            lines.insert((k * 397 + 11) % len(lines), line)
+            rejected += is_rejected
+    text = "".join(lines)
+    if not trailing_newline:
+        text = text.rstrip("\n")
+    path.write_text(text)
+    return n_rows, rejected
+
+
+@pytest.fixture
+def signal_file(tmp_path):
+    path = tmp_path / "signal.txt"
+    n_rows, rejected = write_signal_file(path)
+    return path, n_rows, rejected
+
+
+def baseline_processing(path):
+    """Pipeline gốc: read_txt_file -> time step -> trục thời gian -> Volt"""
+    amp1, amp2, amp3 = extract_channels(read_txt_file(path))
+    time = calculate_time_axis(calculate_time_step(amp1, amp2, amp3))
+    return time, convert_adc_to_volt(amp1), convert_adc_to_volt(amp2), convert_adc_to_volt(amp3)
+
+
+@pytest.mark.parametrize("block_lines", [100, 1000, 1 << 16])
+def test_read_channel_columns_matches_read_txt_file(signal_file, block_lines):
+    path, n_rows, rejected = signal_file
+    data, count = read_channel_columns(path, block_lines=block_lines)
+    expected = read_txt_file(path)[:, 6:9]
+    assert data.shape == (n_rows, 3)
+    np.testing.assert_array_equal(data, expected)
+    assert count == rejected
+
+
+def test_read_channel_columns_without_trailing_newline(tmp_path):
+    path = tmp_path / "signal.txt"
+    n_rows, _ = write_signal_file(path, n_rows=500, malformed=False, trailing_newline=False)
+    data, count = read_channel_columns(path)
+    np.testing.assert_array_equal(data, read_txt_file(path)[:, 6:9])
+    assert (len(data), count) == (n_rows, 0)
+
+
+def test_read_channel_columns_float32(signal_file):
+    path, _, _ = signal_file
+    data, _ = read_channel_columns(path, dtype=np.float32)
+    assert data.dtype == np.float32
+    np.testing.assert_allclose(data, read_txt_file(path)[:, 6:9], rtol=1e-7)
+
+
+def test_parse_lines_rejects_like_read_txt_file():
+    good = "1\t2\t3\t4\t5\t6\t7\t8\t9\n"
+    lines = [good] * 100 + [line for line, _ in MALFORMED_LINES] + [good] * 100
+    blocks, rejected = _parse_lines(lines, (6, 7, 8), np.float64)
+    data = np.concatenate(blocks)
+    np.testing.assert_array_equal(data, np.tile([7.0, 8.0, 9.0], (200, 1)))
+    assert rejected == sum(is_rejected for _, is_rejected in MALFORMED_LINES)
+
+
+def test_parse_lines_ignores_metadata_columns():
+    # Khác read_txt_file: chỉ các cột được đọc mới được kiểm tra
+    blocks, rejected = _parse_lines(["x\t2\t3\t4\t5\t6\t7\t8\t9\n"], (6, 7, 8), np.float64)
+    np.testing.assert_array_equal(np.concatenate(blocks), [[7.0, 8.0, 9.0]])
+    assert rejected == 0
+
+
+def test_iter_column_blocks_counts_rejected(signal_file):
+    path, n_rows, rejected = signal_file
+    blocks = list(iter_column_blocks(path, block_lines=500))
+    assert sum(len(block) for block, _ in blocks) == n_rows
+    assert sum(count for _, count in blocks) == rejected
+
+
+def test_preprocess_kernel_matches_baseline(signal_file):
+    path, _, _ = signal_file
+    data, _ = read_channel_columns(path)
+    amp1, amp2, amp3 = data.T
+    (time, channel1, channel2, channel3), mean_step = preprocess_kernel(amp1, amp2, amp3)
+
+    steps = calculate_time_step(amp1, amp2, amp3)
+    np.testing.assert_array_equal(channel1, convert_adc_to_volt(amp1))
+    np.testing.assert_array_equal(channel2, convert_adc_to_volt(amp2))
+    np.testing.assert_array_equal(channel3, convert_adc_to_volt(amp3))
+    np.testing.assert_allclose(time, calculate_time_axis(steps), rtol=1e-12)
+
+    # Cùng mean_step: trục thời gian giống hệt
+    expected = calculate_time_axis(calculate_time_step(amp1, amp2, amp3, mean_step=mean_step))
+    out, _ = preprocess_kernel(amp1, amp2, amp3, mean_step=mean_step)
+    np.testing.assert_array_equal(out[0], expected)
+
+
+def test_preprocess_kernel_float32(signal_file):
+    path, _, _ = signal_file
+    amp1, amp2, amp3 = read_channel_columns(path)[0].T
+    out, _ = preprocess_kernel(amp1, amp2, amp3, dtype=np.float32)
+    time, *channels = baseline_processing(path)
+    assert out.dtype == np.float32
+    np.testing.assert_allclose(out[0], time, rtol=5e-7)
+    for actual, expected in zip(out[1:], channels):
+        np.testing.assert_allclose(actual, expected, rtol=6e-8)
+
+
+def test_process_signal_file_matches_baseline(signal_file):
+    path, _, rejected = signal_file
+    result = process_signal_file(path)
+    time, *channels = baseline_processing(path)
+    np.testing.assert_allclose(result["time"], time, rtol=1e-12)
+    for name, expected in zip(("channel1", "channel2", "channel3"), channels):
+        np.testing.assert_array_equal(result[name], expected)
+    assert result["rejected_rows"] == rejected
+
+
+def test_process_signal_file_records_timings(signal_file):
+    path, n_rows, _ = signal_file
+    timings = {}
+    process_signal_file(path, timings=timings)
+    assert {"read", "tolist"} <= set(timings)
+    assert timings["read"]["samples"] == n_rows
+    assert min(stage["wall"] for stage in timings.values()) >= 0
+
+
+def test_process_signal_file_from_cache(signal_file, tmp_path):
+    path, _, rejected = signal_file
+    expected = process_signal_file(path)
+    for _ in range(2):
+        # Lần đầu tạo cache, lần sau đọc bằng memmap
+        result = process_signal_file(path, cache_dir=tmp_path / "cache")
+        np.testing.assert_allclose(result["time"], expected["time"], rtol=1e-12)
+        for name in ("channel1", "channel2", "channel3"):
+            np.testing.assert_array_equal(result[name], expected[name])
+        assert result["rejected_rows"] == rejected
+
+
+def concat_chunks(chunks):
+    chunks = list(chunks)
+    assert [chunk["start"] for chunk in chunks] == list(
+        np.cumsum([0] + [len(chunk["time"]) for chunk in chunks[:-1]])
+    )
+    return {
+        name: np.concatenate([chunk[name] for chunk in chunks])
+        for name in ("time", "channel1", "channel2", "channel3")
+    }
+
+
+@pytest.mark.parametrize("chunk_size", [257, 1000, 4096])
+def test_stream_signal_file_matches_process_signal_file(signal_file, chunk_size):
+    path, _, _ = signal_file
+    expected = process_signal_file(path)
+    streamed = concat_chunks(stream_signal_file(path, chunk_size=chunk_size))
+    np.testing.assert_allclose(streamed["time"], expected["time"], rtol=1e-12)
+    for name in ("channel1", "channel2", "channel3"):
+        np.testing.assert_array_equal(streamed[name], expected[name])
+
+
+@pytest.mark.parametrize("method", ["median", "mean"])
+def test_stream_signal_file_with_baseline(signal_file, method):
+    path, _, _ = signal_file
+    expected = process_signal_file(path, baseline=method, baseline_window=0.2)
+    streamed = concat_chunks(
+        stream_signal_file(path, chunk_size=300, baseline=method, baseline_window=0.2)
+    )
+    np.testing.assert_allclose(streamed["time"], expected["time"], rtol=1e-12)
+    for name in ("channel1", "channel2", "channel3"):
+        np.testing.assert_allclose(streamed[name], expected[name], rtol=1e-12, atol=1e-15)
+
+
+def test_empty_file_is_rejected(tmp_path):
+    path = tmp_path / "empty.txt"
+    path.write_text("garbage\n\n1\t2\t3\n")
+    with pytest.raises(ValueError):
+        process_signal_file(path)
+    with pytest.raises(ValueError):
+        list(stream_signal_file(path))
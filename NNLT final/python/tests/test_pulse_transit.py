@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from calculator.pulse_transit import (
+    calculate_pulse_transit,
+    detect_pulse_feet,
+    pair_r_peaks_with_feet,
+    reject_outliers,
+)
+from tests.conftest import make_recording
+
+
+@pytest.mark.parametrize("ptt", [0.12, 0.2, 0.3])
+def test_known_ptt(ptt):
+    time, _, ppg, ecg, beats = make_recording(duration=60.0, ptt=ptt)
+    result = calculate_pulse_transit(ecg, ppg, time, h=1.0)
+
+    assert result["count"] >= 0.95 * len(beats)
+    assert result["median_ptt"] == pytest.approx(ptt, abs=0.005)
+    values = np.array(result["ptt"])
+    assert np.all(np.abs(values - ptt) < 0.01)
+    assert result["mean_mbp"] == pytest.approx(result["median_mbp"], rel=0.02)
+
+
+def test_feet_are_unbiased(recording):
+    time, _, ppg, _, beats = recording
+    feet = detect_pulse_feet(ppg, time)
+    true = beats[beats + 0.2 < time[-1]] + 0.2
+    error = feet[:, None] - true[None, :]
+    error = error[np.arange(len(feet)), np.argmin(np.abs(error), axis=1)]
+    assert len(feet) == len(true)
+    assert abs(np.median(error)) < 0.004
+    assert np.max(np.abs(error)) < 0.01
+
+
+def test_pairing_skips_feet_before_min_ptt():
+    r_times = np.array([1.0, 2.0, 3.0])
+    # Chân xung giả 2 ms sau R-peak đầu tiên
+    foot_times = np.array([1.002, 1.2, 2.2, 3.6])
+    r_index, foot_index = pair_r_peaks_with_feet(r_times, foot_times, max_ptt=0.5, min_ptt=0.08)
+    assert r_index.tolist() == [0, 1]
+    assert foot_index.tolist() == [1, 2]
+
+
+def test_outliers_and_impossible_mbp_are_rejected(recording):
+    time, _, ppg, ecg, _ = recording
+    clean = calculate_pulse_transit(ecg, ppg, time, h=1.7)
+
+    # Xung giả trước xung thật ở một số nhịp: PTT ~0.11 s, MBP > 300
+    corrupted = ppg.copy()
+    for r in np.array(clean["r_times"])[::10]:
+        corrupted += 0.3e-3 * np.exp(-0.5 * ((time - r - 0.13) / 0.01) ** 2)
+    result = calculate_pulse_transit(ecg, corrupted, time, h=1.7)
+
+    assert result["rejected"] > clean["rejected"]
+    assert np.all(np.abs(np.array(result["ptt"]) - 0.2) < 0.01)
+    assert max(result["mbp"]) <= 300.0
+    assert result["median_ptt"] == pytest.approx(clean["median_ptt"], abs=0.005)
+
+
+def test_reject_outliers():
+    values = np.array([0.2, 0.21, 0.19, 0.2, 0.01, 0.2, 0.9])
+    assert reject_outliers(values).tolist() == [True, True, True, True, False, True, False]
+    assert reject_outliers(np.array([0.2, 0.2, 0.2])).all()
+    assert reject_outliers(np.empty(0)).shape == (0,)
+
+
+def test_without_h():
+    time, _, ppg, ecg, _ = make_recording(duration=10.0)
+    result = calculate_pulse_transit(ecg, ppg, time)
+    assert result["mbp"] is None and result["mean_mbp"] is None and result["median_mbp"] is None
+    assert result["count"] > 0
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import VOLT_TO_ADC, iter_recording, write_recording
+from preprocessing.processor import process_signal_file
+from tests.conftest import SAMPLING_RATE, make_recording
+
+
+def test_recording_is_reproducible():
+    def generate(seed):
+        return np.concatenate([np.column_stack(block[1:]) for block in iter_recording(10000, seed=seed, block=4096)])
+
+    np.testing.assert_array_equal(generate(0), generate(0))
+    assert not np.array_equal(generate(0), generate(1))
+
+
+def test_written_file_round_trips(tmp_path):
+    path = tmp_path / "synthetic.txt"
+    assert write_recording(path, 5000) == path.stat().st_size
+    result = process_signal_file(path)
+    assert result["rejected_rows"] == 0
+    np.testing.assert_allclose(result["time"][:3], [0.0, 0.001, 0.002])
+
+    _, pcg, ppg, ecg, _ = make_recording(duration=5.0)
+    # ADC được ghi với 10 chữ số có nghĩa
+    for name, expected in zip(("channel1", "channel2", "channel3"), (pcg, ppg, ecg)):
+        np.testing.assert_allclose(result[name], expected, rtol=1e-8, atol=1 / VOLT_TO_ADC)
+
+
+def test_r_peaks_at_beat_times(recording):
+    time, _, _, ecg, beats = recording
+    for beat in beats[1:10]:
+        window = (time > beat - 0.1) & (time < beat + 0.1)
+        assert time[window][np.argmax(ecg[window])] == pytest.approx(beat, abs=5 / SAMPLING_RATE)